@@ -1,54 +1,59 @@
-from flask import Flask, render_template, request, jsonify
-from flask_socketio import SocketIO
+import json
+
+from flask import Flask, Response, abort, render_template, send_from_directory, request, jsonify, stream_with_context
+from flask_socketio import SocketIO, emit
 from services.pokeapi import (
-    get_all_pokemon, 
-    get_pokemon_details, 
-    get_pokemon_species, 
-    get_evolution_chain, 
-    get_ability_description,
-    get_pokemon_varieties_details, 
+    get_pokemon_details,
     get_move_details,
-    get_generic_z_moves_local
+    get_generic_z_moves_local,
+    iter_moves_details_in_parallel
 )
 
-from services.translator import translate_to_portuguese
+from services.catalog import get_catalog_page
+from services.search_index import get_search_index
+from services.detail_planner import load_pokemon_detail
+from services.move_store import get_learnable_move_names, get_local_moves, save_moves
+from services.coverage import get_coverage_index, get_pokemon_coverage, get_team_coverage, type_defense
+from services.team_builder import build_team, get_team_search_space
+
+from services.translator import translate_batch, translate_to_portuguese
 
-from services.gemini import get_pokemon_agent_response 
+from services.chat_stream import ChatStream
+from services.page_cache import cached
+from services.fragment_cache import FragmentCacheExtension
+from services import metrics, profiler, warmup
+from services.gemini import get_agent_stats, get_pokemon_agent_response, stream_pokemon_agent_response
 
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'secret!'
+app.jinja_env.add_extension(FragmentCacheExtension)
 socketio = SocketIO(app, async_mode='gevent')
+metrics.init_app(app)
+profiler.init_app(app)
+
+get_search_index()
+get_coverage_index()
+get_team_search_space()
+
+if warmup.ENABLED:
+    socketio.start_background_task(warmup.run_forever, socketio.sleep)
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/pokedex')
+@cached()
 def pokedex():
-    page = int(request.args.get('page', 1))
+    page = request.args.get('page', 1, type=int)
     per_page = 70
     
-    all_data = get_all_pokemon()
-    if not all_data:
-        return render_template('pokedex.html', pokemon_list=[], page=page, total_pages=0)
-    
-    pokemon_list = all_data['results']
-    total_items = len(pokemon_list)
-    total_pages = (total_items + per_page - 1) // per_page
-    
-    start = (page - 1) * per_page
-    end = start + per_page
-    
-    page_items = []
-    for p in pokemon_list[start:end]:
-        p_id = p['url'].split('/')[-2]
-        page_items.append({
-            'name': p['name'],
-            'url': p['url'],
-            'id': p_id,
-            'image': f"https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/{p_id}.png"
-        })
+    page_items, total_items, total_pages = get_catalog_page(page, per_page)
+    if not page_items:
+        abort(404)
+    if page < total_pages:
+        warmup.prefetch_catalog_page(page + 1, per_page)
         
     return render_template('pokedex.html', 
                             pokemons=page_items, 
@@ -64,27 +69,13 @@ def search_pokemon_api():
     if len(query) < 2:
         return jsonify([])
     
-    all_pokemon_data = get_all_pokemon()
-    
-    if not all_pokemon_data or not all_pokemon_data.get('results'):
-        return jsonify([])
+    pokemon_type = request.args.get('type')
+    generation = request.args.get('generation', type=int)
 
-    results = []
-    
-    for pokemon in all_pokemon_data['results']:
-        name = pokemon['name']
-        
-        url_parts = pokemon['url'].split('/')
-        pokemon_id = url_parts[-2]
-        
-        if query in name or query == pokemon_id:
-            results.append({
-                'name': name,
-                'id': pokemon_id,
-                'url': pokemon['url'] 
-            })
-            if len(results) >= 10:
-                break
+    matches = get_search_index().search(
+        query, limit=10, pokemon_type=pokemon_type, generation=generation
+    )
+    results = [{'name': p['name'], 'id': p['id'], 'url': p['url']} for p in matches]
     return jsonify(results)
 
 def calculate_stats_range(stats_data):
@@ -116,75 +107,152 @@ def calculate_stats_range(stats_data):
     return ranges
 
 @app.route('/pokemon/<name_or_id>')
+@cached()
 def pokemon_detail(name_or_id):
     
-    pokemon = get_pokemon_details(name_or_id)
-    if not pokemon:
+    context = load_pokemon_detail(name_or_id)
+    if not context:
         return "Pokemon não encontrado", 404
     
+    pokemon = context['pokemon']
     pokemon['stats_ranges'] = calculate_stats_range(pokemon['stats'])
 
-    
-    species = None
-    if 'species' in pokemon and 'url' in pokemon['species']:
-        species_url = pokemon['species']['url']
-        species = get_pokemon_species(species_url) 
-    elif pokemon.get('id'):
-          species = get_pokemon_species(pokemon['id'])
-
-    
-    evolution_chain = None
-    varieties = []
-    
-    if species:
-        if species.get('evolution_chain') and species['evolution_chain'].get('url'):
-            evolution_chain = get_evolution_chain(species['evolution_chain']['url'])
-        
-        if species.get('flavor_text'):
-            try:
-                species['flavor_text'] = translate_to_portuguese(species['flavor_text'])
-            except:
-                pass 
-
-        if species.get('id'):
-            varieties = get_pokemon_varieties_details(species['id']) 
-
-
-    abilities_with_desc = []
-    for ability_name in pokemon['abilities']:
-        ability_data = get_ability_description(ability_name)
-        
-        if ability_data and ability_data.get('description'):
-            try:
-                ability_data['description'] = translate_to_portuguese(ability_data['description'])
-            except:
-                pass 
-                
-        abilities_with_desc.append(ability_data)
-        
+    try:
+        defense = get_pokemon_coverage(pokemon['id'])['defense']
+    except KeyError:
+        defense = type_defense(pokemon['types'])
     
     return render_template('detail.html', 
                             pokemon=pokemon, 
-                            species=species,
-                            evolution_chain=evolution_chain,
-                            abilities=abilities_with_desc,
-                            varieties=varieties) 
+                            species=context['species'],
+                            evolution_chain=context['evolution_chain'],
+                            abilities=context['abilities'],
+                            varieties=context['varieties'],
+                            defense=defense) 
 
 @app.route('/api/move/<move_name>')
+@cached()
 def get_move_info(move_name):
     
     move_details = get_move_details(move_name)
     if move_details:
+        # Cópia: o dict é o resultado compartilhado do lru_cache.
+        move_details = dict(move_details)
         if move_details.get('effect'):
             try:
                 move_details['effect'] = translate_to_portuguese(move_details['effect'])
-            except:
-                pass 
+            except Exception as e:
+                print(f"Erro ao traduzir efeito do golpe {move_name}: {e}")
                 
         return jsonify(move_details)
     return jsonify({'error': 'Move not found'}), 404
 
+def iter_moves_ndjson(move_names):
+    local_moves = get_local_moves(move_names)
+    missing = [name for name in move_names if name not in local_moves]
+
+    local_list = list(local_moves.values())
+    effects = translate_batch(move['effect'] for move in local_list)
+    for move, effect in zip(local_list, effects):
+        yield json.dumps(dict(move, effect=effect)) + '\n'
+
+    found = set()
+    for move in iter_moves_details_in_parallel(missing, translate_to_portuguese):
+        found.add(move['name'])
+        yield json.dumps(move) + '\n'
+
+    # Guarda no banco de cache o que veio da PokeAPI (texto original, sem tradução).
+    # Respostas montadas a partir do fallback local (sem id) não são regravadas.
+    fetched = [get_move_details(name) for name in found]
+    save_moves([move for move in fetched if move and move.get('id')])
+
+    for name in missing:
+        if name not in found:
+            yield json.dumps({'name': name, 'error': 'Move not found'}) + '\n'
+
+@app.route('/api/moves/batch', methods=['GET', 'POST'])
+def get_moves_batch():
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Corpo JSON inválido'}), 400
+    move_names = data.get('moves') or request.args.getlist('move')
+    if not isinstance(move_names, list) or not all(isinstance(name, str) for name in move_names):
+        return jsonify({'error': 'moves deve ser uma lista de nomes'}), 400
+
+    pokemon_id = data.get('pokemon_id') or request.args.get('pokemon_id', type=int)
+    if isinstance(pokemon_id, str) and pokemon_id.isdigit():
+        pokemon_id = int(pokemon_id)
+    if pokemon_id is not None and (type(pokemon_id) is not int or pokemon_id <= 0):
+        return jsonify({'error': 'pokemon_id inválido'}), 400
+
+    if not move_names and pokemon_id:
+        move_names = get_learnable_move_names(pokemon_id)
+        if not move_names:
+            pokemon = get_pokemon_details(pokemon_id)
+            move_names = [m['name'] for m in pokemon['moves']] if pokemon else []
+
+    if not move_names:
+        return jsonify({'error': 'Nenhum ataque informado'}), 400
+
+    move_names = list(dict.fromkeys(move_names))
+    return Response(stream_with_context(iter_moves_ndjson(move_names)), mimetype='application/x-ndjson')
+
+@app.route('/api/coverage/<name_or_id>')
+def get_coverage_api(name_or_id):
+    try:
+        return jsonify(get_pokemon_coverage(name_or_id.lower().strip()))
+    except KeyError:
+        return jsonify({'error': 'Pokemon not found'}), 404
+
+@app.route('/api/team_coverage', methods=['GET', 'POST'])
+def get_team_coverage_api():
+    data = request.get_json(silent=True) or {}
+    team = data.get('team') or [name for name in request.args.get('team', '').split(',') if name]
+
+    if not 1 <= len(team) <= 6:
+        return jsonify({'error': 'Informe de 1 a 6 Pokémon'}), 400
+
+    try:
+        return jsonify(get_team_coverage([str(member).lower().strip() for member in team]))
+    except KeyError as e:
+        return jsonify({'error': str(e.args[0])}), 404
+
+def _list_param(data, name):
+    value = data.get(name)
+    if value is None:
+        value = [item for arg in request.args.getlist(name) for item in arg.split(',') if item]
+    return value if isinstance(value, list) else [value]
+
+@app.route('/api/team_builder', methods=['GET', 'POST'])
+def team_builder_api():
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Corpo JSON inválido'}), 400
+    try:
+        generations = [int(g) for g in _list_param(data, 'generation')]
+        size = int(data.get('size') or request.args.get('size', 6))
+        max_bst = data.get('max_bst') or request.args.get('max_bst')
+        max_member_bst = int(max_bst) if max_bst is not None else None
+    except (TypeError, ValueError):
+        return jsonify({'error': 'generation, size e max_bst devem ser números'}), 400
+
+    try:
+        result = build_team(
+            required=[str(p).lower().strip() for p in _list_param(data, 'required')],
+            generations=generations or None,
+            banned_types=[str(t) for t in _list_param(data, 'banned_types')],
+            exclude=[str(p).lower().strip() for p in _list_param(data, 'exclude')],
+            size=size,
+            max_member_bst=max_member_bst,
+        )
+    except KeyError as e:
+        return jsonify({'error': str(e.args[0])}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(result)
+
 @app.route('/api/z_moves_generic', methods=['GET'])
+@cached()
 def get_z_moves_api():
     z_moves_data = get_generic_z_moves_local() 
     return jsonify(z_moves_data)
@@ -199,7 +267,7 @@ def ai_chat():
         if not prompt:
             return jsonify({'error': 'Nenhum prompt fornecido'}), 400
         
-        response_text = get_pokemon_agent_response(prompt)
+        response_text = get_pokemon_agent_response(prompt, data.get('history'), data.get('session_id'))
         
         return jsonify({'response': response_text})
 
@@ -207,6 +275,75 @@ def ai_chat():
         print(f"Erro no processamento da requisição /api/ai_chat: {e}")
         return jsonify({'error': 'Erro interno do servidor'}), 500
 
+@app.route('/api/ai_chat/stats')
+def ai_chat_stats():
+    return jsonify(get_agent_stats())
+
+@app.route('/metrics')
+def prometheus_metrics():
+    return metrics.metrics_response()
+
+@app.route('/admin/profiles')
+def admin_profiles():
+    if not profiler.ENABLED:
+        abort(404)
+    if not profiler.admin_allowed():
+        abort(403)
+    return render_template('profiles.html', profiles=profiler.list_profiles())
+
+@app.route('/admin/profiles/<path:filename>')
+def admin_profile_file(filename):
+    if not profiler.ENABLED:
+        abort(404)
+    if not profiler.admin_allowed():
+        abort(403)
+    return send_from_directory(profiler.PROFILE_DIR, filename, as_attachment=True)
+
+# Chat em streaming pelo SocketIO: 'chat_message' {id, prompt, session_id} responde com
+# vários 'chat_chunk' {id, seq, text} (com ack) e um 'chat_done'. Uma resposta
+# por conexão: nova mensagem, 'chat_cancel' ou desconexão cancelam a anterior.
+_chat_streams = {}
+
+@socketio.on('chat_message')
+def chat_message(data):
+    data = data or {}
+    request_id = data.get('id')
+    prompt = (data.get('prompt') or '').strip()
+    if not prompt:
+        emit('chat_error', {'id': request_id, 'error': 'Nenhum prompt fornecido'})
+        return
+
+    sid = request.sid
+    previous = _chat_streams.get(sid)
+    if previous:
+        previous.cancel()
+
+    def emit_to_client(event, payload, callback=None):
+        socketio.emit(event, payload, to=sid, callback=callback)
+
+    stream = ChatStream(request_id, emit_to_client, socketio.sleep)
+    _chat_streams[sid] = stream
+    try:
+        stream.run(stream_pokemon_agent_response(prompt, data.get('history'), data.get('session_id')))
+    except Exception as e:
+        print(f"Erro no chat em streaming: {e}")
+        emit('chat_error', {'id': request_id, 'error': 'Erro interno do servidor'})
+    finally:
+        if _chat_streams.get(sid) is stream:
+            del _chat_streams[sid]
+
+@socketio.on('chat_cancel')
+def chat_cancel(data=None):
+    stream = _chat_streams.get(request.sid)
+    if stream and (not data or data.get('id') in (None, stream.request_id)):
+        stream.cancel()
+
+@socketio.on('disconnect')
+def chat_disconnect(*args):
+    stream = _chat_streams.pop(request.sid, None)
+    if stream:
+        stream.cancel()
+
 
 if __name__ == '__main__':
     
@@ -0,0 +1,85 @@
+import argparse
+import time
+
+import numpy as np
+
+from services.battle_engine import compute_damage, damage, load_battle_data
+
+# Vazão do motor de dano:
+#
+#   python -m benchmarks.battle_engine_bench
+#   python -m benchmarks.battle_engine_bench --pairs 20000 --batch 2000000
+#
+# "por par" chama damage() uma vez por (atacante, defensor, ataque), que é o
+# que um loop em Python faria; "lote" passa os mesmos índices como arrays.
+
+
+def _timeit(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(pairs, batch, repeat, seed):
+    start = time.perf_counter()
+    data = load_battle_data()
+    print(f"carga: {time.perf_counter() - start:.3f}s "
+          f"({len(data.pokemon_ids)} Pokémon, {len(data.move_names)} ataques de dano)")
+
+    rng = np.random.default_rng(seed)
+    n_pokemon = len(data.pokemon_ids)
+    n_moves = len(data.move_names)
+
+    attackers = rng.integers(n_pokemon, size=pairs)
+    defenders = rng.integers(n_pokemon, size=pairs)
+    moves = rng.integers(n_moves, size=pairs)
+    triples = [
+        (data.pokemon_names[a], data.pokemon_names[d], data.move_names[m])
+        for a, d, m in zip(attackers, defenders, moves)
+    ]
+
+    def per_pair():
+        for attacker, defender, move in triples:
+            damage(attacker, defender, move)
+
+    elapsed = _timeit(per_pair, repeat)
+    print(f"por par:          {pairs:>10} cálculos em {elapsed:.3f}s -> {pairs / elapsed:>14,.0f}/s")
+
+    def per_pair_indexed():
+        for a, d, m in zip(attackers, defenders, moves):
+            compute_damage(data, a, d, m)
+
+    elapsed = _timeit(per_pair_indexed, repeat)
+    print(f"por par (índices): {pairs:>9} cálculos em {elapsed:.3f}s -> {pairs / elapsed:>14,.0f}/s")
+
+    attacker = data.pokemon_index('garchomp') if 'garchomp' in data.pokemon_names else 0
+    all_defenders = np.arange(n_pokemon)
+    learnset = data.learnset(attacker)
+    one_vs_all_calls = max(batch // (n_pokemon * max(len(learnset), 1)), 1)
+
+    def one_vs_all():
+        for _ in range(one_vs_all_calls):
+            compute_damage(data, attacker, all_defenders[:, None], learnset[None, :])
+
+    elapsed = _timeit(one_vs_all, repeat)
+    total = one_vs_all_calls * n_pokemon * max(len(learnset), 1)
+    print(f"1 atacante x todos: {total:>9} cálculos em {elapsed:.3f}s -> {total / elapsed:>14,.0f}/s")
+
+    attackers = rng.integers(n_pokemon, size=batch)
+    defenders = rng.integers(n_pokemon, size=batch)
+    moves = rng.integers(n_moves, size=batch)
+    elapsed = _timeit(lambda: compute_damage(data, attackers, defenders, moves), repeat)
+    print(f"lote:             {batch:>10} cálculos em {elapsed:.3f}s -> {batch / elapsed:>14,.0f}/s")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mede a vazão do motor de dano.")
+    parser.add_argument('--pairs', type=int, default=10000, help="Cálculos no modo por par.")
+    parser.add_argument('--batch', type=int, default=1000000, help="Cálculos no modo em lote.")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetições (vale a melhor).")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    run(args.pairs, args.batch, args.repeat, args.seed)
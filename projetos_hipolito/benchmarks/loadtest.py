@@ -0,0 +1,292 @@
+from gevent import monkey
+
+monkey.patch_all()
+
+import argparse
+import json
+import os
+import random
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import requests
+from gevent.pool import Pool
+
+from services.database import POKEMONS_DB_PATH, get_connection
+
+# Teste de carga das rotas principais, com cache frio e quente:
+#
+#   python -m benchmarks.loadtest --spawn --concurrency 50 --requests 300 --output results.json
+#   python -m benchmarks.loadtest --spawn --baseline benchmarks/baseline.json
+#   python -m benchmarks.loadtest --url http://127.0.0.1:5000 --routes pokemon move
+#
+# --spawn sobe o mock de benchmarks/mock_upstream.py e o app com o comando
+# "web" do Procfile (gunicorn + worker gevent), apontando PokeAPI, Translate e
+# Gemini para o mock e usando um banco de cache novo, então a fase "cold" é
+# realmente fria. Sem --spawn o alvo é --url, e "cold" é só a primeira
+# passada por cada chave.
+#
+# Para cada rota: a fase cold faz --requests requisições com chaves distintas
+# e a fase warm repete as mesmas chaves, sempre com --concurrency requisições
+# em paralelo. O resultado (p50/p95/p99, média, máximo, vazão e erros) vai
+# para --output em JSON; com --baseline, p95 e vazão são comparados com um
+# resultado salvo e o processo sai com código 1 se algum piorar além de
+# --tolerance. --save-baseline grava o resultado como a nova baseline.
+
+ROUTES = ('pokedex', 'search', 'pokemon', 'move', 'ai_chat')
+PERCENTILES = (50, 95, 99)
+DEFAULT_TOLERANCE = 0.2
+POKEDEX_PAGES = 15
+
+CHAT_PROMPTS = (
+    "status do {pokemon}",
+    "fraquezas do {pokemon}",
+    "qual o melhor moveset para {pokemon}?",
+    "monte um time com {pokemon}",
+    "conte a história do {pokemon}",
+)
+
+
+def _sample_keys(route, count, rng):
+    with get_connection(POKEMONS_DB_PATH) as conn:
+        pokemon = [row['nome'].lower() for row in conn.execute("SELECT nome FROM pokemons WHERE id < 10000 ORDER BY id")]
+        pokemon_ids = [row['id'] for row in conn.execute("SELECT id FROM pokemons WHERE id < 10000 ORDER BY id")]
+        moves = [row['nome'] for row in conn.execute("SELECT nome FROM moves_list WHERE tipo IS NOT NULL ORDER BY nome")]
+
+    def pick(items):
+        # Chaves distintas enquanto der; depois repete.
+        shuffled = items[:]
+        rng.shuffle(shuffled)
+        return [shuffled[i % len(shuffled)] for i in range(count)]
+
+    if route == 'pokedex':
+        return [('GET', f"/pokedex?page={page}", None) for page in pick(list(range(1, POKEDEX_PAGES + 1)))]
+    if route == 'search':
+        return [('GET', f"/api/search_pokemon?query={name[:rng.randint(2, 5)]}", None) for name in pick(pokemon)]
+    if route == 'pokemon':
+        return [('GET', f"/pokemon/{pokemon_id}", None) for pokemon_id in pick(pokemon_ids)]
+    if route == 'move':
+        return [('GET', f"/api/move/{name}", None) for name in pick(moves)]
+    if route == 'ai_chat':
+        return [
+            ('POST', '/api/ai_chat', {'prompt': rng.choice(CHAT_PROMPTS).format(pokemon=name)})
+            for name in pick(pokemon)
+        ]
+    raise ValueError(f"Rota desconhecida: {route}")
+
+
+def _summary(latencies, errors, elapsed):
+    latencies = np.asarray(latencies, dtype=np.float64) * 1000
+    summary = {
+        'requests': int(latencies.size),
+        'errors': errors,
+        'throughput': round(latencies.size / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(float(latencies.mean()), 2) if latencies.size else None,
+        'max_ms': round(float(latencies.max()), 2) if latencies.size else None,
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = round(float(np.percentile(latencies, p)), 2) if latencies.size else None
+    return summary
+
+
+def run_phase(session, base_url, keys, concurrency, timeout):
+    latencies = []
+    errors = 0
+
+    def call(key):
+        nonlocal errors
+        method, path, body = key
+        start = time.perf_counter()
+        try:
+            response = session.request(method, base_url + path, json=body, timeout=timeout)
+            response.content
+            if response.status_code >= 400:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    Pool(concurrency).map(call, keys)
+    return _summary(latencies, errors, time.perf_counter() - start)
+
+
+def run(base_url, routes, concurrency, count, seed, timeout):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+
+    results = {}
+    for route in routes:
+        rng = random.Random(f"{seed}:{route}")
+        keys = _sample_keys(route, count, rng)
+        cold = run_phase(session, base_url, keys, concurrency, timeout)
+        rng.shuffle(keys)
+        warm = run_phase(session, base_url, keys, concurrency, timeout)
+        results[route] = {'cold': cold, 'warm': warm}
+        for phase, summary in (('cold', cold), ('warm', warm)):
+            print(f"{route:<8} {phase:<4}  p50 {summary['p50_ms']:>8.1f}ms  p95 {summary['p95_ms']:>8.1f}ms  "
+                  f"p99 {summary['p99_ms']:>8.1f}ms  {summary['throughput']:>8.1f} req/s  erros {summary['errors']}")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # Lista de regressões: p95 maior ou vazão menor que a baseline além da tolerância.
+    regressions = []
+    for route, phases in results.items():
+        for phase, summary in phases.items():
+            reference = baseline.get('results', {}).get(route, {}).get(phase)
+            if not reference:
+                continue
+            if reference.get('p95_ms') and summary['p95_ms'] > reference['p95_ms'] * (1 + tolerance):
+                regressions.append(f"{route}/{phase}: p95 {reference['p95_ms']}ms -> {summary['p95_ms']}ms")
+            if reference.get('throughput') and summary['throughput'] < reference['throughput'] * (1 - tolerance):
+                regressions.append(
+                    f"{route}/{phase}: vazão {reference['throughput']} -> {summary['throughput']} req/s"
+                )
+            if summary['errors'] > reference.get('errors', 0):
+                regressions.append(f"{route}/{phase}: erros {reference.get('errors', 0)} -> {summary['errors']}")
+    return regressions
+
+
+def _procfile_command(host, port):
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Procfile')
+    with open(path) as f:
+        line = next(line for line in f if line.startswith('web:'))
+    return shlex.split(line[len('web:'):]) + ['--bind', f"{host}:{port}"]
+
+
+def _wait_until_up(url, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Processo terminou antes de responder: {' '.join(process.args)}")
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} não respondeu em {timeout}s")
+
+
+def spawn(host, app_port, mock_port, mock_args):
+    # Sobe mock + app (Procfile) com um banco de cache novo. Devolve (url, processos).
+    mock_url = f"http://{host}:{mock_port}"
+    cache_dir = tempfile.mkdtemp(prefix='pokebench-')
+    env = dict(
+        os.environ,
+        POKEAPI_BASE_URL=f"{mock_url}/api/v2",
+        TRANSLATE_BASE_URL=f"{mock_url}/translate",
+        GEMINI_BASE_URL=f"{mock_url}/",
+        GEMINI_API_KEY='mock',
+        POKEAPI_CACHE_DB_PATH=os.path.join(cache_dir, 'cache.db'),
+        # Sem aquecimento: a fase cold precisa começar com os caches vazios.
+        WARMUP_ENABLED='0',
+    )
+    env.pop('POKEAPI_OFFLINE', None)
+    cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    mock = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.mock_upstream', '--host', host, '--port', str(mock_port)] + mock_args,
+        cwd=cwd, env=env
+    )
+    processes = [mock]
+    try:
+        _wait_until_up(f"{mock_url}/_mock/stats", mock)
+        app_process = subprocess.Popen(_procfile_command(host, app_port), cwd=cwd, env=env)
+        processes.append(app_process)
+        app_url = f"http://{host}:{app_port}"
+        _wait_until_up(app_url + '/', app_process)
+    except Exception:
+        stop(processes)
+        raise
+    return app_url, processes
+
+
+def stop(processes):
+    for process in reversed(processes):
+        process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga das rotas do app (cache frio e quente).")
+    parser.add_argument('--url', default='http://127.0.0.1:5000', help="App já rodando (ignorado com --spawn).")
+    parser.add_argument('--spawn', action='store_true', help="Sobe o mock e o app (Procfile) para o teste.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--app-port', type=int, default=5055)
+    parser.add_argument('--mock-port', type=int, default=8089)
+    parser.add_argument('--mock-args', default='--latency 80 --jitter 40',
+                        help="Argumentos repassados ao mock (latência, erros...).")
+    parser.add_argument('--routes', nargs='+', choices=ROUTES, default=list(ROUTES))
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=200, help="Requisições por rota e por fase.")
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="Arquivo JSON com o resultado.")
+    parser.add_argument('--baseline', help="Resultado anterior para comparação.")
+    parser.add_argument('--save-baseline', action='store_true', help="Grava o resultado em --baseline.")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Piora relativa aceita em p95 e vazão (0.2 = 20%%).")
+    args = parser.parse_args()
+
+    processes = []
+    base_url = args.url.rstrip('/')
+    if args.spawn:
+        base_url, processes = spawn(args.host, args.app_port, args.mock_port, shlex.split(args.mock_args))
+    else:
+        try:
+            requests.get(base_url + '/', timeout=args.timeout)
+        except requests.RequestException as e:
+            sys.exit(f"App não responde em {base_url}: {e}")
+    try:
+        results = run(base_url, args.routes, args.concurrency, args.requests, args.seed, args.timeout)
+    finally:
+        stop(processes)
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'url': base_url,
+            'server': ' '.join(_procfile_command(args.host, args.app_port)) if args.spawn else None,
+            'mock_args': args.mock_args if args.spawn else None,
+            'concurrency': args.concurrency,
+            'requests': args.requests,
+            'seed': args.seed,
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultado salvo em {args.output}")
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline salva em {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        for key in ('concurrency', 'requests', 'mock_args'):
+            if baseline.get('meta', {}).get(key) != report['meta'][key]:
+                print(f"Aviso: {key} difere da baseline ({baseline.get('meta', {}).get(key)} x {report['meta'][key]}).")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("Regressões em relação à baseline:")
+            for item in regressions:
+                print(f"  {item}")
+            sys.exit(1)
+        print("Sem regressões em relação à baseline.")
+
+
+if __name__ == '__main__':
+    main()
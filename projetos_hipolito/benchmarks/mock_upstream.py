@@ -0,0 +1,458 @@
+import argparse
+import html
+import json
+import random
+import sqlite3
+import threading
+
+import gevent
+from flask import Flask, Response, jsonify, request
+from gevent.pywsgi import WSGIServer
+
+from services.battle_engine import PHYSICAL_TYPES
+from services.catalog import FORM_ID_START
+from services.database import CACHE_DB_PATH, POKEMONS_DB_PATH, get_connection
+from services.translator import text_hash
+
+# Servidor local que substitui PokeAPI, Google Translate e Gemini, para testes
+# de carga de ponta a ponta sem rede e sem custo:
+#
+#   python -m benchmarks.mock_upstream --port 8089 --latency 80 --jitter 40 --error-rate 0.01
+#
+#   POKEAPI_BASE_URL=http://127.0.0.1:8089/api/v2 \
+#   TRANSLATE_BASE_URL=http://127.0.0.1:8089/translate \
+#   GEMINI_BASE_URL=http://127.0.0.1:8089/ GEMINI_API_KEY=mock \
+#   gunicorn -k geventwebsocket.gunicorn.workers.GeventWebSocketWorker app:app
+#
+# As respostas vêm do que o próprio app já gravou:
+#   - PokeAPI: corpo original guardado em http_cache (banco de cache); sem
+#     gravação, o JSON é montado no formato da PokeAPI a partir de pokemons.db.
+#     Espécies e cadeias de evolução usam as tabelas da carga
+#     (python -m services.ingest); num banco sem elas, cada espécie é montada
+#     só com a linha de pokemons e tem uma cadeia própria, sem evoluções;
+#   - Translate: tabela translations; sem gravação, devolve "[pt] <texto>";
+#   - Gemini: respostas de chat_cache para o mesmo prompt; sem gravação, um
+#     texto fixo de --gemini-words palavras, em streaming de --gemini-chunk
+#     palavras a cada --gemini-chunk-delay ms.
+# Latência e erros são sorteados com --seed, então uma rodada é reproduzível.
+# GET/POST /_mock/config lê/altera a injeção em tempo de execução e
+# GET /_mock/stats mostra quantas requisições cada serviço recebeu.
+
+RECORDED_BASE = "https://pokeapi.co/api/v2"
+FILLER = (
+    "Pikachu é um Pokémon do tipo Elétrico muito usado em times equilibrados, com boa Velocidade "
+    "e acesso a Thunderbolt, Volt Tackle e Iron Tail para cobrir fraquezas comuns."
+).split()
+
+app = Flask(__name__)
+
+config = {
+    'latency': 0.0,
+    'jitter': 0.0,
+    'error_rate': 0.0,
+    'error_status': 503,
+    'gemini_words': 120,
+    'gemini_chunk': 8,
+    'gemini_chunk_delay': 30.0,
+    'gemini_first_chunk': 250.0,
+}
+_rng = random.Random(0)
+_stats_lock = threading.Lock()
+_stats = {}
+
+
+def _query_one(path, sql, params):
+    try:
+        with get_connection(path) as conn:
+            return conn.execute(sql, params).fetchone()
+    except sqlite3.Error:
+        return None
+
+
+def _query_all(path, sql, params):
+    try:
+        with get_connection(path) as conn:
+            return conn.execute(sql, params).fetchall()
+    except sqlite3.Error:
+        return []
+
+
+def _has_tables(*names):
+    rows = _query_all(POKEMONS_DB_PATH, "SELECT name FROM sqlite_master WHERE type = 'table'", ())
+    return set(names) <= {row['name'] for row in rows}
+
+
+def _inject(service):
+    # Latência + erro sorteado. Devolve o status de erro ou None.
+    with _stats_lock:
+        item = _stats.setdefault(service, {'requests': 0, 'errors': 0})
+        item['requests'] += 1
+        delay = max(config['latency'] + _rng.uniform(-config['jitter'], config['jitter']), 0) / 1000
+        failed = _rng.random() < config['error_rate']
+        if failed:
+            item['errors'] += 1
+    if delay:
+        gevent.sleep(delay)
+    return config['error_status'] if failed else None
+
+
+def _own_base():
+    return request.host_url.rstrip('/') + '/api/v2'
+
+
+def _named(name, resource, key):
+    return {'name': name, 'url': f"{_own_base()}/{resource}/{key}/"}
+
+
+# PokeAPI ---------------------------------------------------------------------
+
+def _pokemon_from_db(key):
+    column = 'id' if key.isdigit() else 'lower(nome)'
+    row = _query_one(POKEMONS_DB_PATH, f"SELECT * FROM pokemons WHERE {column} = ?", (key,))
+    if not row:
+        return None
+    pokemon_id = row['id']
+    keys = row.keys()
+    stats = json.loads(row['stats_base']) if row['stats_base'] else {}
+    abilities = _query_all(
+        POKEMONS_DB_PATH,
+        "SELECT slot, ability_nome, oculta FROM pokemon_abilities WHERE pokemon_id = ? ORDER BY slot", (pokemon_id,)
+    )
+    sprites = _query_one(POKEMONS_DB_PATH, "SELECT * FROM pokemon_sprites WHERE pokemon_id = ?", (pokemon_id,))
+
+    def sprite(name):
+        return sprites[name] if sprites else None
+
+    return {
+        'id': pokemon_id,
+        'name': row['nome'].lower(),
+        'height': (row['altura'] if 'altura' in keys else None) or 0,
+        'weight': (row['peso'] if 'peso' in keys else None) or 0,
+        'types': [
+            {'slot': slot, 'type': _named(name, 'type', name)}
+            for slot, name in enumerate(json.loads(row['tipos']) if row['tipos'] else [], 1)
+        ],
+        'stats': [{'base_stat': value, 'effort': 0, 'stat': _named(name, 'stat', name)} for name, value in stats.items()],
+        'abilities': [
+            {'slot': a['slot'], 'is_hidden': bool(a['oculta']), 'ability': _named(a['ability_nome'], 'ability', a['ability_nome'])}
+            for a in abilities
+        ],
+        'moves': [
+            {'move': _named(name, 'move', name)}
+            for name in (json.loads(row['moves_aprendiveis']) if row['moves_aprendiveis'] else [])
+        ],
+        'sprites': {
+            'front_default': sprite('front_default') or row['sprite_url'],
+            'front_shiny': sprite('front_shiny'),
+            'back_default': sprite('back_default'),
+            'back_shiny': sprite('back_shiny'),
+            'other': {
+                'official-artwork': {'front_default': sprite('artwork_default'), 'front_shiny': sprite('artwork_shiny')},
+                'dream_world': {'front_default': sprite('dream_world')},
+            },
+        },
+    }
+
+
+def _minimal_species(key):
+    # Banco sem a carga: a espécie tem o id e o nome do Pokémon padrão, a
+    # descrição de pokemons e uma cadeia de evolução com o mesmo id.
+    column = 'id' if key.isdigit() else 'lower(nome)'
+    row = _query_one(
+        POKEMONS_DB_PATH, f"SELECT id, nome, descricao FROM pokemons WHERE {column} = ? AND id < ?", (key, FORM_ID_START)
+    )
+    if not row:
+        return None
+    name = row['nome'].lower()
+    return {
+        'id': row['id'],
+        'name': name,
+        'flavor_text_entries': [{'flavor_text': row['descricao'], 'language': {'name': 'en'}}] if row['descricao'] else [],
+        'evolution_chain': {'url': f"{_own_base()}/evolution-chain/{row['id']}/"},
+        'genera': [],
+        'varieties': [{'is_default': True, 'pokemon': _named(name, 'pokemon', row['id'])}],
+    }
+
+
+def _minimal_evolution_chain(key):
+    species = _minimal_species(key) if key.isdigit() else None
+    if species is None:
+        return None
+    return {
+        'id': species['id'],
+        'chain': {'species': _named(species['name'], 'pokemon-species', species['id']), 'evolves_to': []},
+    }
+
+
+def _species_from_db(key):
+    if not _has_tables('species', 'species_flavor_texts', 'species_varieties'):
+        return _minimal_species(key)
+    column = 'id' if key.isdigit() else 'nome'
+    row = _query_one(POKEMONS_DB_PATH, f"SELECT * FROM species WHERE {column} = ?", (key,))
+    if not row:
+        return None
+    flavor_texts = _query_all(
+        POKEMONS_DB_PATH, "SELECT idioma, texto FROM species_flavor_texts WHERE species_id = ?", (row['id'],)
+    )
+    varieties = _query_all(
+        POKEMONS_DB_PATH,
+        "SELECT pokemon_id, pokemon_nome, is_default FROM species_varieties WHERE species_id = ? ORDER BY pokemon_id",
+        (row['id'],)
+    )
+    chain_id = row['evolution_chain_id']
+    return {
+        'id': row['id'],
+        'name': row['nome'],
+        'flavor_text_entries': [
+            {'flavor_text': f['texto'], 'language': {'name': f['idioma']}} for f in flavor_texts
+        ],
+        'evolution_chain': {'url': f"{_own_base()}/evolution-chain/{chain_id}/"} if chain_id else None,
+        'genera': [{'genus': row['genero'], 'language': {'name': 'pt-BR'}}] if row['genero'] else [],
+        'varieties': [
+            {'is_default': bool(v['is_default']), 'pokemon': _named(v['pokemon_nome'], 'pokemon', v['pokemon_id'])}
+            for v in varieties
+        ],
+    }
+
+
+def _evolution_chain_from_db(key):
+    if not _has_tables('evolution_chain_links'):
+        return _minimal_evolution_chain(key)
+    links = _query_all(
+        POKEMONS_DB_PATH,
+        "SELECT species_id, species_nome, parent_species_id FROM evolution_chain_links WHERE chain_id = ? ORDER BY ordem",
+        (key,)
+    )
+    nodes = {}
+    root = None
+    for link in links:
+        node = {'species': _named(link['species_nome'], 'pokemon-species', link['species_id']), 'evolves_to': []}
+        nodes[link['species_id']] = node
+        parent = nodes.get(link['parent_species_id'])
+        if parent is None:
+            root = node
+        else:
+            parent['evolves_to'].append(node)
+    return {'id': int(key), 'chain': root} if root else None
+
+
+def _move_from_db(key):
+    row = _query_one(POKEMONS_DB_PATH, "SELECT * FROM moves_list WHERE nome = ?", (key,))
+    if not row or row['tipo'] is None:
+        return None
+    keys = row.keys()
+    damage_class = (row['classe_dano'] if 'classe_dano' in keys else None) or (
+        'status' if row['power'] is None else 'physical' if row['tipo'] in PHYSICAL_TYPES else 'special'
+    )
+    return {
+        'id': (row['move_id'] if 'move_id' in keys else None) or 0,
+        'name': row['nome'],
+        'accuracy': row['accuracy'],
+        'power': row['power'],
+        'pp': row['pp'] if 'pp' in keys else None,
+        'type': _named(row['tipo'], 'type', row['tipo']),
+        'damage_class': {'name': damage_class},
+        'effect_entries': [
+            {'short_effect': row['descricao_efeito'] or '', 'effect': row['descricao_efeito'] or '', 'language': {'name': 'en'}}
+        ],
+    }
+
+
+def _ability_from_db(key):
+    row = _query_one(POKEMONS_DB_PATH, "SELECT nome, curta_descricao FROM abilities_list WHERE nome = ?", (key,))
+    if not row:
+        return None
+    return {
+        'name': row['nome'],
+        'effect_entries': [{'short_effect': row['curta_descricao'] or '', 'language': {'name': 'en'}}],
+    }
+
+
+def _pokemon_list(limit, offset):
+    total = _query_one(POKEMONS_DB_PATH, "SELECT COUNT(*) FROM pokemons", ())[0]
+    rows = _query_all(POKEMONS_DB_PATH, "SELECT id, nome FROM pokemons ORDER BY id LIMIT ? OFFSET ?", (limit, offset))
+    return {
+        'count': total,
+        'results': [_named(row['nome'].lower(), 'pokemon', row['id']) for row in rows],
+    }
+
+
+BUILDERS = {
+    'pokemon': _pokemon_from_db,
+    'pokemon-species': _species_from_db,
+    'evolution-chain': _evolution_chain_from_db,
+    'move': _move_from_db,
+    'ability': _ability_from_db,
+}
+
+
+def _recorded(path):
+    url = f"{RECORDED_BASE}/{path}"
+    if request.query_string:
+        url += '?' + request.query_string.decode()
+    row = _query_one(CACHE_DB_PATH, "SELECT body FROM http_cache WHERE url = ?", (url,))
+    if not row:
+        return None
+    # Links dentro do corpo passam a apontar para o mock.
+    return row['body'].replace(RECORDED_BASE, _own_base())
+
+
+@app.route('/api/v2/<resource>/', defaults={'key': None})
+@app.route('/api/v2/<resource>', defaults={'key': None})
+@app.route('/api/v2/<resource>/<key>/')
+@app.route('/api/v2/<resource>/<key>')
+def pokeapi(resource, key):
+    status = _inject('pokeapi')
+    if status:
+        return jsonify({'detail': 'erro injetado'}), status
+
+    path = f"{resource}/{key}/" if key else resource
+    body = _recorded(path)
+    if body:
+        return Response(body, mimetype='application/json')
+
+    if key is None:
+        if resource != 'pokemon':
+            return jsonify({'detail': 'Not found.'}), 404
+        return jsonify(_pokemon_list(request.args.get('limit', 20, type=int), request.args.get('offset', 0, type=int)))
+
+    builder = BUILDERS.get(resource)
+    data = builder(key.lower()) if builder else None
+    if data is None:
+        return jsonify({'detail': 'Not found.'}), 404
+    return jsonify(data)
+
+
+# Google Translate --------------------------------------------------------------
+
+def _translate_line(text):
+    if not text.strip():
+        return text
+    row = _query_one(CACHE_DB_PATH, "SELECT translated_text FROM translations WHERE hash = ?", (text_hash(text),))
+    return row['translated_text'] if row else f"[pt] {text}"
+
+
+@app.route('/translate', methods=['GET'])
+@app.route('/translate/', methods=['GET'])
+def translate():
+    status = _inject('translate')
+    if status:
+        return Response('erro injetado', status=status)
+    text = request.args.get('q', '')
+    translated = '\n'.join(_translate_line(line) for line in text.split('\n'))
+    return Response(f'<html><body><div class="result-container">{html.escape(translated)}</div></body></html>',
+                    mimetype='text/html')
+
+
+# Gemini -----------------------------------------------------------------------
+
+def _last_user_text(payload):
+    for content in reversed(payload.get('contents') or []):
+        if content.get('role', 'user') == 'user':
+            texts = [part['text'] for part in content.get('parts', []) if 'text' in part]
+            if texts:
+                return ' '.join(texts)
+    return ''
+
+
+def _gemini_answer(prompt):
+    row = _query_one(
+        CACHE_DB_PATH, "SELECT response FROM chat_cache WHERE prompt = ? ORDER BY accessed_at DESC LIMIT 1", (prompt,)
+    )
+    if row:
+        return row['response']
+    words = [FILLER[i % len(FILLER)] for i in range(int(config['gemini_words']))]
+    return ' '.join(words)
+
+
+def _gemini_chunk(text, model, finished=False):
+    candidate = {'content': {'role': 'model', 'parts': [{'text': text}]}, 'index': 0}
+    if finished:
+        candidate['finishReason'] = 'STOP'
+    return {'candidates': [candidate], 'modelVersion': model}
+
+
+def _gemini_error(status):
+    return jsonify({'error': {'code': status, 'message': 'erro injetado', 'status': 'UNAVAILABLE'}}), status
+
+
+@app.route('/<version>/models/<model>:generateContent', methods=['POST'])
+def gemini_generate(version, model):
+    status = _inject('gemini')
+    if status:
+        return _gemini_error(status)
+    gevent.sleep(config['gemini_first_chunk'] / 1000)
+    return jsonify(_gemini_chunk(_gemini_answer(_last_user_text(request.get_json(silent=True) or {})), model, True))
+
+
+@app.route('/<version>/models/<model>:streamGenerateContent', methods=['POST'])
+def gemini_stream(version, model):
+    status = _inject('gemini')
+    if status:
+        return _gemini_error(status)
+    words = _gemini_answer(_last_user_text(request.get_json(silent=True) or {})).split(' ')
+    size = max(int(config['gemini_chunk']), 1)
+    first_delay = config['gemini_first_chunk'] / 1000
+    chunk_delay = config['gemini_chunk_delay'] / 1000
+
+    def events():
+        gevent.sleep(first_delay)
+        for start in range(0, len(words), size):
+            if start:
+                gevent.sleep(chunk_delay)
+            text = ' '.join(words[start:start + size]) + (' ' if start + size < len(words) else '')
+            finished = start + size >= len(words)
+            yield f"data: {json.dumps(_gemini_chunk(text, model, finished))}\r\n\r\n"
+
+    return Response(events(), mimetype='text/event-stream')
+
+
+@app.route('/<version>/cachedContents', methods=['POST'])
+def gemini_cached_contents(version):
+    # Como na API real para um prefixo pequeno: o app segue sem context cache.
+    return jsonify({'error': {
+        'code': 400, 'message': 'Cached content is too small.', 'status': 'INVALID_ARGUMENT'
+    }}), 400
+
+
+# Controle ---------------------------------------------------------------------
+
+@app.route('/_mock/config', methods=['GET', 'POST'])
+def mock_config():
+    for key, value in (request.get_json(silent=True) or {}).items():
+        if key in config:
+            config[key] = type(config[key])(value)
+    return jsonify(config)
+
+
+@app.route('/_mock/stats')
+def mock_stats():
+    with _stats_lock:
+        return jsonify(_stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock local de PokeAPI, Google Translate e Gemini.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help="latência média por requisição (ms)")
+    parser.add_argument('--jitter', type=float, default=0.0, help="variação uniforme da latência (± ms)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fração de requisições que falham")
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--gemini-words', type=int, default=120)
+    parser.add_argument('--gemini-chunk', type=int, default=8, help="palavras por pedaço do streaming")
+    parser.add_argument('--gemini-chunk-delay', type=float, default=30.0, help="ms entre pedaços")
+    parser.add_argument('--gemini-first-chunk', type=float, default=250.0, help="ms até o primeiro pedaço")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for key in config:
+        config[key] = type(config[key])(getattr(args, key))
+    _rng.seed(args.seed)
+
+    print(f"Mock upstream em http://{args.host}:{args.port} (pokemons.db: {POKEMONS_DB_PATH}, cache: {CACHE_DB_PATH})")
+    WSGIServer((args.host, args.port), app, log=None).serve_forever()
+
+
+if __name__ == '__main__':
+    main()
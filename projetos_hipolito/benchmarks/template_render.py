@@ -0,0 +1,112 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from flask import render_template
+
+# Sem aquecimento em segundo plano disputando a CPU com a medição.
+os.environ.setdefault('WARMUP_ENABLED', '0')
+
+from app import app, calculate_stats_range
+from services.catalog import FORM_ID_START
+from services.coverage import get_pokemon_coverage, type_defense
+from services.database import get_connection
+from services.detail_planner import load_pokemon_detail
+from services.fragment_cache import fragment_store
+
+# Tempo de renderização de detail.html com e sem o cache de trechos
+# (services/fragment_cache.py):
+#
+#   POKEAPI_OFFLINE=1 python -m benchmarks.template_render --pokemon 100 --repeat 5
+#
+# Os dados de cada Pokémon são carregados uma vez antes de medir, então só o
+# Jinja entra na conta. Fases:
+#   off  - cache desligado (como era antes);
+#   cold - cache ligado e vazio: primeira renderização de cada Pokémon;
+#   warm - cache ligado e cheio: as renderizações seguintes.
+
+
+def _contexts(count):
+    with get_connection() as conn:
+        ids = [row['id'] for row in conn.execute(
+            "SELECT id FROM pokemons WHERE id < ? ORDER BY id LIMIT ?", (FORM_ID_START, count)
+        )]
+
+    contexts = []
+    for pokemon_id in ids:
+        context = load_pokemon_detail(pokemon_id)
+        if not context:
+            continue
+        pokemon = context['pokemon']
+        pokemon['stats_ranges'] = calculate_stats_range(pokemon['stats'])
+        try:
+            defense = get_pokemon_coverage(pokemon['id'])['defense']
+        except KeyError:
+            defense = type_defense(pokemon['types'])
+        contexts.append(dict(context, defense=defense))
+    return contexts
+
+
+def _render_all(contexts):
+    timings = []
+    with app.test_request_context():
+        for context in contexts:
+            start = time.perf_counter()
+            render_template('detail.html', **context)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _summary(timings):
+    timings = np.asarray(timings, dtype=np.float64) * 1000
+    return {
+        'renders': int(timings.size),
+        'mean_ms': round(float(timings.mean()), 3),
+        'p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'p95_ms': round(float(np.percentile(timings, 95)), 3),
+    }
+
+
+def run(count, repeat):
+    contexts = _contexts(count)
+    # Uma renderização descartada para compilar o template.
+    _render_all(contexts[:1])
+
+    fragment_store.enabled = False
+    off = [t for _ in range(repeat) for t in _render_all(contexts)]
+
+    fragment_store.enabled = True
+    fragment_store.clear()
+    cold = _render_all(contexts)
+    warm = [t for _ in range(repeat) for t in _render_all(contexts)]
+
+    results = {'off': _summary(off), 'cold': _summary(cold), 'warm': _summary(warm)}
+    results['warm_speedup'] = round(results['off']['mean_ms'] / results['warm']['mean_ms'], 2)
+    results['fragments'] = fragment_store.stats()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renderização de detail.html com e sem cache de trechos.")
+    parser.add_argument('--pokemon', type=int, default=100, help="Quantidade de Pokémon renderizados.")
+    parser.add_argument('--repeat', type=int, default=5, help="Passadas nas fases off e warm.")
+    parser.add_argument('--output', help="Arquivo JSON com o resultado.")
+    args = parser.parse_args()
+
+    results = run(args.pokemon, args.repeat)
+    for phase in ('off', 'cold', 'warm'):
+        summary = results[phase]
+        print(f"{phase:<5} média {summary['mean_ms']:>7.2f}ms  p50 {summary['p50_ms']:>7.2f}ms  "
+              f"p95 {summary['p95_ms']:>7.2f}ms  ({summary['renders']} renderizações)")
+    print(f"Ganho com cache quente: {results['warm_speedup']}x")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Resultado salvo em {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+import numpy as np
+
+from services.battle_engine import NO_TYPE, TYPE_INDEX, TYPES, load_battle_data
+from services.coverage import get_pokemon_coverage
+from services.local_data import get_local_pokemon_details
+from services.move_store import get_local_moves
+from services.pokeapi import get_move_details
+from services.pokemon_store import find_pokemon, get_learnset, get_pokemon_stats as get_stored_stats
+from services.team_builder import build_team
+
+# Ferramentas (function calling) da Enfermeira Joy, todas respondidas a partir
+# de pokemons.db. O SDK do Gemini monta a declaração de cada função a partir
+# da assinatura e da docstring, então as docstrings aqui são o que o modelo lê
+# para decidir quando chamar. O roteador local (services.intent_router) usa as
+# mesmas funções para responder sem chamar o modelo.
+
+MAX_LIST = 30
+
+
+def _key(name):
+    return str(name).lower().strip().replace(' ', '-')
+
+
+def _resolve_pokemon(pokemon):
+    data = load_battle_data()
+    index = data.pokemon_index(_key(pokemon))
+    return int(data.pokemon_ids[index]), data.pokemon_names[index], index
+
+
+def get_pokemon_stats(pokemon: str) -> dict:
+    """Status base, tipos e habilidades de um Pokémon.
+
+    Args:
+        pokemon: Nome em inglês, minúsculo e com hífens (ex: "mr-mime"), ou o número da Pokédex.
+    """
+    try:
+        pokemon_id, name, index = _resolve_pokemon(pokemon)
+    except KeyError as e:
+        return {'error': str(e.args[0])}
+    data = load_battle_data()
+    stats = get_stored_stats(pokemon_id)
+    details = get_local_pokemon_details(pokemon_id) or {}
+    return {
+        'id': pokemon_id,
+        'name': name,
+        'types': [TYPES[t] for t in data.types[index] if t != NO_TYPE],
+        'base_stats': stats,
+        'base_stat_total': sum(stats.values()),
+        'abilities': details.get('abilities', []),
+    }
+
+
+def get_move_info(move: str) -> dict:
+    """Tipo, poder, precisão, PP, classe de dano e efeito de um ataque.
+
+    Args:
+        move: Nome do ataque em inglês, minúsculo e com hífens (ex: "thunder-punch").
+    """
+    name = _key(move)
+    info = get_local_moves([name]).get(name) or get_move_details(name)
+    if not info:
+        return {'error': f"Ataque não encontrado: {move}"}
+    return {
+        'name': info['name'],
+        'type': info.get('type'),
+        'power': info.get('power'),
+        'accuracy': info.get('accuracy'),
+        'pp': info.get('pp'),
+        'damage_class': info.get('damage_class'),
+        'effect': info.get('effect'),
+    }
+
+
+def get_type_effectiveness(attack_type: str, defender: str) -> dict:
+    """Multiplicador de dano de um tipo de ataque contra um Pokémon ou contra um ou dois tipos.
+
+    Args:
+        attack_type: Tipo do ataque, em inglês (ex: "fire").
+        defender: Nome de um Pokémon (ex: "ferrothorn") ou tipos separados por "/" (ex: "grass/steel").
+    """
+    attack = _key(attack_type)
+    if attack not in TYPE_INDEX:
+        return {'error': f"Tipo desconhecido: {attack_type}"}
+
+    defender_types = [_key(t) for t in str(defender).split('/')]
+    defender_name = None
+    if not all(t in TYPE_INDEX for t in defender_types):
+        try:
+            _, defender_name, index = _resolve_pokemon(defender)
+        except KeyError as e:
+            return {'error': str(e.args[0])}
+        defender_types = [TYPES[t] for t in load_battle_data().types[index] if t != NO_TYPE]
+
+    matrix = load_battle_data().type_matrix
+    multiplier = float(np.prod([matrix[TYPE_INDEX[attack], TYPE_INDEX[t]] for t in defender_types[:2]]))
+    return {
+        'attack_type': attack,
+        'defender': defender_name or '/'.join(defender_types),
+        'defender_types': defender_types[:2],
+        'multiplier': multiplier,
+    }
+
+
+def get_pokemon_weaknesses(pokemon: str) -> dict:
+    """Fraquezas, resistências e imunidades de um Pokémon pelos seus tipos.
+
+    Args:
+        pokemon: Nome em inglês, minúsculo e com hífens, ou o número da Pokédex.
+    """
+    try:
+        coverage = get_pokemon_coverage(_key(pokemon))
+    except KeyError as e:
+        return {'error': str(e.args[0])}
+    defense = coverage['defense']
+    return {
+        'name': coverage['name'],
+        'types': coverage['types'],
+        'weaknesses': defense['weaknesses'],
+        'resistances': defense['resistances'],
+        'immunities': defense['immunities'],
+    }
+
+
+def get_pokemon_learnset(pokemon: str, move_type: str | None = None) -> dict:
+    """Ataques que um Pokémon pode aprender, do mais forte para o mais fraco.
+
+    Args:
+        pokemon: Nome em inglês, minúsculo e com hífens, ou o número da Pokédex.
+        move_type: Filtra pelo tipo do ataque, em inglês (ex: "electric").
+    """
+    try:
+        pokemon_id, name, _ = _resolve_pokemon(pokemon)
+    except KeyError as e:
+        return {'error': str(e.args[0])}
+    moves = get_learnset(pokemon_id, move_type)
+    return {'name': name, 'total': len(moves), 'moves': moves[:MAX_LIST]}
+
+
+def find_pokemon_learning_move(move: str, pokemon_type: str | None = None) -> dict:
+    """Pokémon que aprendem um ataque, opcionalmente filtrando pelo tipo do Pokémon.
+
+    Args:
+        move: Nome do ataque em inglês, minúsculo e com hífens (ex: "earthquake").
+        pokemon_type: Tipo do Pokémon, em inglês (ex: "water").
+    """
+    pokemon = find_pokemon(learns=[_key(move)], types=[pokemon_type] if pokemon_type else None)
+    return {
+        'move': _key(move),
+        'total': len(pokemon),
+        'pokemon': [p['name'] for p in pokemon[:MAX_LIST]],
+    }
+
+
+def suggest_team(
+    generations: list[int] | None = None,
+    required: list[str] | None = None,
+    banned_types: list[str] | None = None,
+    exclude: list[str] | None = None,
+    max_member_base_stat_total: int | None = None,
+) -> dict:
+    """Monta um time de 6 Pokémon a partir da Pokédex local, maximizando a cobertura de tipos e os status base.
+
+    Use sempre que o usuário pedir um time ou uma equipe. Nomes em inglês e minúsculos (ex: "charizard").
+
+    Args:
+        generations: Gerações permitidas (1 a 9). Vazio para todas.
+        required: Pokémon que precisam estar no time.
+        banned_types: Tipos proibidos, em inglês (ex: "dragon").
+        exclude: Pokémon que não podem entrar no time.
+        max_member_base_stat_total: Total máximo de status base por membro; 600 exclui a maioria dos lendários.
+    """
+    try:
+        result = build_team(
+            required=[_key(p) for p in required or ()],
+            generations=generations or None,
+            banned_types=banned_types or (),
+            exclude=[_key(p) for p in exclude or ()],
+            max_member_bst=max_member_base_stat_total,
+            alternatives=1,
+        )
+    except (KeyError, ValueError) as e:
+        return {'error': str(e.args[0])}
+
+    team = result['team']
+    if not team:
+        return {'error': 'Nenhum time atende às restrições.'}
+    return {
+        'members': [{'name': m['name'], 'types': m['types'], 'base_stat_total': m['base_stat_total']}
+                    for m in team['members']],
+        'super_effective_against': team['super_effective_against'],
+        'not_covered': team['not_covered'],
+        'exposed_to': team['exposed_to'],
+        'pokemon_hit_super_effective': f"{team['pokemon_hit_super_effective']}/{team['pokemon_total']}",
+    }
+
+
+TOOLS = [
+    get_pokemon_stats,
+    get_move_info,
+    get_type_effectiveness,
+    get_pokemon_weaknesses,
+    get_pokemon_learnset,
+    find_pokemon_learning_move,
+    suggest_team,
+]
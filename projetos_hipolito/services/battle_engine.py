@@ -1,5 +1,345 @@
+import json
+from functools import lru_cache
+
+import numpy as np
+
+from services.database import get_connection
+from services.pokemon_store import STAT_NAMES, has_pokemon_tables
+
+# Motor de dano vetorizado. Tudo fica em arrays NumPy indexados por posição
+# (não pelo id da PokeAPI): Pokémon, ataques e tipos. Assim "um atacante contra
+# todos os defensores" ou "todos os ataques contra um defensor" é uma única
+# chamada de compute_damage com arrays em vez de um loop em Python.
+
+TYPES = (
+    'normal', 'fighting', 'flying', 'poison', 'ground', 'rock', 'bug', 'ghost', 'steel',
+    'fire', 'water', 'grass', 'electric', 'psychic', 'ice', 'dragon', 'dark', 'fairy',
+)
+TYPE_INDEX = {name: i for i, name in enumerate(TYPES)}
+
+# Índice extra na matriz de efetividade: segundo tipo de quem só tem um e tipo
+# de ataques sem tipo (Struggle). Multiplicador sempre 1.
+NO_TYPE = len(TYPES)
+
+HP, ATTACK, DEFENSE, SP_ATTACK, SP_DEFENSE, SPEED = range(len(STAT_NAMES))
+
+# Divisão física/especial por tipo (gerações I–III). Só é usada para ataques
+# cuja classe_dano ainda não foi baixada da PokeAPI.
+PHYSICAL_TYPES = frozenset(('normal', 'fighting', 'flying', 'poison', 'ground', 'rock', 'bug', 'ghost', 'steel'))
+
+DEFAULT_LEVEL = 50
+DEFAULT_IV = 31
+STAB = 1.5
+CRITICAL = 1.5
+CRITICAL_CHANCE = 1 / 24
+MIN_ROLL = 0.85
+MEAN_ROLL = (MIN_ROLL + 1) / 2
+
+STRUGGLE = 'struggle'
+
+
+@lru_cache(maxsize=1)
+def load_type_matrix():
+    # matrix[tipo_do_ataque, tipo_do_defensor]; a tabela só guarda o que é != 1.
+    matrix = np.ones((len(TYPES) + 1, len(TYPES) + 1), dtype=np.float32)
+    with get_connection() as conn:
+        rows = conn.execute("SELECT tipo_atacante, tipo_defensor, multiplicador FROM tipos_efetividades").fetchall()
+    for row in rows:
+        attacker = TYPE_INDEX.get(row['tipo_atacante'])
+        defender = TYPE_INDEX.get(row['tipo_defensor'])
+        if attacker is not None and defender is not None:
+            matrix[attacker, defender] = row['multiplicador']
+    matrix.setflags(write=False)
+    return matrix
+
+
+def calc_stats(base_stats, level=DEFAULT_LEVEL, iv=DEFAULT_IV, ev=0):
+    # Fórmula das gerações III+ sem natureza. base_stats: (..., 6).
+    base = np.asarray(base_stats, dtype=np.float32)
+    core = np.floor((2 * base + iv + ev // 4) * level / 100)
+    stats = core + 5
+    stats[..., HP] = core[..., HP] + level + 10
+    return stats
+
+
+class BattleData:
+    # Tabelas de pokemons.db já convertidas em arrays. Os learnsets ficam no
+    # formato CSR: os ataques do Pokémon i são learn_moves[learn_offsets[i]:learn_offsets[i + 1]].
+
+    def __init__(self, pokemon_ids, pokemon_names, base_stats, types, move_names, move_types,
+                 move_power, move_accuracy, move_special, learn_offsets, learn_moves, type_matrix):
+        self.pokemon_ids = pokemon_ids
+        self.pokemon_names = pokemon_names
+        self.base_stats = base_stats
+        self.types = types
+        self.move_names = move_names
+        self.move_types = move_types
+        self.move_power = move_power
+        self.move_accuracy = move_accuracy
+        self.move_special = move_special
+        self.learn_offsets = learn_offsets
+        self.learn_moves = learn_moves
+        self.type_matrix = type_matrix
+
+        self.stats = calc_stats(base_stats)
+        self._pokemon_by_id = {int(pokemon_id): i for i, pokemon_id in enumerate(pokemon_ids)}
+        self._pokemon_by_name = {name: i for i, name in enumerate(pokemon_names)}
+        self._move_by_name = {name: i for i, name in enumerate(move_names)}
+
+    def pokemon_index(self, name_or_id):
+        if isinstance(name_or_id, (int, np.integer)):
+            index = self._pokemon_by_id.get(int(name_or_id))
+        else:
+            key = str(name_or_id).lower().strip()
+            index = self._pokemon_by_id.get(int(key)) if key.isdigit() else self._pokemon_by_name.get(key)
+        if index is None:
+            raise KeyError(f"Pokémon não encontrado: {name_or_id}")
+        return index
+
+    def move_index(self, name):
+        index = self._move_by_name.get(str(name).lower().strip())
+        if index is None:
+            raise KeyError(f"Ataque sem dano ou não encontrado: {name}")
+        return index
+
+    def learnset(self, pokemon):
+        return self.learn_moves[self.learn_offsets[pokemon]:self.learn_offsets[pokemon + 1]]
+
+
+def _load_moves(conn):
+    # Só ataques com dano; Struggle entra no índice 0 como ataque sem tipo,
+    # usado por quem não tem nenhum ataque de dano.
+    names = [STRUGGLE]
+    types = [NO_TYPE]
+    power = [50]
+    accuracy = [100]
+    special = [False]
+    rows = conn.execute(
+        "SELECT * FROM moves_list WHERE power > 0 AND tipo IS NOT NULL AND nome != ? ORDER BY nome", (STRUGGLE,)
+    ).fetchall()
+    for row in rows:
+        if row['tipo'] not in TYPE_INDEX:
+            continue
+        damage_class = row['classe_dano'] if 'classe_dano' in row.keys() else None
+        names.append(row['nome'])
+        types.append(TYPE_INDEX[row['tipo']])
+        power.append(row['power'])
+        accuracy.append(row['accuracy'] if row['accuracy'] is not None else 100)
+        special.append(damage_class == 'special' if damage_class else row['tipo'] not in PHYSICAL_TYPES)
+    return (
+        names,
+        np.array(types, dtype=np.int8),
+        np.array(power, dtype=np.float32),
+        np.array(accuracy, dtype=np.float32),
+        np.array(special, dtype=bool),
+    )
+
+
+def _relations(conn):
+    # (stats, tipos, ataques) como linhas (pokemon_id, ...). Sem as tabelas
+    # relacionais (banco não migrado), lê as colunas JSON de pokemons.
+    if has_pokemon_tables():
+        return (
+            conn.execute("SELECT pokemon_id, stat, valor FROM pokemon_stats").fetchall(),
+            conn.execute("SELECT pokemon_id, slot, tipo FROM pokemon_types WHERE slot <= 2").fetchall(),
+            conn.execute("SELECT pokemon_id, move_nome FROM pokemon_moves").fetchall(),
+        )
+    stats, types, moves = [], [], []
+    for row in conn.execute("SELECT id, tipos, stats_base, moves_aprendiveis FROM pokemons"):
+        pokemon_id = row['id']
+        stats += [(pokemon_id, stat, value) for stat, value in json.loads(row['stats_base'] or '{}').items()]
+        types += [(pokemon_id, slot, tipo) for slot, tipo in enumerate(json.loads(row['tipos'] or '[]')[:2], 1)]
+        moves += [(pokemon_id, name) for name in json.loads(row['moves_aprendiveis'] or '[]')]
+    return stats, types, moves
+
+
+@lru_cache(maxsize=1)
+def load_battle_data():
+    with get_connection() as conn:
+        rows = conn.execute("SELECT id, nome FROM pokemons ORDER BY id").fetchall()
+        pokemon_ids = np.array([row['id'] for row in rows], dtype=np.int32)
+        pokemon_names = [row['nome'].lower() for row in rows]
+        position = {int(pokemon_id): i for i, pokemon_id in enumerate(pokemon_ids)}
+        stat_rows, type_rows, move_rows = _relations(conn)
+
+        base_stats = np.zeros((len(rows), len(STAT_NAMES)), dtype=np.float32)
+        stat_column = {stat: i for i, stat in enumerate(STAT_NAMES)}
+        for pokemon_id, stat, value in stat_rows:
+            if pokemon_id in position and stat in stat_column and value is not None:
+                base_stats[position[pokemon_id], stat_column[stat]] = value
+
+        types = np.full((len(rows), 2), NO_TYPE, dtype=np.int8)
+        for pokemon_id, slot, tipo in type_rows:
+            if pokemon_id in position and tipo in TYPE_INDEX:
+                types[position[pokemon_id], slot - 1] = TYPE_INDEX[tipo]
+
+        move_names, move_types, move_power, move_accuracy, move_special = _load_moves(conn)
+        move_position = {name: i for i, name in enumerate(move_names)}
+
+        learnsets = [[] for _ in rows]
+        for pokemon_id, move_name in move_rows:
+            move = move_position.get(move_name)
+            if move is not None and pokemon_id in position:
+                learnsets[position[pokemon_id]].append(move)
+
+    learn_offsets = np.zeros(len(rows) + 1, dtype=np.int32)
+    learn_offsets[1:] = np.cumsum([len(moves) for moves in learnsets])
+    learn_moves = np.fromiter((m for moves in learnsets for m in sorted(moves)), dtype=np.int32, count=learn_offsets[-1])
+
+    return BattleData(
+        pokemon_ids, pokemon_names, base_stats, types, move_names, move_types, move_power,
+        move_accuracy, move_special, learn_offsets, learn_moves, load_type_matrix()
+    )
+
+
+def effectiveness(data, moves, defenders):
+    move_types = data.move_types[moves]
+    defender_types = data.types[defenders]
+    return data.type_matrix[move_types, defender_types[..., 0]] * data.type_matrix[move_types, defender_types[..., 1]]
+
+
+def compute_damage(data, attackers, defenders, moves, level=DEFAULT_LEVEL, roll=1.0, critical=False, stats=None):
+    # attackers/defenders/moves são índices (escalares ou arrays que fazem
+    # broadcast entre si). roll e critical também podem ser arrays, o que
+    # permite sortear vários turnos de uma vez.
+    if stats is None:
+        stats = data.stats if level == DEFAULT_LEVEL else calc_stats(data.base_stats, level)
+    attackers = np.asarray(attackers)
+    defenders = np.asarray(defenders)
+    moves = np.asarray(moves)
+
+    special = data.move_special[moves]
+    attack = np.where(special, stats[attackers, SP_ATTACK], stats[attackers, ATTACK])
+    defense = np.where(special, stats[defenders, SP_DEFENSE], stats[defenders, DEFENSE])
+    power = data.move_power[moves]
+
+    base = np.floor(np.floor((2 * level // 5 + 2) * power * attack / defense) / 50) + 2
+
+    move_types = data.move_types[moves]
+    attacker_types = data.types[attackers]
+    stab = np.where(
+        ((attacker_types[..., 0] == move_types) | (attacker_types[..., 1] == move_types)) & (move_types != NO_TYPE),
+        STAB, 1.0
+    )
+    multiplier = effectiveness(data, moves, defenders)
+
+    damage = np.floor(base * np.where(critical, CRITICAL, 1.0) * roll * stab * multiplier)
+    # Todo golpe que acerta causa pelo menos 1 de dano, exceto em imunidade.
+    return np.where((power > 0) & (multiplier > 0), np.maximum(damage, 1), 0).astype(np.int32)
+
+
+def expected_damage(data, attackers, defenders, moves, level=DEFAULT_LEVEL, stats=None):
+    # Média considerando a variação de dano e a precisão (sem críticos).
+    damage = compute_damage(data, attackers, defenders, moves, level, roll=MEAN_ROLL, stats=stats)
+    return damage * (data.move_accuracy[np.asarray(moves)] / 100)
+
+
+def damage(attacker, defender, move, level=DEFAULT_LEVEL, roll=1.0, critical=False):
+    data = load_battle_data()
+    return int(compute_damage(
+        data, data.pokemon_index(attacker), data.pokemon_index(defender), data.move_index(move),
+        level, roll, critical
+    ))
+
+
+def damage_against_all(attacker, move, level=DEFAULT_LEVEL, roll=1.0):
+    # Dano de um ataque contra cada Pokémon do banco: {nome: dano}.
+    data = load_battle_data()
+    values = compute_damage(
+        data, data.pokemon_index(attacker), np.arange(len(data.pokemon_ids)), data.move_index(move), level, roll
+    )
+    return dict(zip(data.pokemon_names, values.tolist()))
+
+
+def damage_by_move(attacker, defender, moves=None, level=DEFAULT_LEVEL, roll=1.0):
+    # Dano de cada ataque (por padrão, todo o learnset de dano) contra um
+    # defensor, do maior para o menor: [(ataque, dano)].
+    data = load_battle_data()
+    attacker_index = data.pokemon_index(attacker)
+    if moves is None:
+        move_indexes = data.learnset(attacker_index)
+    else:
+        move_indexes = np.array([data.move_index(m) for m in moves], dtype=np.int32)
+    if not len(move_indexes):
+        move_indexes = np.zeros(1, dtype=np.int32)
+    values = compute_damage(data, attacker_index, data.pokemon_index(defender), move_indexes, level, roll)
+    order = np.argsort(-values, kind='stable')
+    return [(data.move_names[move_indexes[i]], int(values[i])) for i in order]
+
+
+def best_moves(data, attacker, defender, count=4, level=DEFAULT_LEVEL, stats=None):
+    moves = data.learnset(attacker)
+    if not len(moves):
+        return np.zeros(1, dtype=np.int32)
+    scores = expected_damage(data, attacker, defender, moves, level, stats)
+    return moves[np.argsort(-scores, kind='stable')[:count]]
 
 
 class Battle:
-    def __init__(self):
-        pass
+    # Batalha 1x1 por turnos. Cada lado usa o ataque de maior dano esperado
+    # do seu moveset contra o oponente; quem tem mais Speed ataca primeiro.
+
+    def __init__(self, pokemon_a, pokemon_b, level=DEFAULT_LEVEL, moves_a=None, moves_b=None, rng=None, data=None):
+        self.data = data or load_battle_data()
+        self.level = level
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.pokemon = np.array([self.data.pokemon_index(pokemon_a), self.data.pokemon_index(pokemon_b)])
+        self.stats = self.data.stats if level == DEFAULT_LEVEL else calc_stats(self.data.base_stats, level)
+        self.hp = self.stats[self.pokemon, HP].astype(np.int32)
+        self.max_hp = self.hp.copy()
+
+        movesets = []
+        for side, moves in enumerate((moves_a, moves_b)):
+            if moves is None:
+                movesets.append(best_moves(self.data, self.pokemon[side], self.pokemon[1 - side], level=level, stats=self.stats))
+            else:
+                movesets.append(np.array([self.data.move_index(m) for m in moves], dtype=np.int32))
+        self.movesets = movesets
+        self.turn = 0
+        self.log = []
+
+    def choose_move(self, side):
+        moves = self.movesets[side]
+        scores = expected_damage(self.data, self.pokemon[side], self.pokemon[1 - side], moves, self.level, self.stats)
+        return int(moves[int(np.argmax(scores))])
+
+    def attack(self, side, move):
+        target = 1 - side
+        hit = self.rng.random() * 100 < self.data.move_accuracy[move]
+        dealt = 0
+        if hit:
+            critical = self.rng.random() < CRITICAL_CHANCE
+            roll = self.rng.uniform(MIN_ROLL, 1.0)
+            dealt = int(compute_damage(
+                self.data, self.pokemon[side], self.pokemon[target], move, self.level, roll, critical, self.stats
+            ))
+            self.hp[target] = max(self.hp[target] - dealt, 0)
+        self.log.append((self.turn, side, self.data.move_names[move], dealt))
+        return dealt
+
+    def play_turn(self):
+        speed = self.stats[self.pokemon, SPEED]
+        if speed[0] == speed[1]:
+            first = int(self.rng.integers(2))
+        else:
+            first = int(speed[1] > speed[0])
+        for side in (first, 1 - first):
+            if self.is_over:
+                break
+            self.attack(side, self.choose_move(side))
+        self.turn += 1
+
+    @property
+    def is_over(self):
+        return bool((self.hp <= 0).any())
+
+    @property
+    def winner(self):
+        if not self.is_over:
+            return None
+        return 0 if self.hp[1] <= 0 else 1
+
+    def run(self, max_turns=100):
+        while not self.is_over and self.turn < max_turns:
+            self.play_turn()
+        return self.winner
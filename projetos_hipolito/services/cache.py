@@ -0,0 +1,162 @@
+import json
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+from services import http_client
+from services.database import CACHE_DB_PATH, get_connection
+
+DAY = 24 * 60 * 60
+
+# TTL de cada recurso da PokeAPI (segundos). Depois disso a entrada fica "stale":
+# continua sendo servida, mas é atualizada em segundo plano.
+RESOURCE_TTLS = {
+    'pokemon': 7 * DAY,
+    'pokemon-species': 7 * DAY,
+    'evolution-chain': 30 * DAY,
+    'ability': 30 * DAY,
+    'move': 30 * DAY,
+}
+DEFAULT_TTL = 1 * DAY
+
+# Entradas mais velhas que isso (além do TTL) não são mais servidas como stale.
+MAX_STALE = 90 * DAY
+
+MAX_ENTRIES = 20000
+EVICT_CHECK_EVERY = 200
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+_refresh_lock = threading.Lock()
+_refreshing = set()
+
+_writes_since_evict = 0
+
+
+def _connect():
+    global _schema_ready
+    conn = get_connection(CACHE_DB_PATH)
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS http_cache (
+                        url TEXT PRIMARY KEY,
+                        resource TEXT,
+                        body TEXT NOT NULL,
+                        fetched_at REAL NOT NULL,
+                        expires_at REAL NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_http_cache_accessed ON http_cache (accessed_at)")
+                conn.commit()
+                _schema_ready = True
+    return conn
+
+
+def resource_from_url(url):
+    parts = [p for p in urlparse(url).path.split('/') if p]
+    if 'v2' in parts:
+        idx = parts.index('v2')
+        if idx + 1 < len(parts):
+            return parts[idx + 1]
+    return 'default'
+
+
+def _fetch(url):
+    return http_client.get(url).json()
+
+
+def _store(url, resource, data):
+    global _writes_since_evict
+    now = time.time()
+    ttl = RESOURCE_TTLS.get(resource, DEFAULT_TTL)
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO http_cache (url, resource, body, fetched_at, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, resource, json.dumps(data), now, now + ttl, now)
+            )
+        _writes_since_evict += 1
+        if _writes_since_evict >= EVICT_CHECK_EVERY:
+            _writes_since_evict = 0
+            evict()
+    except sqlite3.Error as e:
+        print(f"Erro ao gravar cache de {url}: {e}")
+
+
+def _refresh_in_background(url, resource):
+    with _refresh_lock:
+        if url in _refreshing:
+            return
+        _refreshing.add(url)
+
+    def worker():
+        try:
+            _store(url, resource, _fetch(url))
+        except (requests.RequestException, ValueError) as e:
+            print(f"Erro ao atualizar cache de {url}: {e}")
+        finally:
+            with _refresh_lock:
+                _refreshing.discard(url)
+
+    threading.Thread(target=worker, daemon=True).start()
+
+
+def get_json(url, resource=None):
+    resource = resource or resource_from_url(url)
+    now = time.time()
+
+    row = None
+    try:
+        with _connect() as conn:
+            row = conn.execute(
+                "SELECT body, expires_at FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+            if row:
+                conn.execute("UPDATE http_cache SET accessed_at = ? WHERE url = ?", (now, url))
+    except sqlite3.Error as e:
+        print(f"Erro ao ler cache de {url}: {e}")
+
+    if row:
+        if row['expires_at'] >= now:
+            return json.loads(row['body'])
+        if now - row['expires_at'] <= MAX_STALE:
+            _refresh_in_background(url, resource)
+            return json.loads(row['body'])
+
+    data = _fetch(url)
+    _store(url, resource, data)
+    return data
+
+
+def evict(max_entries=MAX_ENTRIES):
+    try:
+        with _connect() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0]
+            excess = total - max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM http_cache WHERE url IN "
+                    "(SELECT url FROM http_cache ORDER BY accessed_at ASC LIMIT ?)",
+                    (excess,)
+                )
+            return max(excess, 0)
+    except sqlite3.Error as e:
+        print(f"Erro ao limpar cache: {e}")
+        return 0
+
+
+def invalidate(url=None):
+    with _connect() as conn:
+        if url:
+            conn.execute("DELETE FROM http_cache WHERE url = ?", (url,))
+        else:
+            conn.execute("DELETE FROM http_cache")
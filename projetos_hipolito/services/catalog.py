@@ -0,0 +1,114 @@
+import json
+from functools import lru_cache
+
+from services.database import get_connection
+from services.pokeapi import BASE_URL, get_pokemon_details
+
+SPRITE_URL = "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/{id}.png"
+
+# A partir deste id estão as formas alternativas (gravadas pela carga em services/ingest.py);
+# elas entram na busca, mas não na paginação da Pokédex.
+FORM_ID_START = 10000
+
+
+def _row_to_entry(row):
+    pokemon_id = row['id']
+    return {
+        'id': pokemon_id,
+        'name': row['nome'].lower(),
+        'url': f"{BASE_URL}/pokemon/{pokemon_id}/",
+        'image': row['sprite_url'] or SPRITE_URL.format(id=pokemon_id),
+        'types': json.loads(row['tipos']) if row['tipos'] else [],
+        'generation': row['geracao'],
+    }
+
+
+def _missing_entry(pokemon_id):
+    # Número da Pokédex que não está em pokemons.db: o card aparece marcado e
+    # a página de detalhes busca na PokeAPI só se o usuário abrir.
+    return {
+        'id': pokemon_id,
+        'name': str(pokemon_id),
+        'url': f"{BASE_URL}/pokemon/{pokemon_id}/",
+        'image': SPRITE_URL.format(id=pokemon_id),
+        'types': [],
+        'generation': None,
+        'missing': True,
+    }
+
+
+def _details_to_entry(details):
+    return {
+        'id': details['id'],
+        'name': details['name'],
+        'url': f"{BASE_URL}/pokemon/{details['id']}/",
+        'image': details['sprites']['front_default'] or SPRITE_URL.format(id=details['id']),
+        'types': details['types'],
+        'generation': None,
+    }
+
+
+def create_indexes(conn):
+    # Chamado por services.migrate; o app não altera pokemons.db.
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pokemons_nome_lower ON pokemons (lower(nome))")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pokemons_geracao ON pokemons (geracao)")
+
+
+@lru_cache(maxsize=1)
+def get_catalog_bounds():
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT COUNT(*) AS total, MAX(id) AS max_id FROM pokemons WHERE id < ?", (FORM_ID_START,)
+        ).fetchone()
+    return row['total'], row['max_id'] or 0
+
+
+def get_catalog_page(page, per_page):
+    # A paginação segue o número da Pokédex (1..max_id). Só lê o banco local:
+    # IDs que faltam nele viram cards marcados, sem uma chamada à PokeAPI por ID.
+    _, max_id = get_catalog_bounds()
+    total_pages = (max_id + per_page - 1) // per_page
+
+    start_id = (page - 1) * per_page + 1
+    end_id = min(start_id + per_page - 1, max_id)
+    if page < 1 or start_id > end_id:
+        return [], max_id, total_pages
+
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT id, nome, tipos, sprite_url, geracao FROM pokemons "
+            "WHERE id BETWEEN ? AND ? ORDER BY id",
+            (start_id, end_id)
+        ).fetchall()
+
+    local = {row['id']: _row_to_entry(row) for row in rows}
+    page_items = [local.get(pokemon_id) or _missing_entry(pokemon_id) for pokemon_id in range(start_id, end_id + 1)]
+
+    return page_items, max_id, total_pages
+
+
+def get_catalog_entry(name_or_id):
+    key = str(name_or_id).lower().strip()
+    with get_connection() as conn:
+        if key.isdigit():
+            row = conn.execute(
+                "SELECT id, nome, tipos, sprite_url, geracao FROM pokemons WHERE id = ?", (int(key),)
+            ).fetchone()
+        else:
+            row = conn.execute(
+                "SELECT id, nome, tipos, sprite_url, geracao FROM pokemons WHERE lower(nome) = ?", (key,)
+            ).fetchone()
+
+    if row:
+        return _row_to_entry(row)
+
+    details = get_pokemon_details(key)
+    return _details_to_entry(details) if details else None
+
+
+def get_all_catalog_entries():
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT id, nome, tipos, sprite_url, geracao FROM pokemons ORDER BY id"
+        ).fetchall()
+    return [_row_to_entry(row) for row in rows]
@@ -0,0 +1,218 @@
+import sqlite3
+import threading
+import time
+
+from services.database import CACHE_DB_PATH, get_connection
+from services.intent_router import extract_entities, normalize
+
+# Memória das conversas com a Enfermeira Joy, por sessão (o navegador manda
+# um session_id). Fica no banco de cache, então sobrevive a reinícios e é
+# compartilhada entre workers.
+#
+# Cada sessão guarda as últimas mensagens (usuário/modelo) dentro de
+# HISTORY_TOKEN_BUDGET. O que passa do orçamento é compactado: as mensagens
+# mais antigas saem da lista e viram linhas curtas num resumo (que também tem
+# orçamento, SUMMARY_TOKEN_BUDGET) junto com os Pokémon citados, para o modelo
+# ainda saber de quem "ele" está falando.
+
+DAY = 24 * 60 * 60
+
+HISTORY_TOKEN_BUDGET = 1500
+SUMMARY_TOKEN_BUDGET = 300
+SUMMARY_LINE_CHARS = 160
+MAX_SESSIONS = 2000
+SESSION_TTL = 3 * DAY
+EVICT_CHECK_EVERY = 100
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+_writes_since_evict = 0
+
+
+def estimate_tokens(text):
+    # ~4 caracteres por token: suficiente para orçamento, sem chamar a API.
+    return len(text) // 4 + 1
+
+
+def _connect():
+    global _schema_ready
+    conn = get_connection(CACHE_DB_PATH)
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                conn.executescript("""
+                    CREATE TABLE IF NOT EXISTS chat_sessions (
+                        session_id TEXT PRIMARY KEY,
+                        summary TEXT NOT NULL DEFAULT '',
+                        entities TEXT NOT NULL DEFAULT '',
+                        updated_at REAL NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_chat_sessions_updated ON chat_sessions (updated_at);
+                    CREATE TABLE IF NOT EXISTS chat_turns (
+                        session_id TEXT NOT NULL REFERENCES chat_sessions(session_id) ON DELETE CASCADE,
+                        seq INTEGER NOT NULL,
+                        role TEXT NOT NULL,
+                        text TEXT NOT NULL,
+                        tokens INTEGER NOT NULL,
+                        PRIMARY KEY (session_id, seq)
+                    ) WITHOUT ROWID;
+                """)
+                _schema_ready = True
+    return conn
+
+
+def trim_to_budget(turns, budget=HISTORY_TOKEN_BUDGET):
+    # Mantém as mensagens mais recentes que cabem no orçamento.
+    kept = []
+    total = 0
+    for role, text in reversed(turns):
+        total += estimate_tokens(text)
+        if total > budget:
+            break
+        kept.append((role, text))
+    return kept[::-1]
+
+
+def _summary_line(role, text):
+    text = ' '.join(text.split())
+    if role == 'model':
+        text = text.split('. ')[0]
+    if len(text) > SUMMARY_LINE_CHARS:
+        text = text[:SUMMARY_LINE_CHARS - 1].rstrip() + '…'
+    return f"{'Usuário' if role == 'user' else 'Joy'}: {text}"
+
+
+def _compact_summary(lines):
+    kept = []
+    total = 0
+    for line in reversed(lines):
+        total += estimate_tokens(line)
+        if total > SUMMARY_TOKEN_BUDGET:
+            break
+        kept.append(line)
+    return kept[::-1]
+
+
+def _mentioned_pokemon(texts, previous):
+    names = [name for name in previous.split(',') if name]
+    for text in texts:
+        pokemon, _, _ = extract_entities(normalize(text).split())
+        names.extend(pokemon)
+    # Os mais recentes no fim, sem repetição.
+    return list(dict.fromkeys(reversed(names)))[::-1][-10:]
+
+
+def get_history(session_id):
+    # -> (resumo, [(role, texto), ...]) em ordem cronológica.
+    try:
+        with _connect() as conn:
+            session = conn.execute(
+                "SELECT summary, entities, updated_at FROM chat_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if not session or time.time() - session['updated_at'] > SESSION_TTL:
+                return '', []
+            rows = conn.execute(
+                "SELECT role, text FROM chat_turns WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+    except sqlite3.Error as e:
+        print(f"Erro ao ler memória do chat: {e}")
+        return '', []
+
+    summary = session['summary']
+    if session['entities']:
+        summary = f"{summary}\nPokémon citados: {session['entities'].replace(',', ', ')}".strip()
+    return summary, [(row['role'], row['text']) for row in rows]
+
+
+def append_turns(session_id, turns):
+    global _writes_since_evict
+    now = time.time()
+    try:
+        with _connect() as conn:
+            session = conn.execute(
+                "SELECT summary, entities, updated_at FROM chat_sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if session and now - session['updated_at'] > SESSION_TTL:
+                conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+                session = None
+            summary = session['summary'] if session else ''
+            entities = session['entities'] if session else ''
+            # Upsert (não REPLACE): REPLACE apagaria as mensagens em cascata.
+            conn.execute(
+                "INSERT INTO chat_sessions (session_id, updated_at) VALUES (?, ?) "
+                "ON CONFLICT (session_id) DO UPDATE SET updated_at = excluded.updated_at",
+                (session_id, now)
+            )
+
+            last = conn.execute(
+                "SELECT COALESCE(MAX(seq), 0) FROM chat_turns WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO chat_turns (session_id, seq, role, text, tokens) VALUES (?, ?, ?, ?, ?)",
+                [(session_id, last + i, role, text, estimate_tokens(text)) for i, (role, text) in enumerate(turns, 1)]
+            )
+            _compact(conn, session_id, summary, entities)
+
+        _writes_since_evict += 1
+        if _writes_since_evict >= EVICT_CHECK_EVERY:
+            _writes_since_evict = 0
+            evict()
+    except sqlite3.Error as e:
+        print(f"Erro ao gravar memória do chat: {e}")
+
+
+def _compact(conn, session_id, summary, entities):
+    rows = conn.execute(
+        "SELECT seq, role, text, tokens FROM chat_turns WHERE session_id = ? ORDER BY seq DESC", (session_id,)
+    ).fetchall()
+    total = 0
+    dropped = []
+    for row in rows:
+        total += row['tokens']
+        if total > HISTORY_TOKEN_BUDGET:
+            dropped.append(row)
+    if not dropped:
+        return
+
+    # Não deixa a lista começar por uma resposta do modelo sem a pergunta.
+    oldest_kept = conn.execute(
+        "SELECT seq, role, text FROM chat_turns WHERE session_id = ? AND seq > ? ORDER BY seq LIMIT 1",
+        (session_id, dropped[0]['seq'])
+    ).fetchone()
+    if oldest_kept and oldest_kept['role'] == 'model':
+        dropped.insert(0, oldest_kept)
+
+    dropped = sorted(dropped, key=lambda row: row['seq'])
+    lines = [line for line in summary.split('\n') if line]
+    lines += [_summary_line(row['role'], row['text']) for row in dropped]
+    entities = ','.join(_mentioned_pokemon([row['text'] for row in dropped], entities))
+    conn.execute(
+        "UPDATE chat_sessions SET summary = ?, entities = ? WHERE session_id = ?",
+        ('\n'.join(_compact_summary(lines)), entities, session_id)
+    )
+    conn.execute(
+        "DELETE FROM chat_turns WHERE session_id = ? AND seq <= ?", (session_id, dropped[-1]['seq'])
+    )
+
+
+def clear_session(session_id):
+    with _connect() as conn:
+        conn.execute("DELETE FROM chat_sessions WHERE session_id = ?", (session_id,))
+
+
+def evict(max_sessions=MAX_SESSIONS):
+    try:
+        with _connect() as conn:
+            conn.execute("DELETE FROM chat_sessions WHERE updated_at < ?", (time.time() - SESSION_TTL,))
+            total = conn.execute("SELECT COUNT(*) FROM chat_sessions").fetchone()[0]
+            excess = total - max_sessions
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM chat_sessions WHERE session_id IN "
+                    "(SELECT session_id FROM chat_sessions ORDER BY updated_at ASC LIMIT ?)",
+                    (excess,)
+                )
+            return max(excess, 0)
+    except sqlite3.Error as e:
+        print(f"Erro ao limpar memória do chat: {e}")
+        return 0
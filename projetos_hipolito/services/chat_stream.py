@@ -0,0 +1,107 @@
+import time
+
+# Entrega de uma resposta do chat em pedaços pelo SocketIO.
+#
+# Contrapressão: cada pedaço emitido pede ack ao cliente e no máximo
+# MAX_IN_FLIGHT ficam sem confirmação. Enquanto a janela está cheia o texto
+# que chega do Gemini é acumulado e sai junto no próximo evento; se o
+# acumulado passar de MAX_BUFFERED_CHARS paramos de ler o stream do Gemini
+# até o cliente confirmar (ou desistimos depois de STALL_TIMEOUT).
+#
+# Cancelamento: cancel() (pedido do cliente, nova mensagem ou desconexão)
+# faz o laço parar e fechar o gerador, o que encerra a requisição ao Gemini.
+#
+# Falha no meio: se o gerador levanta StreamFailed depois de já ter mandado
+# texto, o que estava acumulado é enviado e a resposta termina com
+# 'chat_error' {id, error} em vez de 'chat_done'; o cliente mostra o erro à
+# parte e não guarda a resposta incompleta no histórico.
+
+MAX_IN_FLIGHT = 4
+MAX_BUFFERED_CHARS = 4000
+STALL_TIMEOUT = 30
+POLL_INTERVAL = 0.02
+
+
+class StreamFailed(Exception):
+    pass
+
+
+class ChatStream:
+
+    def __init__(self, request_id, emit, sleep=time.sleep):
+        # emit(evento, dados, callback=None); sleep precisa ceder a vez ao
+        # loop de eventos (socketio.sleep) para os acks e o cancelamento chegarem.
+        self.request_id = request_id
+        self.emit = emit
+        self.sleep = sleep
+        self.cancelled = False
+        self.sent = 0
+        self.acked = 0
+        self._buffer = []
+        self._buffered = 0
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _ack(self, *args):
+        self.acked += 1
+
+    @property
+    def in_flight(self):
+        return self.sent - self.acked
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        text = ''.join(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        self.sent += 1
+        self.emit('chat_chunk', {'id': self.request_id, 'seq': self.sent, 'text': text}, callback=self._ack)
+
+    def _wait_for_window(self):
+        deadline = time.monotonic() + STALL_TIMEOUT
+        while self.in_flight >= MAX_IN_FLIGHT and not self.cancelled:
+            if time.monotonic() > deadline:
+                print(f"Chat {self.request_id}: cliente parou de confirmar, cancelando.")
+                self.cancel()
+                break
+            self.sleep(POLL_INTERVAL)
+
+    def run(self, chunks):
+        start = time.monotonic()
+        first_chunk = None
+        error = None
+        try:
+            for text in chunks:
+                if self.cancelled:
+                    break
+                if first_chunk is None:
+                    first_chunk = time.monotonic() - start
+                self._buffer.append(text)
+                self._buffered += len(text)
+                if self._buffered >= MAX_BUFFERED_CHARS:
+                    self._wait_for_window()
+                if self.in_flight < MAX_IN_FLIGHT:
+                    self._flush()
+                # Cede a vez para os acks/cancelamento serem processados.
+                self.sleep(0)
+        except StreamFailed as e:
+            error = str(e)
+        finally:
+            chunks.close()
+
+        if not self.cancelled:
+            self._wait_for_window()
+        if not self.cancelled:
+            self._flush()
+        if error and not self.cancelled:
+            self.emit('chat_error', {'id': self.request_id, 'error': error, 'chunks': self.sent})
+            return
+        self.emit('chat_done', {
+            'id': self.request_id,
+            'cancelled': self.cancelled,
+            'chunks': self.sent,
+            'first_chunk_ms': round(first_chunk * 1000) if first_chunk is not None else None,
+            'elapsed_ms': round((time.monotonic() - start) * 1000),
+        })
@@ -0,0 +1,170 @@
+from functools import lru_cache
+
+import numpy as np
+
+from services.battle_engine import NO_TYPE, TYPE_INDEX, TYPES, load_battle_data
+
+# Índice de cobertura de tipos, calculado uma vez a partir de
+# tipos_efetividades e dos tipos/learnsets de cada Pokémon (via BattleData).
+# Cada conjunto de tipos é um bitset uint32 (bit i = TYPES[i]); a cobertura
+# Pokémon x Pokémon é uma matriz de bits empacotada com np.packbits, então
+# "quantos Pokémon este time acerta super efetivo" é OR + contagem de bits.
+
+ALL_TYPES_MASK = (1 << len(TYPES)) - 1
+
+
+def bits_to_types(bits):
+    bits = int(bits)
+    return [name for i, name in enumerate(TYPES) if bits >> i & 1]
+
+
+def _mask(matrix):
+    # (N, 18) bool -> (N,) uint32
+    weights = (1 << np.arange(len(TYPES), dtype=np.uint32))
+    return (matrix.astype(np.uint32) * weights).sum(axis=-1, dtype=np.uint32)
+
+
+def unpack_types(bits):
+    # (K,) uint32 -> (K, 18) 0/1
+    return (bits[:, None] >> np.arange(len(TYPES), dtype=np.uint32)) & 1
+
+
+def _defense_lists(multipliers):
+    return {
+        'weaknesses': sorted(
+            ({'type': name, 'multiplier': float(multipliers[i])} for i, name in enumerate(TYPES) if multipliers[i] > 1),
+            key=lambda item: -item['multiplier']
+        ),
+        'resistances': sorted(
+            ({'type': name, 'multiplier': float(multipliers[i])} for i, name in enumerate(TYPES) if 0 < multipliers[i] < 1),
+            key=lambda item: item['multiplier']
+        ),
+        'immunities': [name for i, name in enumerate(TYPES) if multipliers[i] == 0],
+    }
+
+
+def _popcount(packed):
+    return np.unpackbits(packed, axis=-1).sum(axis=-1)
+
+
+class CoverageIndex:
+
+    def __init__(self, data):
+        self.data = data
+        matrix = data.type_matrix[:len(TYPES)]
+
+        # Defesa: multiplicador recebido de cada tipo de ataque, (N, 18).
+        self.defense = matrix[:, data.types[:, 0]].T * matrix[:, data.types[:, 1]].T
+        self.weak_bits = _mask(self.defense > 1)
+        self.resist_bits = _mask((self.defense < 1) & (self.defense > 0))
+        self.immune_bits = _mask(self.defense == 0)
+
+        # Ataque: tipos dos ataques de dano que cada Pokémon aprende (Struggle,
+        # sem tipo, não conta).
+        move_type_bits = np.zeros(len(data.pokemon_ids), dtype=np.uint32)
+        for i in range(len(data.pokemon_ids)):
+            move_types = data.move_types[data.learnset(i)]
+            move_types = move_types[move_types != NO_TYPE]
+            move_type_bits[i] = np.bitwise_or.reduce(np.left_shift(np.uint32(1), move_types.astype(np.uint32)), initial=0)
+        self.move_type_bits = move_type_bits
+
+        # Tipos (puros) que cada tipo de ataque acerta super efetivo.
+        self.type_super_bits = _mask(matrix[:len(TYPES), :len(TYPES)] > 1)
+        self.super_type_bits = np.array(
+            [self._super_types(bits) for bits in move_type_bits], dtype=np.uint32
+        )
+
+        # hits[p] = bitset empacotado dos Pokémon que p acerta super efetivo.
+        hits = (self.weak_bits[None, :] & self.move_type_bits[:, None]) != 0
+        self.super_hits = np.packbits(hits, axis=1)
+        self.super_hit_counts = hits.sum(axis=1)
+
+    def _super_types(self, move_bits):
+        bits = 0
+        for i in range(len(TYPES)):
+            if move_bits >> i & 1:
+                bits |= int(self.type_super_bits[i])
+        return bits
+
+    def index(self, name_or_id):
+        return self.data.pokemon_index(name_or_id)
+
+    def defense_summary(self, index):
+        multipliers = self.defense[index]
+        return dict(
+            {'multipliers': {name: float(multipliers[i]) for i, name in enumerate(TYPES)}},
+            **_defense_lists(multipliers)
+        )
+
+    def offense_summary(self, index):
+        super_bits = int(self.super_type_bits[index])
+        return {
+            'move_types': bits_to_types(self.move_type_bits[index]),
+            'super_effective_against': bits_to_types(super_bits),
+            'not_covered': bits_to_types(ALL_TYPES_MASK & ~super_bits),
+            'pokemon_hit_super_effective': int(self.super_hit_counts[index]),
+            'pokemon_total': len(self.data.pokemon_ids),
+        }
+
+    def pokemon_coverage(self, name_or_id):
+        index = self.index(name_or_id)
+        return {
+            'id': int(self.data.pokemon_ids[index]),
+            'name': self.data.pokemon_names[index],
+            'types': [TYPES[t] for t in self.data.types[index] if t != NO_TYPE],
+            'defense': self.defense_summary(index),
+            'offense': self.offense_summary(index),
+        }
+
+    def team_coverage(self, members):
+        indexes = [self.index(m) for m in members]
+        weak = unpack_types(self.weak_bits[indexes])
+        resist = unpack_types(self.resist_bits[indexes] | self.immune_bits[indexes])
+
+        defense = {}
+        for t, name in enumerate(TYPES):
+            defense[name] = {'weak': int(weak[:, t].sum()), 'resist': int(resist[:, t].sum())}
+        # Fraqueza compartilhada: metade ou mais do time é fraco e ninguém resiste.
+        shared = [name for name, item in defense.items() if item['weak'] * 2 >= len(indexes) and not item['resist']]
+
+        move_bits = 0
+        super_bits = 0
+        for i in indexes:
+            move_bits |= int(self.move_type_bits[i])
+            super_bits |= int(self.super_type_bits[i])
+        hits = np.bitwise_or.reduce(self.super_hits[indexes], axis=0)
+
+        return {
+            'members': [self.data.pokemon_names[i] for i in indexes],
+            'defense': defense,
+            'shared_weaknesses': shared,
+            'offense': {
+                'move_types': bits_to_types(move_bits),
+                'super_effective_against': bits_to_types(super_bits),
+                'not_covered': bits_to_types(ALL_TYPES_MASK & ~super_bits),
+                'pokemon_hit_super_effective': int(_popcount(hits)),
+                'pokemon_total': len(self.data.pokemon_ids),
+            },
+        }
+
+
+@lru_cache(maxsize=1)
+def get_coverage_index():
+    return CoverageIndex(load_battle_data())
+
+
+def type_defense(types):
+    # Para Pokémon que ainda não estão em pokemons.db: fraquezas só pelos tipos.
+    matrix = get_coverage_index().data.type_matrix
+    indexes = [TYPE_INDEX[t] for t in types if t in TYPE_INDEX][:2]
+    indexes += [NO_TYPE] * (2 - len(indexes))
+    return _defense_lists(matrix[:len(TYPES), indexes[0]] * matrix[:len(TYPES), indexes[1]])
+
+
+@lru_cache(maxsize=2048)
+def get_pokemon_coverage(name_or_id):
+    return get_coverage_index().pokemon_coverage(name_or_id)
+
+
+def get_team_coverage(members):
+    return get_coverage_index().team_coverage(members)
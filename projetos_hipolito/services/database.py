@@ -0,0 +1,16 @@
+import os
+import sqlite3
+
+POKEMONS_DB_PATH = os.getenv(
+    "POKEMONS_DB_PATH",
+    os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'pokemons.db'))
+)
+DB_DIR = os.path.dirname(POKEMONS_DB_PATH)
+CACHE_DB_PATH = os.getenv("POKEAPI_CACHE_DB_PATH", os.path.join(DB_DIR, 'pokeapi_cache.db'))
+
+
+def get_connection(path=POKEMONS_DB_PATH):
+    conn = sqlite3.connect(path, timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
@@ -0,0 +1,69 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from services.pokeapi import (
+    MAX_CONCURRENT_REQUESTS,
+    get_abilities_details_in_parallel,
+    get_evolution_chain,
+    get_pokemon_details,
+    get_pokemon_species,
+    get_varieties_from_species,
+)
+from services.translator import translate_batch
+
+# Plano de busca da página de detalhes. Cada etapa só depende da anterior, e
+# tudo dentro de uma etapa roda ao mesmo tempo. No gunicorn com worker gevent
+# as threads do executor viram greenlets, então a espera de rede não bloqueia o worker.
+#
+#   1. detalhes + espécie
+#   2. cadeia evolutiva + variedades + habilidades
+#   3. todas as traduções (flavor text + habilidades) em um único translate_batch
+
+
+def load_pokemon_detail(name_or_id, batch_translator=translate_batch):
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        details_future = executor.submit(get_pokemon_details, name_or_id)
+        species_future = executor.submit(get_pokemon_species, name_or_id)
+
+        pokemon = details_future.result()
+        if not pokemon:
+            return None
+        pokemon = dict(pokemon)
+
+        species = species_future.result()
+        if not species and str(pokemon['id']) != str(name_or_id):
+            # Formas alternativas (ex: charizard-mega-x) não têm espécie com o mesmo nome.
+            species = get_pokemon_species(pokemon['id'])
+        species = dict(species) if species else None
+
+        evolution_future = None
+        varieties_future = None
+        if species:
+            if species.get('evolution_chain_url'):
+                evolution_future = executor.submit(get_evolution_chain, species['evolution_chain_url'])
+            varieties_future = executor.submit(get_varieties_from_species, species)
+        abilities_future = executor.submit(get_abilities_details_in_parallel, pokemon['abilities'])
+
+        evolution_chain = evolution_future.result() if evolution_future else None
+        varieties = varieties_future.result() if varieties_future else []
+        abilities = abilities_future.result()
+
+    if batch_translator:
+        texts = []
+        if species and species.get('flavor_text'):
+            texts.append(species['flavor_text'])
+        texts.extend(ability['description'] for ability in abilities)
+
+        translated = dict(zip(texts, batch_translator(texts)))
+
+        if species and species.get('flavor_text'):
+            species['flavor_text'] = translated[species['flavor_text']]
+        for ability in abilities:
+            ability['description'] = translated[ability['description']]
+
+    return {
+        'pokemon': pokemon,
+        'species': species,
+        'evolution_chain': evolution_chain,
+        'abilities': abilities,
+        'varieties': varieties,
+    }
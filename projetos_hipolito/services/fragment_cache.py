@@ -0,0 +1,106 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from services.metrics import FRAGMENT_CACHE
+from services.page_cache import data_version
+
+# Cache de trechos de template. Num template com a extensão carregada:
+#
+#   {% cache 'stats', pokemon.id %} ... {% endcache %}
+#
+# guarda o HTML do bloco numa store em memória com chave (versão dos dados,
+# 'stats', pokemon.id) e nas próximas renderizações devolve o HTML pronto, sem
+# executar os laços do bloco. O bloco só pode depender do que está na chave:
+# em detail.html, tudo o que vem do Pokémon é determinístico para um id e uma
+# versão dos dados (a mesma de services/page_cache.py).
+#
+# A store é LRU com limite de entradas e de caracteres, e TTL pelo mesmo
+# motivo do cache de páginas (uma tradução que falhou pode dar certo depois).
+# FRAGMENT_CACHE_ENABLED=0 desliga o cache (usado no benchmark).
+
+MAX_ENTRIES = 4000
+MAX_CHARS = 32 * 1024 * 1024
+TTL = 60 * 60
+
+
+class FragmentStore:
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_chars=MAX_CHARS, ttl=TTL):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.ttl = ttl
+        self.enabled = os.getenv("FRAGMENT_CACHE_ENABLED", "1") == "1"
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.chars = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            html, created_at = entry
+            if time.monotonic() - created_at > self.ttl:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return html
+
+    def put(self, key, html):
+        if len(html) > self.max_chars:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (html, time.monotonic())
+            self.chars += len(html)
+            while len(self._entries) > self.max_entries or self.chars > self.max_chars:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        html, _ = self._entries.pop(key)
+        self.chars -= len(html)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.chars = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'chars': self.chars}
+
+
+fragment_store = FragmentStore()
+
+
+class FragmentCacheExtension(Extension):
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        key = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.List(key)]), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, caller):
+        if not fragment_store.enabled:
+            return caller()
+        name = str(key[0])
+        key = (data_version(),) + tuple(key)
+        html = fragment_store.get(key)
+        if html is not None:
+            FRAGMENT_CACHE.labels(name, 'hit').inc()
+            return html
+        FRAGMENT_CACHE.labels(name, 'miss').inc()
+        html = Markup(caller())
+        fragment_store.put(key, html)
+        return html
@@ -1,14 +1,41 @@
 import os
+import threading
+import time
+from urllib.parse import urlparse
 from google import genai
 from google.genai import types
 from google.genai.errors import APIError
 from dotenv import load_dotenv 
 
+from services.agent_tools import TOOLS
+from services.chat_memory import append_turns, get_history, trim_to_budget
+from services.chat_stream import StreamFailed
+from services.http_client import protected_stream
+from services.intent_router import route
+from services.response_cache import get_response_cache
+
 load_dotenv() 
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-client = genai.Client(api_key=GEMINI_API_KEY) 
+# GEMINI_BASE_URL troca o endpoint da API (ex: o mock de benchmarks/mock_upstream.py).
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
+GEMINI_HOST = urlparse(GEMINI_BASE_URL).netloc if GEMINI_BASE_URL else "generativelanguage.googleapis.com"
+
+client = genai.Client(
+    api_key=GEMINI_API_KEY,
+    http_options=types.HttpOptions(
+        base_url=GEMINI_BASE_URL,
+        timeout=30000,
+        retry_options=types.HttpRetryOptions(
+            attempts=3,
+            initial_delay=0.5,
+            max_delay=4,
+            jitter=0.5,
+            http_status_codes=[429, 500, 502, 503, 504]
+        )
+    )
+) 
 MODEL_ID = "gemini-2.0-flash-lite" 
 
 SYSTEM_INSTRUCTION = (
@@ -16,39 +43,263 @@ SYSTEM_INSTRUCTION = (
     "Suas respostas devem ser SEMPRE breves, diretas e focadas no universo Pokémon. "
     "Ignore perguntas que não sejam sobre Pokémon. "
     "Você deve ser capaz de: montar builds de Pokémon (com 4 ataques), recomendar ataques, e sugerir times de 6 Pokémon. "
-    "Priorize informações oficiais do universo Pokémon (jogos, TCG, lore)."
+    "Priorize informações oficiais do universo Pokémon (jogos, TCG, lore). "
+    "Para sugerir times, use a ferramenta suggest_team e explique o time que ela devolver."
 )
 
 generation_config = types.GenerateContentConfig(
     system_instruction=SYSTEM_INSTRUCTION,
     temperature=0.7, 
-    max_output_tokens=10000 
+    max_output_tokens=10000,
+    tools=TOOLS,
+    # As ferramentas são executadas por _model_stream, que também atende
+    # o caminho com context cache (onde o SDK não tem as funções).
+    automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True)
 )
 
-def get_pokemon_agent_response(prompt: str, history: list = None) -> str:
-    contents = [
-        types.Content(
-            role="user", 
-            parts=[types.Part.from_text(text=prompt)] 
+TOOL_FUNCTIONS = {tool.__name__: tool for tool in TOOLS}
+MAX_TOOL_ROUNDS = 4
+
+# Context cache do Gemini para o prefixo fixo (instrução de sistema +
+# declarações das ferramentas), reaproveitado por todas as conversas. A API
+# recusa prefixos abaixo do mínimo de tokens do modelo; nesse caso seguimos
+# sem cache e só tentamos de novo depois de CONTEXT_CACHE_RETRY. A criação
+# (chamada de rede) roda fora da trava: enquanto uma requisição cria o cache,
+# as outras seguem sem ele em vez de esperar.
+CONTEXT_CACHE_TTL = 60 * 60
+CONTEXT_CACHE_RETRY = 60 * 60
+_context_cache_lock = threading.Lock()
+_context_cache = {'name': None, 'expires_at': 0.0, 'retry_at': 0.0, 'creating': False}
+
+# Quantas respostas saíram do roteador local, do cache e do Gemini.
+_served_lock = threading.Lock()
+_served = {'local': 0, 'cache': 0, 'llm': 0}
+
+
+def _count_served(source):
+    with _served_lock:
+        _served[source] += 1
+
+
+def get_agent_stats():
+    with _served_lock:
+        local, cached, llm = _served['local'], _served['cache'], _served['llm']
+    total = local + cached + llm
+    return {
+        'local': local,
+        'cache': cached,
+        'llm': llm,
+        'total': total,
+        'local_share': local / total if total else 0.0,
+        'cache_share': cached / total if total else 0.0,
+        'response_cache': get_response_cache().stats(),
+    }
+
+
+SAFETY_MESSAGE = "Desculpe, não posso responder a essa pergunta."
+API_ERROR_MESSAGE = "Erro de comunicação com a IA. Tente novamente."
+BUSY_MESSAGE = "Desculpe, a Enfermeira Joy está ocupada no Centro Pokémon. Tente novamente mais tarde."
+
+
+def _context_cache_name():
+    now = time.time()
+    with _context_cache_lock:
+        if _context_cache['name'] and _context_cache['expires_at'] - 60 > now:
+            return _context_cache['name']
+        if now < _context_cache['retry_at'] or _context_cache['creating']:
+            return None
+        _context_cache['creating'] = True
+
+    try:
+        cache = client.caches.create(
+            model=MODEL_ID,
+            config=types.CreateCachedContentConfig(
+                display_name='enfermeira-joy',
+                system_instruction=SYSTEM_INSTRUCTION,
+                tools=[types.Tool(function_declarations=[
+                    types.FunctionDeclaration.from_callable(client=client._api_client, callable=tool)
+                    for tool in TOOLS
+                ])],
+                ttl=f"{CONTEXT_CACHE_TTL}s",
+            )
         )
-    ]
+    except Exception as e:
+        print(f"Context cache do Gemini indisponível: {e}")
+        with _context_cache_lock:
+            _context_cache.update(name=None, retry_at=time.time() + CONTEXT_CACHE_RETRY, creating=False)
+        return None
+    with _context_cache_lock:
+        _context_cache.update(name=cache.name, expires_at=now + CONTEXT_CACHE_TTL, creating=False)
+    return cache.name
+
 
+def _request_config():
+    name = _context_cache_name()
+    if not name:
+        return generation_config
+    return types.GenerateContentConfig(
+        cached_content=name,
+        temperature=generation_config.temperature,
+        max_output_tokens=generation_config.max_output_tokens,
+    )
+
+
+def _answer_without_model(prompt, has_context):
     try:
-        response = client.models.generate_content(
+        answer = route(prompt)
+    except Exception as e:
+        print(f"Erro no roteador local: {e}")
+        answer = None
+    if answer:
+        _count_served('local')
+        return answer
+
+    # Com histórico a resposta depende da conversa, então não passa pelo cache.
+    if not has_context:
+        cached = get_response_cache().get(prompt)
+        if cached:
+            _count_served('cache')
+            return cached
+    _count_served('llm')
+    return None
+
+
+def _conversation(history, session_id):
+    # (resumo, [(role, texto)]): da memória da sessão ou do histórico enviado
+    # pelo cliente ([{role, parts: [{text}]}]), cortado no orçamento de tokens.
+    if session_id:
+        return get_history(session_id)
+    turns = []
+    for message in history or ():
+        text = ''.join(part.get('text', '') for part in message.get('parts', ()))
+        if text:
+            turns.append(('model' if message.get('role') == 'model' else 'user', text))
+    return '', trim_to_budget(turns)
+
+
+def _build_contents(prompt, summary, turns):
+    contents = []
+    if summary:
+        contents.append(types.Content(
+            role="user",
+            parts=[types.Part.from_text(text=f"Resumo da conversa até aqui:\n{summary}")]
+        ))
+    for role, text in turns:
+        contents.append(types.Content(role=role, parts=[types.Part.from_text(text=text)]))
+    contents.append(types.Content(
+        role="user", 
+        parts=[types.Part.from_text(text=prompt)] 
+    ))
+    return contents
+
+
+class _Blocked(Exception):
+    pass
+
+
+def _call_tools(function_calls):
+    parts = []
+    for call in function_calls:
+        tool = TOOL_FUNCTIONS.get(call.name)
+        try:
+            result = tool(**(call.args or {})) if tool else {'error': f"Ferramenta desconhecida: {call.name}"}
+        except Exception as e:
+            result = {'error': str(e)}
+        parts.append(types.Part.from_function_response(name=call.name, response={'result': result}))
+    return types.Content(role="user", parts=parts)
+
+
+def _model_stream(contents):
+    # Texto do modelo em pedaços; quando ele pede ferramentas, executa e
+    # continua a geração com os resultados.
+    config = _request_config()
+    for _ in range(MAX_TOOL_ROUNDS):
+        model_parts = []
+        function_calls = []
+        stream = protected_stream(
+            GEMINI_HOST,
+            client.models.generate_content_stream,
             model=MODEL_ID,
-            contents=contents, 
-            config=generation_config
+            contents=contents,
+            config=config
         )
-        
-        if response.candidates and response.candidates[0].finish_reason == 'SAFETY':
-             return "Desculpe, não posso responder a essa pergunta."
-        
-        return response.text.strip()
-        
+        for chunk in stream:
+            candidate = chunk.candidates[0] if chunk.candidates else None
+            if not candidate:
+                continue
+            if candidate.finish_reason == 'SAFETY':
+                raise _Blocked()
+            for part in (candidate.content.parts if candidate.content else None) or ():
+                model_parts.append(part)
+                if part.function_call:
+                    function_calls.append(part.function_call)
+                elif part.text and not part.thought:
+                    yield part.text
+        if not function_calls:
+            return
+        contents = contents + [types.Content(role="model", parts=model_parts), _call_tools(function_calls)]
+
+
+def _remember(session_id, prompt, answer):
+    if session_id and answer:
+        append_turns(session_id, [('user', prompt), ('model', answer)])
+
+
+def get_pokemon_agent_response(prompt: str, history: list = None, session_id: str = None) -> str:
+    try:
+        return ''.join(stream_pokemon_agent_response(prompt, history, session_id)).strip()
+    except StreamFailed as e:
+        # Resposta incompleta: só a mensagem de erro.
+        return str(e)
+
+
+def stream_pokemon_agent_response(prompt, history=None, session_id=None):
+    # Resposta em pedaços de texto à medida que o Gemini gera; respostas
+    # locais/do cache saem num pedaço só. Com session_id a conversa vem da
+    # memória da sessão (e a resposta é gravada nela); sem, do history enviado.
+    # Fechar o gerador (cancelamento) encerra a requisição ao Gemini, e uma
+    # resposta interrompida não vai para o cache nem para a memória. Um erro
+    # antes do primeiro pedaço vira a própria resposta; depois dele, o gerador
+    # levanta StreamFailed em vez de colar a mensagem no texto parcial.
+    summary, turns = _conversation(history, session_id)
+    has_context = bool(summary or turns)
+
+    answer = _answer_without_model(prompt, has_context)
+    if answer:
+        _remember(session_id, prompt, answer)
+        yield answer
+        return
+
+    parts = []
+    try:
+        for text in _model_stream(_build_contents(prompt, summary, turns)):
+            parts.append(text)
+            yield text
+
+    except _Blocked:
+        error = SAFETY_MESSAGE
+
     except APIError as e:
         print(f"Erro na API Gemini: {e}")
-        return "Erro de comunicação com a IA. Tente novamente."
-        
+        # O context cache pode ter expirado/sumido do lado do Gemini.
+        with _context_cache_lock:
+            _context_cache['name'] = None
+        error = API_ERROR_MESSAGE
+
     except Exception as e:
         print(f"Erro inesperado no Gemini: {e}")
-        return "Desculpe, a Enfermeira Joy está ocupada no Centro Pokémon. Tente novamente mais tarde."
\ No newline at end of file
+        error = BUSY_MESSAGE
+
+    else:
+        error = None
+
+    if error:
+        if parts:
+            raise StreamFailed(error)
+        yield error
+        return
+
+    answer = ''.join(parts).strip()
+    if answer and not has_context:
+        get_response_cache().put(prompt, answer)
+    _remember(session_id, prompt, answer)
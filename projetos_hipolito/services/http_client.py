@@ -0,0 +1,180 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from services.metrics import count_upstream_error, observe_upstream
+
+# (conexão, leitura) em segundos: uma resposta lenta não pode travar o worker gevent.
+DEFAULT_TIMEOUT = (3.05, 10)
+
+POOL_MAXSIZE = 20
+MAX_CONCURRENT_PER_HOST = 20
+
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RESET_TIMEOUT = 30
+
+
+class CircuitOpenError(requests.RequestException):
+    pass
+
+
+class CircuitBreaker:
+    # closed: tudo passa. open: falha na hora, sem tocar na rede.
+    # half-open: depois de reset_timeout deixa uma chamada de teste passar.
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == 'open' or (state == 'half-open' and self._probing):
+                raise CircuitOpenError(f"Circuito '{self.name}' aberto: upstream indisponível")
+            if state == 'half-open':
+                self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+def _build_session():
+    retry = Retry(
+        total=3,
+        connect=2,
+        backoff_factor=0.3,
+        backoff_jitter=0.3,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=10, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+session = _build_session()
+
+_host_lock = threading.Lock()
+_host_semaphores = {}
+_breakers = {}
+
+
+def _host_limit(host):
+    with _host_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(MAX_CONCURRENT_PER_HOST)
+            _host_semaphores[host] = semaphore
+        return semaphore
+
+
+def get_breaker(name):
+    with _host_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = CircuitBreaker(name)
+            _breakers[name] = breaker
+        return breaker
+
+
+def protected_call(host, fn, *args, **kwargs):
+    # Para clientes que não usam a sessão (deep-translator, google-genai):
+    # aplica o limite de concorrência e o circuit breaker do host.
+    breaker = get_breaker(host)
+    try:
+        breaker.before_call()
+    except CircuitOpenError as e:
+        count_upstream_error(host, e)
+        raise
+    with _host_limit(host):
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            breaker.record_failure()
+            observe_upstream(host, time.perf_counter() - start, e)
+            raise
+    breaker.record_success()
+    observe_upstream(host, time.perf_counter() - start)
+    return result
+
+
+def get(url, timeout=DEFAULT_TIMEOUT, **kwargs):
+    host = urlparse(url).netloc
+
+    def do_request():
+        response = session.get(url, timeout=timeout, **kwargs)
+        # 4xx (ex: 404 de Pokémon inexistente) não indica upstream fora do ar.
+        if response.status_code >= 500 or response.status_code == 429:
+            response.raise_for_status()
+        return response
+
+    response = protected_call(host, do_request)
+    response.raise_for_status()
+    return response
+
+
+def get_breaker_states():
+    with _host_lock:
+        breakers = list(_breakers.values())
+    return {b.name: {'state': b.state, 'failures': b.failures} for b in breakers}
+
+
+def protected_stream(host, fn, *args, **kwargs):
+    # Como protected_call, para chamadas que devolvem um iterador (respostas em
+    # streaming): a vaga do host fica ocupada até o fim da iteração. Fechar o
+    # gerador antes do fim (cancelamento) conta como sucesso: o upstream
+    # estava respondendo.
+    breaker = get_breaker(host)
+    try:
+        breaker.before_call()
+    except CircuitOpenError as e:
+        count_upstream_error(host, e)
+        raise
+    with _host_limit(host):
+        start = time.perf_counter()
+        try:
+            yield from fn(*args, **kwargs)
+        except GeneratorExit:
+            breaker.record_success()
+            observe_upstream(host, time.perf_counter() - start)
+            raise
+        except Exception as e:
+            breaker.record_failure()
+            observe_upstream(host, time.perf_counter() - start, e)
+            raise
+    breaker.record_success()
+    observe_upstream(host, time.perf_counter() - start)
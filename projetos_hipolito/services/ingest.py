@@ -0,0 +1,388 @@
+import argparse
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from services import http_client
+from services.database import get_connection
+from services.migrate import migrate
+from services.pokemon_store import save_pokemon_relations
+from services.pokeapi import BASE_URL
+
+# Carga offline de pokemons.db a partir da PokeAPI:
+#
+#   python -m services.ingest                       # tudo, retomando de onde parou
+#   python -m services.ingest --only pokemon --limit 50
+#   python -m services.ingest --refresh             # revalida tudo com ETag/Last-Modified
+#
+# Cada recurso baixado fica registrado em ingest_resources; uma execução
+# interrompida continua dos que ainda não foram gravados.
+
+PHASES = ('pokemon', 'species', 'evolution-chain', 'ability', 'move')
+
+DEFAULT_CONCURRENCY = 8
+
+POKEMON_EXTRA_COLUMNS = {
+    'altura': 'INTEGER',
+    'peso': 'INTEGER',
+    'species_id': 'INTEGER',
+    'is_default': 'INTEGER',
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_resources (
+    url TEXT PRIMARY KEY,
+    resource TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_at REAL,
+    checked_at REAL,
+    status TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS species (
+    id INTEGER PRIMARY KEY,
+    nome TEXT UNIQUE NOT NULL,
+    geracao INTEGER,
+    genero TEXT,
+    evolution_chain_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_species_chain ON species (evolution_chain_id);
+
+CREATE TABLE IF NOT EXISTS species_flavor_texts (
+    species_id INTEGER NOT NULL REFERENCES species (id),
+    idioma TEXT NOT NULL,
+    texto TEXT NOT NULL,
+    PRIMARY KEY (species_id, idioma)
+);
+
+CREATE TABLE IF NOT EXISTS species_varieties (
+    species_id INTEGER NOT NULL REFERENCES species (id),
+    pokemon_id INTEGER NOT NULL,
+    pokemon_nome TEXT NOT NULL,
+    is_default INTEGER NOT NULL,
+    PRIMARY KEY (species_id, pokemon_id)
+);
+CREATE INDEX IF NOT EXISTS idx_species_varieties_pokemon ON species_varieties (pokemon_id);
+
+CREATE TABLE IF NOT EXISTS evolution_chain_links (
+    chain_id INTEGER NOT NULL,
+    species_id INTEGER NOT NULL,
+    species_nome TEXT NOT NULL,
+    parent_species_id INTEGER,
+    ordem INTEGER NOT NULL,
+    PRIMARY KEY (chain_id, species_id)
+);
+CREATE INDEX IF NOT EXISTS idx_evolution_links_species ON evolution_chain_links (species_id);
+
+CREATE TABLE IF NOT EXISTS pokemon_sprites (
+    pokemon_id INTEGER PRIMARY KEY REFERENCES pokemons (id),
+    front_default TEXT,
+    front_shiny TEXT,
+    back_default TEXT,
+    back_shiny TEXT,
+    artwork_default TEXT,
+    artwork_shiny TEXT,
+    dream_world TEXT
+);
+"""
+
+
+def _id_from_url(url):
+    return int(url.rstrip('/').split('/')[-1])
+
+
+def _english(entries, field):
+    for entry in entries:
+        if entry['language']['name'] == 'en':
+            return entry[field]
+    return None
+
+
+def ensure_schema(conn):
+    conn.executescript(SCHEMA)
+    existing = {row['name'] for row in conn.execute("PRAGMA table_info(pokemons)")}
+    for column, column_type in POKEMON_EXTRA_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE pokemons ADD COLUMN {column} {column_type}")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_pokemons_species ON pokemons (species_id)")
+    conn.commit()
+    migrate(conn)
+
+
+# --- escrita -----------------------------------------------------------------
+
+def write_species(conn, data):
+    chain = data.get('evolution_chain')
+    genus = next((g['genus'] for g in data['genera'] if g['language']['name'] == 'pt-BR'),
+                 next((g['genus'] for g in data['genera'] if g['language']['name'] == 'en'), None))
+    conn.execute(
+        "INSERT OR REPLACE INTO species (id, nome, geracao, genero, evolution_chain_id) VALUES (?, ?, ?, ?, ?)",
+        (data['id'], data['name'], _id_from_url(data['generation']['url']), genus,
+         _id_from_url(chain['url']) if chain else None)
+    )
+
+    flavor_texts = {}
+    for entry in data['flavor_text_entries']:
+        language = entry['language']['name']
+        if language not in flavor_texts:
+            flavor_texts[language] = entry['flavor_text'].replace('\n', ' ').replace('\f', ' ')
+    conn.executemany(
+        "INSERT OR REPLACE INTO species_flavor_texts (species_id, idioma, texto) VALUES (?, ?, ?)",
+        [(data['id'], language, text) for language, text in flavor_texts.items()]
+    )
+
+    conn.executemany(
+        "INSERT OR REPLACE INTO species_varieties (species_id, pokemon_id, pokemon_nome, is_default) "
+        "VALUES (?, ?, ?, ?)",
+        [(data['id'], _id_from_url(v['pokemon']['url']), v['pokemon']['name'], int(v['is_default']))
+         for v in data.get('varieties', [])]
+    )
+
+    description = flavor_texts.get('pt-BR') or flavor_texts.get('en')
+    if description:
+        conn.execute("UPDATE pokemons SET descricao = ? WHERE id = ?", (description, data['id']))
+
+
+def write_pokemon(conn, data):
+    stats = {s['stat']['name']: s['base_stat'] for s in data['stats']}
+    types = [t['type']['name'] for t in data['types']]
+    moves = [m['move']['name'] for m in data.get('moves', [])]
+    sprites = data['sprites']
+    other = sprites.get('other') or {}
+    conn.execute(
+        "INSERT INTO pokemons (id, nome, tipos, stats_base, hp_atual, sprite_url, moves_aprendiveis, "
+        "altura, peso, species_id, is_default) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET nome = excluded.nome, tipos = excluded.tipos, "
+        "stats_base = excluded.stats_base, hp_atual = excluded.hp_atual, sprite_url = excluded.sprite_url, "
+        "moves_aprendiveis = excluded.moves_aprendiveis, altura = excluded.altura, peso = excluded.peso, "
+        "species_id = excluded.species_id, is_default = excluded.is_default",
+        (
+            data['id'],
+            data['name'].capitalize(),
+            json.dumps(types),
+            json.dumps(stats),
+            stats.get('hp'),
+            sprites['front_default'],
+            json.dumps(moves),
+            data['height'],
+            data['weight'],
+            _id_from_url(data['species']['url']),
+            int(data.get('is_default', True)),
+        )
+    )
+    conn.execute(
+        "INSERT OR REPLACE INTO pokemon_sprites (pokemon_id, front_default, front_shiny, back_default, back_shiny, "
+        "artwork_default, artwork_shiny, dream_world) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            data['id'],
+            sprites['front_default'],
+            sprites['front_shiny'],
+            sprites['back_default'],
+            sprites['back_shiny'],
+            (other.get('official-artwork') or {}).get('front_default'),
+            (other.get('official-artwork') or {}).get('front_shiny'),
+            (other.get('dream_world') or {}).get('front_default'),
+        )
+    )
+    save_pokemon_relations(
+        conn,
+        data['id'],
+        types,
+        stats,
+        moves,
+        [(a['slot'], a['ability']['name'], _id_from_url(a['ability']['url']), a['is_hidden'])
+         for a in data['abilities']]
+    )
+
+
+def write_evolution_chain(conn, data):
+    links = []
+
+    def walk(node, parent_id):
+        species_id = _id_from_url(node['species']['url'])
+        links.append((data['id'], species_id, node['species']['name'], parent_id, len(links)))
+        for child in node.get('evolves_to', []):
+            walk(child, species_id)
+
+    walk(data['chain'], None)
+    conn.execute("DELETE FROM evolution_chain_links WHERE chain_id = ?", (data['id'],))
+    conn.executemany(
+        "INSERT INTO evolution_chain_links (chain_id, species_id, species_nome, parent_species_id, ordem) "
+        "VALUES (?, ?, ?, ?, ?)",
+        links
+    )
+
+
+def write_ability(conn, data):
+    conn.execute(
+        "INSERT INTO abilities_list (id, nome, efeito, curta_descricao, geracao) VALUES (?, ?, ?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET nome = excluded.nome, efeito = excluded.efeito, "
+        "curta_descricao = excluded.curta_descricao, geracao = excluded.geracao",
+        (
+            data['id'],
+            data['name'],
+            _english(data.get('effect_entries', []), 'effect'),
+            _english(data.get('effect_entries', []), 'short_effect'),
+            data['generation']['name'] if data.get('generation') else None,
+        )
+    )
+
+
+def write_move(conn, data):
+    effect = _english(data.get('effect_entries', []), 'short_effect')
+    if effect and data.get('effect_chance') is not None:
+        effect = effect.replace('$effect_chance', str(data['effect_chance']))
+    meta = data.get('meta') or {}
+    conn.execute(
+        "INSERT INTO moves_list (nome, tipo, categoria, power, accuracy, chance_efeito, descricao_efeito, "
+        "move_id, classe_dano, pp) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT(nome) DO UPDATE SET tipo = excluded.tipo, categoria = excluded.categoria, "
+        "power = excluded.power, accuracy = excluded.accuracy, chance_efeito = excluded.chance_efeito, "
+        "descricao_efeito = excluded.descricao_efeito, move_id = excluded.move_id, "
+        "classe_dano = excluded.classe_dano, pp = excluded.pp",
+        (
+            data['name'],
+            data['type']['name'],
+            (meta.get('category') or {}).get('name'),
+            data['power'],
+            data['accuracy'],
+            data.get('effect_chance'),
+            effect,
+            data['id'],
+            data['damage_class']['name'] if data.get('damage_class') else None,
+            data['pp'],
+        )
+    )
+
+
+WRITERS = {
+    'species': ('pokemon-species', write_species),
+    'pokemon': ('pokemon', write_pokemon),
+    'evolution-chain': ('evolution-chain', write_evolution_chain),
+    'ability': ('ability', write_ability),
+    'move': ('move', write_move),
+}
+
+
+# --- download ----------------------------------------------------------------
+
+def list_resource_urls(endpoint, limit=None):
+    response = http_client.get(f"{BASE_URL}/{endpoint}?limit=100000")
+    urls = [item['url'] for item in response.json()['results']]
+    return urls[:limit] if limit else urls
+
+
+def fetch_resource(url, state, refresh):
+    headers = {}
+    if refresh and state:
+        if state['etag']:
+            headers['If-None-Match'] = state['etag']
+        if state['last_modified']:
+            headers['If-Modified-Since'] = state['last_modified']
+
+    response = http_client.get(url, headers=headers)
+    if response.status_code == 304:
+        return None, None, None
+    return response.json(), response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+
+def run_phase(conn, phase, concurrency, refresh, limit=None):
+    endpoint, writer = WRITERS[phase]
+    urls = list_resource_urls(endpoint, limit)
+
+    states = {
+        row['url']: row for row in conn.execute(
+            "SELECT url, etag, last_modified, status FROM ingest_resources WHERE resource = ?", (phase,)
+        )
+    }
+    pending = [
+        url for url in urls
+        if refresh or states.get(url) is None or states[url]['status'] != 'done'
+    ]
+    print(f"[{phase}] {len(urls)} recursos, {len(pending)} para baixar")
+
+    written = unchanged = failed = 0
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {
+            executor.submit(fetch_resource, url, states.get(url), refresh): url
+            for url in pending
+        }
+        for future in as_completed(futures):
+            url = futures[future]
+            now = time.time()
+            try:
+                data, etag, last_modified = future.result()
+            except (requests.RequestException, ValueError) as e:
+                print(f"[{phase}] erro em {url}: {e}")
+                conn.execute(
+                    "INSERT INTO ingest_resources (url, resource, checked_at, status) VALUES (?, ?, ?, 'error') "
+                    "ON CONFLICT(url) DO UPDATE SET checked_at = excluded.checked_at, "
+                    "status = CASE WHEN status = 'done' THEN 'done' ELSE 'error' END",
+                    (url, phase, now)
+                )
+                failed += 1
+                continue
+
+            if data is None:
+                conn.execute("UPDATE ingest_resources SET checked_at = ? WHERE url = ?", (now, url))
+                unchanged += 1
+            else:
+                try:
+                    writer(conn, data)
+                except (KeyError, TypeError, sqlite3.Error) as e:
+                    print(f"[{phase}] dados inesperados em {url}: {e}")
+                    failed += 1
+                    continue
+                conn.execute(
+                    "INSERT OR REPLACE INTO ingest_resources "
+                    "(url, resource, etag, last_modified, fetched_at, checked_at, status) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 'done')",
+                    (url, phase, etag, last_modified, now, now)
+                )
+                written += 1
+
+            if (written + unchanged) % 50 == 0:
+                conn.commit()
+                print(f"[{phase}] {written + unchanged + failed}/{len(pending)}")
+
+    conn.commit()
+    print(f"[{phase}] gravados: {written}, sem mudança: {unchanged}, falhas: {failed}")
+    return written, unchanged, failed
+
+
+def finalize(conn):
+    # Pokémon novos vêm sem geração; ela está na espécie.
+    conn.execute(
+        "UPDATE pokemons SET geracao = (SELECT geracao FROM species WHERE species.id = pokemons.species_id) "
+        "WHERE geracao IS NULL AND species_id IS NOT NULL"
+    )
+    conn.commit()
+
+
+def ingest(phases=PHASES, concurrency=DEFAULT_CONCURRENCY, refresh=False, limit=None):
+    conn = get_connection()
+    try:
+        ensure_schema(conn)
+        for phase in phases:
+            run_phase(conn, phase, concurrency, refresh, limit)
+        finalize(conn)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Baixa os dados da PokeAPI para pokemons.db.")
+    parser.add_argument('--only', choices=PHASES, action='append',
+                        help="Executa apenas as fases indicadas (pode repetir).")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="Requisições simultâneas à PokeAPI.")
+    parser.add_argument('--refresh', action='store_true',
+                        help="Revalida recursos já baixados usando ETag/Last-Modified.")
+    parser.add_argument('--limit', type=int, default=None,
+                        help="Baixa no máximo N recursos por fase (útil para testes).")
+    args = parser.parse_args()
+    ingest(args.only or PHASES, args.concurrency, args.refresh, args.limit)
@@ -0,0 +1,277 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+from services.agent_tools import (
+    find_pokemon_learning_move,
+    get_move_info,
+    get_pokemon_learnset,
+    get_pokemon_stats,
+    get_pokemon_weaknesses,
+    get_type_effectiveness,
+)
+from services.battle_engine import TYPES, load_battle_data
+from services.database import get_connection
+from services.pokemon_store import get_pokemon_move_names
+
+# Roteador local da Enfermeira Joy: perguntas factuais simples ("status base
+# do pikachu", "fogo é efetivo contra ferrothorn?", "quem aprende earthquake")
+# são respondidas direto de pokemons.db, sem chamar o Gemini. Qualquer coisa
+# que peça opinião/estratégia, ou que não tenha as entidades necessárias, vai
+# para o modelo (route devolve None).
+
+MAX_WORDS = 30
+MAX_NGRAM = 3
+
+TYPE_NAMES_PT = {
+    'normal': 'normal', 'fogo': 'fire', 'agua': 'water', 'planta': 'grass', 'grama': 'grass',
+    'eletrico': 'electric', 'gelo': 'ice', 'lutador': 'fighting', 'luta': 'fighting',
+    'venenoso': 'poison', 'veneno': 'poison', 'terra': 'ground', 'voador': 'flying',
+    'psiquico': 'psychic', 'inseto': 'bug', 'pedra': 'rock', 'rocha': 'rock', 'fantasma': 'ghost',
+    'dragao': 'dragon', 'sombrio': 'dark', 'noturno': 'dark', 'aco': 'steel', 'metalico': 'steel',
+    'fada': 'fairy',
+}
+
+STAT_LABELS = {
+    'hp': 'HP', 'attack': 'Ataque', 'defense': 'Defesa', 'special-attack': 'Sp. Atk',
+    'special-defense': 'Sp. Def', 'speed': 'Velocidade',
+}
+
+# Pedidos de opinião/estratégia ficam com o modelo mesmo citando um Pokémon.
+ADVICE_WORDS = re.compile(
+    r'\b(time|equipe|team|build|moveset|melhor|melhores|best|estrategia|strategy|recomend\w*|sugir\w*|'
+    r'sugest\w*|devo|should|vale a pena|competitivo|nature|natureza|evs?|ivs?|item|itens|counter\w*|por que|why)\b'
+)
+STATS_WORDS = re.compile(r'\b(status|stats?|atributos|base stats?|estatisticas?|bst)\b')
+WEAKNESS_WORDS = re.compile(r'\b(fraquezas?|fraco|fracos|weak\w*|resistencias?|resiste|resist\w*|imun\w*)\b')
+EFFECTIVENESS_WORDS = re.compile(
+    r'\b(efetivo|efetiva|eficaz|super efetivo|effective|contra|against|dano em|multiplicador)\b'
+)
+LEARNERS_WORDS = re.compile(r'\b(quem aprende|quais pokemons? aprendem|who learns|which pokemon learns?|aprendem)\b')
+LEARNS_WORDS = re.compile(r'\b(aprende|learns?|pode aprender|can learn)\b')
+LEARNSET_WORDS = re.compile(r'\b(ataques|golpes|moves|learnset)\b')
+# Separa quem ataca (antes) de quem defende (depois): "fogo contra ferrothorn".
+AGAINST_WORDS = ('contra', 'against')
+MOVE_WORDS = re.compile(
+    r'\b(o que faz|oque faz|what does|poder|power|precisao|accuracy|pp|efeito|effect|ataque|golpe|move)\b'
+)
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return re.sub(r'[^a-z0-9]+', ' ', text).strip()
+
+
+@lru_cache(maxsize=1)
+def _vocabulary():
+    data = load_battle_data()
+    with get_connection() as conn:
+        moves = {row['nome'] for row in conn.execute("SELECT nome FROM moves_list")}
+    return set(data.pokemon_names), moves
+
+
+def _find_entities(tokens, names):
+    # Procura n-gramas (mais longos primeiro) unidos por hífen: "mr mime" -> mr-mime.
+    found = []
+    used = set()
+    for size in range(MAX_NGRAM, 0, -1):
+        for start in range(len(tokens) - size + 1):
+            span = range(start, start + size)
+            if used.intersection(span):
+                continue
+            candidate = '-'.join(tokens[start:start + size])
+            if candidate in names:
+                found.append((start, candidate))
+                used.update(span)
+    return [name for _, name in sorted(found)]
+
+
+def type_name(token):
+    return TYPE_NAMES_PT.get(token) or (token if token in TYPES else None)
+
+
+def _find_types(tokens):
+    types = []
+    for token in tokens:
+        name = type_name(token)
+        if name and name not in types:
+            types.append(name)
+    return types
+
+
+def _title(name):
+    return name.replace('-', ' ').title()
+
+
+def _format_multiplier(value):
+    if value == 0:
+        return "x0 (imune)"
+    if value == 0.25:
+        return "x¼"
+    if value == 0.5:
+        return "x½"
+    return f"x{value:g}"
+
+
+def _answer_stats(pokemon):
+    info = get_pokemon_stats(pokemon)
+    if 'error' in info:
+        return None
+    stats = ' | '.join(f"{STAT_LABELS.get(k, k)}: {v}" for k, v in info['base_stats'].items())
+    lines = [
+        f"{_title(info['name'])} ({'/'.join(t.title() for t in info['types'])})",
+        stats,
+        f"Total: {info['base_stat_total']}",
+    ]
+    if info['abilities']:
+        lines.append(f"Habilidades: {', '.join(_title(a) for a in info['abilities'])}")
+    return '\n'.join(lines)
+
+
+def _answer_weaknesses(pokemon):
+    info = get_pokemon_weaknesses(pokemon)
+    if 'error' in info:
+        return None
+
+    def describe(items):
+        return ', '.join(f"{i['type'].title()} {_format_multiplier(i['multiplier'])}" for i in items) or 'nenhuma'
+
+    lines = [
+        f"{_title(info['name'])} ({'/'.join(t.title() for t in info['types'])})",
+        f"Fraquezas: {describe(info['weaknesses'])}",
+        f"Resistências: {describe(info['resistances'])}",
+    ]
+    if info['immunities']:
+        lines.append(f"Imunidades: {', '.join(t.title() for t in info['immunities'])}")
+    return '\n'.join(lines)
+
+
+def _verdict(multiplier):
+    if multiplier == 0:
+        return "não causa dano (imune)"
+    if multiplier > 1:
+        return "é super efetivo"
+    if multiplier < 1:
+        return "não é muito efetivo"
+    return "causa dano normal"
+
+
+def _answer_effectiveness(attack_type, defender):
+    info = get_type_effectiveness(attack_type, defender)
+    if 'error' in info:
+        return None
+    multiplier = info['multiplier']
+    verdict = _verdict(multiplier)
+    types = '/'.join(t.title() for t in info['defender_types'])
+    defender_label = types if info['defender'] == '/'.join(info['defender_types']) else f"{_title(info['defender'])} ({types})"
+    return f"Ataques do tipo {attack_type.title()} contra {defender_label}: {verdict}, {_format_multiplier(multiplier)}."
+
+
+def _answer_offense(pokemon, defender_type):
+    # Os tipos do Pokémon atacando um tipo: "charizard é forte contra água?".
+    info = get_pokemon_stats(pokemon)
+    if 'error' in info:
+        return None
+    lines = [f"{_title(info['name'])} ({'/'.join(t.title() for t in info['types'])}) contra {defender_type.title()}:"]
+    for attack_type in info['types']:
+        multiplier = get_type_effectiveness(attack_type, defender_type)['multiplier']
+        lines.append(f"Ataques do tipo {attack_type.title()}: {_verdict(multiplier)}, {_format_multiplier(multiplier)}.")
+    return '\n'.join(lines)
+
+
+def _route_effectiveness(text, tokens):
+    # Quem vem antes de "contra" ataca e quem vem depois defende; "fraco contra"
+    # inverte (o Pokémon é quem recebe o ataque). Sem "contra", ou com
+    # entidades dos dois tipos do mesmo lado, a direção é ambígua: fica com o
+    # modelo.
+    separator = next((i for i, token in enumerate(tokens) if token in AGAINST_WORDS), None)
+    if separator is None:
+        return None
+    pokemon_before, _, types_before = extract_entities(tokens[:separator])
+    pokemon_after, _, types_after = extract_entities(tokens[separator + 1:])
+
+    if len(types_before) == 1 and not pokemon_before:
+        if len(pokemon_after) == 1 and not types_after:
+            return _answer_effectiveness(types_before[0], pokemon_after[0])
+        if types_after and not pokemon_after:
+            return _answer_effectiveness(types_before[0], '/'.join(types_after[:2]))
+    if len(pokemon_before) == 1 and not types_before and len(types_after) == 1 and not pokemon_after:
+        if WEAKNESS_WORDS.search(text):
+            return _answer_effectiveness(types_after[0], pokemon_before[0])
+        return _answer_offense(pokemon_before[0], types_after[0])
+    return None
+
+
+def _answer_learners(move, pokemon_type=None):
+    info = find_pokemon_learning_move(move, pokemon_type)
+    label = f" do tipo {pokemon_type.title()}" if pokemon_type else ''
+    if not info['total']:
+        return f"Nenhum Pokémon{label} aprende {_title(move)}."
+    names = ', '.join(_title(n) for n in info['pokemon'])
+    more = f" e mais {info['total'] - len(info['pokemon'])}" if info['total'] > len(info['pokemon']) else ''
+    return f"{info['total']} Pokémon{label} aprendem {_title(move)}: {names}{more}."
+
+
+def _answer_learns(pokemon, move):
+    data = load_battle_data()
+    index = data.pokemon_index(pokemon)
+    learns = move in get_pokemon_move_names(int(data.pokemon_ids[index]))
+    return f"{_title(data.pokemon_names[index])} {'aprende' if learns else 'não aprende'} {_title(move)}."
+
+
+def _answer_learnset(pokemon, move_type=None):
+    info = get_pokemon_learnset(pokemon, move_type)
+    if 'error' in info:
+        return None
+    moves = ', '.join(
+        f"{_title(m['name'])} ({m['power']})" if m['power'] else _title(m['name']) for m in info['moves']
+    )
+    more = f" e mais {info['total'] - len(info['moves'])}" if info['total'] > len(info['moves']) else ''
+    label = f" do tipo {move_type.title()}" if move_type else ''
+    return f"{_title(info['name'])} aprende {info['total']} ataques{label}: {moves}{more}."
+
+
+def _answer_move(move):
+    info = get_move_info(move)
+    if 'error' in info:
+        return None
+    lines = [
+        f"{_title(info['name'])} ({', '.join(v.title() for v in (info['type'], info['damage_class']) if v)})",
+        f"Poder: {info['power'] or '—'} | Precisão: {info['accuracy'] or '—'} | PP: {info['pp'] or '—'}",
+    ]
+    if info['effect']:
+        lines.append(info['effect'])
+    return '\n'.join(lines)
+
+
+def extract_entities(tokens):
+    # (pokemon, ataques, tipos) citados numa lista de tokens normalizados.
+    pokemon_names, move_names = _vocabulary()
+    return _find_entities(tokens, pokemon_names), _find_entities(tokens, move_names), _find_types(tokens)
+
+
+def route(prompt):
+    # Devolve a resposta pronta (texto) ou None para seguir para o Gemini.
+    text = normalize(prompt)
+    tokens = text.split()
+    if not tokens or len(tokens) > MAX_WORDS or ADVICE_WORDS.search(text):
+        return None
+
+    pokemon, moves, types = extract_entities(tokens)
+
+    if LEARNERS_WORDS.search(text) and moves and not pokemon:
+        return _answer_learners(moves[0], types[0] if types else None)
+    if LEARNS_WORDS.search(text) and moves and pokemon:
+        return _answer_learns(pokemon[-1], moves[0])
+    if EFFECTIVENESS_WORDS.search(text) and types and (pokemon or len(types) >= 2):
+        return _route_effectiveness(text, tokens)
+    if WEAKNESS_WORDS.search(text) and pokemon:
+        return _answer_weaknesses(pokemon[-1])
+    if STATS_WORDS.search(text) and pokemon:
+        return _answer_stats(pokemon[-1])
+    if LEARNSET_WORDS.search(text) and pokemon and not moves:
+        return _answer_learnset(pokemon[-1], types[0] if types else None)
+    if MOVE_WORDS.search(text) and moves and not pokemon:
+        return _answer_move(moves[0])
+    return None
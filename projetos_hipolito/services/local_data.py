@@ -0,0 +1,161 @@
+import json
+import sqlite3
+
+from services.database import get_connection
+
+ARTWORK_URL = "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/other/official-artwork/{id}.png"
+ARTWORK_SHINY_URL = "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/other/official-artwork/shiny/{id}.png"
+SPRITE_SHINY_URL = "https://raw.githubusercontent.com/PokeAPI/sprites/master/sprites/pokemon/shiny/{id}.png"
+
+# Versões das respostas da PokeAPI montadas a partir de pokemons.db. Usadas
+# quando a PokeAPI está fora do ar (ou o circuit breaker está aberto) e no
+# modo offline. As tabelas de espécie/evolução/sprites só existem depois de
+# rodar a carga (python -m services.ingest); sem elas o resultado é parcial.
+
+
+def _query_one(sql, params):
+    try:
+        with get_connection() as conn:
+            return conn.execute(sql, params).fetchone()
+    except sqlite3.OperationalError:
+        return None
+
+
+def _query_all(sql, params):
+    try:
+        with get_connection() as conn:
+            return conn.execute(sql, params).fetchall()
+    except sqlite3.OperationalError:
+        return []
+
+
+def get_local_pokemon_details(name_or_id):
+    from services.pokeapi import BASE_URL
+
+    key = str(name_or_id).lower().strip()
+    if key.isdigit():
+        row = _query_one("SELECT * FROM pokemons WHERE id = ?", (int(key),))
+    else:
+        row = _query_one("SELECT * FROM pokemons WHERE lower(nome) = ?", (key,))
+    if not row:
+        return None
+
+    pokemon_id = row['id']
+    keys = row.keys()
+    move_names = json.loads(row['moves_aprendiveis']) if row['moves_aprendiveis'] else []
+    abilities = _query_all(
+        "SELECT ability_nome FROM pokemon_abilities WHERE pokemon_id = ? ORDER BY slot", (pokemon_id,)
+    )
+    sprites = _query_one("SELECT * FROM pokemon_sprites WHERE pokemon_id = ?", (pokemon_id,))
+
+    return {
+        'id': pokemon_id,
+        'name': row['nome'].lower(),
+        'height': (row['altura'] if 'altura' in keys else None) or 0,
+        'weight': (row['peso'] if 'peso' in keys else None) or 0,
+        'types': json.loads(row['tipos']) if row['tipos'] else [],
+        'stats': json.loads(row['stats_base']) if row['stats_base'] else {},
+        'abilities': [a['ability_nome'] for a in abilities],
+        'moves': [{'name': name, 'url': f"{BASE_URL}/move/{name}/"} for name in move_names],
+        'sprites': {
+            'front_default': sprites['front_default'] if sprites else row['sprite_url'],
+            'front_shiny': sprites['front_shiny'] if sprites else SPRITE_SHINY_URL.format(id=pokemon_id),
+            'back_default': sprites['back_default'] if sprites else None,
+            'back_shiny': sprites['back_shiny'] if sprites else None,
+            'artwork_default': sprites['artwork_default'] if sprites else ARTWORK_URL.format(id=pokemon_id),
+            'artwork_shiny': sprites['artwork_shiny'] if sprites else ARTWORK_SHINY_URL.format(id=pokemon_id),
+            'dream_world': sprites['dream_world'] if sprites else None
+        }
+    }
+
+
+def get_local_species(name_or_id):
+    from services.pokeapi import BASE_URL
+
+    key = str(name_or_id).lower().strip()
+    if key.isdigit():
+        row = _query_one("SELECT * FROM species WHERE id = ?", (int(key),))
+    else:
+        row = _query_one("SELECT * FROM species WHERE nome = ?", (key,))
+    if not row:
+        return None
+
+    flavor_texts = {
+        r['idioma']: r['texto']
+        for r in _query_all("SELECT idioma, texto FROM species_flavor_texts WHERE species_id = ?", (row['id'],))
+    }
+    varieties = _query_all(
+        "SELECT pokemon_id, pokemon_nome, is_default FROM species_varieties WHERE species_id = ? ORDER BY pokemon_id",
+        (row['id'],)
+    )
+
+    return {
+        'id': row['id'],
+        'name': row['nome'],
+        'flavor_text': flavor_texts.get('pt-BR') or flavor_texts.get('en'),
+        'evolution_chain_url': f"{BASE_URL}/evolution-chain/{row['evolution_chain_id']}/" if row['evolution_chain_id'] else None,
+        'genera': row['genero'],
+        'varieties': [
+            {
+                'is_default': bool(v['is_default']),
+                'pokemon': {'name': v['pokemon_nome'], 'url': f"{BASE_URL}/pokemon/{v['pokemon_id']}/"}
+            }
+            for v in varieties
+        ]
+    }
+
+
+def get_local_evolution_chain(chain_url):
+    from services.pokeapi import BASE_URL
+
+    chain_id = int(chain_url.rstrip('/').split('/')[-1])
+    links = _query_all(
+        "SELECT species_id, species_nome, parent_species_id FROM evolution_chain_links "
+        "WHERE chain_id = ? ORDER BY ordem",
+        (chain_id,)
+    )
+    if not links:
+        return None
+
+    nodes = {}
+    root = None
+    for link in links:
+        node = {
+            'name': link['species_nome'],
+            'url': f"{BASE_URL}/pokemon-species/{link['species_id']}/"
+        }
+        nodes[link['species_id']] = node
+        parent = nodes.get(link['parent_species_id'])
+        if parent is None:
+            root = node
+        else:
+            parent.setdefault('evolves_to', []).append(node)
+    return root
+
+
+def get_local_ability(ability_name):
+    row = _query_one("SELECT nome, curta_descricao FROM abilities_list WHERE nome = ?", (ability_name,))
+    if not row:
+        return None
+    return {
+        'name': row['nome'],
+        'description': row['curta_descricao'] or "Descrição não disponível"
+    }
+
+
+def get_local_move(name_or_id):
+    row = _query_one("SELECT * FROM moves_list WHERE nome = ?", (str(name_or_id),))
+    # Ataques ainda não carregados pela ingestão podem vir sem tipo.
+    if not row or row['tipo'] is None:
+        return None
+    keys = row.keys()
+    return {
+        'id': row['move_id'] if 'move_id' in keys else None,
+        'name': row['nome'],
+        'accuracy': row['accuracy'],
+        'power': row['power'],
+        'pp': row['pp'] if 'pp' in keys else None,
+        'type': row['tipo'],
+        'damage_class': (row['classe_dano'] if 'classe_dano' in keys else None) or ('status' if row['power'] is None else None),
+        'effect': row['descricao_efeito'] or "No description available"
+    }
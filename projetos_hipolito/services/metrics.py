@@ -0,0 +1,128 @@
+import time
+
+from flask import before_render_template, g, request, template_rendered
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# Métricas Prometheus do app, expostas em /metrics:
+#   - latência por rota (regra do Flask, não a URL, para não explodir a
+#     cardinalidade), método e status;
+#   - latência e erros por upstream (host), medidos em protected_call /
+#     protected_stream, por onde passam PokeAPI, Translate e Gemini;
+#   - acertos/faltas dos lru_cache registrados com register_lru_cache, lidos
+#     do cache_info() na hora da coleta;
+#   - tempo de renderização de cada template;
+#   - progresso do aquecimento de cache (services/warmup.py);
+#   - acertos/faltas do cache de páginas (services/page_cache.py) e de
+#     trechos de template (services/fragment_cache.py).
+# O registro é o padrão do prometheus_client, em memória do processo: com o
+# worker gevent do Procfile (-w 1) todas as requisições caem no mesmo
+# registro. Com mais workers seria preciso o modo multiprocess.
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Latência das requisições HTTP por rota.', ['method', 'route', 'status']
+)
+UPSTREAM_LATENCY = Histogram(
+    'upstream_request_duration_seconds', 'Latência das chamadas a serviços externos.', ['host', 'outcome'],
+    buckets=(.025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60)
+)
+UPSTREAM_ERRORS = Counter(
+    'upstream_errors_total', 'Falhas em chamadas a serviços externos.', ['host', 'error']
+)
+TEMPLATE_RENDER = Histogram(
+    'template_render_duration_seconds', 'Tempo de renderização dos templates Jinja.', ['template'],
+    buckets=(.001, .0025, .005, .01, .025, .05, .1, .25, .5, 1)
+)
+
+WARMUP_TASKS = Counter(
+    'warmup_tasks_total', 'Tarefas de aquecimento de cache concluídas.', ['kind', 'outcome']
+)
+WARMUP_PENDING = Gauge('warmup_pending_tasks', 'Tarefas de aquecimento na rodada atual ainda não concluídas.')
+WARMUP_LAST_DURATION = Gauge('warmup_last_duration_seconds', 'Duração da última rodada de aquecimento.')
+WARMUP_LAST_COMPLETED = Gauge('warmup_last_completed_timestamp_seconds', 'Fim da última rodada de aquecimento.')
+
+PAGE_CACHE = Counter(
+    'page_cache_requests_total', 'Consultas ao cache de respostas renderizadas.', ['endpoint', 'result']
+)
+
+FRAGMENT_CACHE = Counter(
+    'fragment_cache_requests_total', 'Consultas ao cache de trechos de template.', ['fragment', 'result']
+)
+
+
+def observe_upstream(host, elapsed, error=None):
+    UPSTREAM_LATENCY.labels(host, 'error' if error else 'ok').observe(elapsed)
+    if error:
+        UPSTREAM_ERRORS.labels(host, type(error).__name__).inc()
+
+
+def count_upstream_error(host, error):
+    # Falhas sem chamada de rede (ex: circuito aberto).
+    UPSTREAM_ERRORS.labels(host, type(error).__name__).inc()
+
+
+class _LruCacheCollector:
+
+    def __init__(self):
+        self.caches = {}
+
+    def register(self, name, func):
+        self.caches[name] = func
+
+    def collect(self):
+        hits = CounterMetricFamily('lru_cache_hits', 'Acertos do lru_cache.', labels=['cache'])
+        misses = CounterMetricFamily('lru_cache_misses', 'Faltas do lru_cache.', labels=['cache'])
+        size = GaugeMetricFamily('lru_cache_size', 'Entradas no lru_cache.', labels=['cache'])
+        maxsize = GaugeMetricFamily('lru_cache_maxsize', 'Capacidade do lru_cache.', labels=['cache'])
+        for name, func in self.caches.items():
+            info = func.cache_info()
+            hits.add_metric([name], info.hits)
+            misses.add_metric([name], info.misses)
+            size.add_metric([name], info.currsize)
+            maxsize.add_metric([name], info.maxsize or 0)
+        yield hits
+        yield misses
+        yield size
+        yield maxsize
+
+
+_lru_caches = _LruCacheCollector()
+REGISTRY.register(_lru_caches)
+
+
+def register_lru_cache(func, name=None):
+    _lru_caches.register(name or f"{func.__module__}.{func.__name__}", func)
+    return func
+
+
+def _start_request():
+    g._metrics_start = time.perf_counter()
+
+
+def _finish_request(response):
+    start = g.pop('_metrics_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.labels(request.method, route, response.status_code).observe(time.perf_counter() - start)
+    return response
+
+
+def _start_template(sender, template, context, **extra):
+    g.setdefault('_template_starts', []).append(time.perf_counter())
+
+
+def _finish_template(sender, template, context, **extra):
+    starts = g.get('_template_starts')
+    if starts:
+        TEMPLATE_RENDER.labels(template.name or 'string').observe(time.perf_counter() - starts.pop())
+
+
+def init_app(app):
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    before_render_template.connect(_start_template, app)
+    template_rendered.connect(_finish_template, app)
+
+
+def metrics_response():
+    return generate_latest(REGISTRY), 200, {'Content-Type': CONTENT_TYPE_LATEST}
@@ -0,0 +1,32 @@
+import argparse
+
+from services.catalog import create_indexes
+from services.database import POKEMONS_DB_PATH, get_connection
+from services.move_store import add_move_columns
+from services.pokemon_store import create_pokemon_tables
+
+# Migrações de pokemons.db. O app só lê o banco (que está no git): índices e
+# tabelas novas são criados aqui, de forma explícita, e pela carga
+# (python -m services.ingest, que chama migrate antes de gravar).
+#
+#   python -m services.migrate
+#   python -m services.migrate --db /caminho/para/pokemons.db
+
+
+def migrate(conn):
+    create_indexes(conn)
+    add_move_columns(conn)
+    create_pokemon_tables(conn)
+    conn.commit()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Aplica as migrações de pokemons.db.")
+    parser.add_argument('--db', default=POKEMONS_DB_PATH, help="Banco a migrar.")
+    args = parser.parse_args()
+    conn = get_connection(args.db)
+    try:
+        migrate(conn)
+    finally:
+        conn.close()
+    print(f"{args.db}: migrações aplicadas.")
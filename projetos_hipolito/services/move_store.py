@@ -0,0 +1,131 @@
+import json
+import sqlite3
+import threading
+import time
+
+from services.battle_engine import PHYSICAL_TYPES
+from services.database import CACHE_DB_PATH, get_connection
+
+# Colunas que a PokeAPI tem e que o moves_list original não tinha. São criadas
+# por services.migrate / services.ingest (o app não altera pokemons.db); num
+# banco sem elas, ou com elas vazias, a classe de dano é deduzida como em
+# battle_engine (sem poder = status; senão físico/especial pelo tipo) e o PP
+# fica vazio. Ataques buscados na PokeAPI em tempo de execução ficam na
+# tabela fetched_moves do banco de cache.
+EXTRA_COLUMNS = {
+    'move_id': 'INTEGER',
+    'classe_dano': 'TEXT',
+    'pp': 'INTEGER',
+}
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+
+def add_move_columns(conn):
+    existing = {row['name'] for row in conn.execute("PRAGMA table_info(moves_list)")}
+    for column, column_type in EXTRA_COLUMNS.items():
+        if column not in existing:
+            conn.execute(f"ALTER TABLE moves_list ADD COLUMN {column} {column_type}")
+
+
+def _connect_cache():
+    global _schema_ready
+    conn = get_connection(CACHE_DB_PATH)
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS fetched_moves (
+                        nome TEXT PRIMARY KEY,
+                        move_id INTEGER,
+                        tipo TEXT,
+                        power INTEGER,
+                        accuracy INTEGER,
+                        pp INTEGER,
+                        classe_dano TEXT,
+                        descricao_efeito TEXT,
+                        fetched_at REAL NOT NULL
+                    )
+                """)
+                _schema_ready = True
+    return conn
+
+
+def _damage_class(row):
+    if row['power'] is None:
+        return 'status'
+    return 'physical' if row['tipo'] in PHYSICAL_TYPES else 'special'
+
+
+def _row_to_move(row):
+    keys = row.keys()
+    return {
+        'id': row['move_id'] if 'move_id' in keys else None,
+        'name': row['nome'],
+        'accuracy': row['accuracy'],
+        'power': row['power'],
+        'pp': row['pp'] if 'pp' in keys else None,
+        'type': row['tipo'],
+        'damage_class': (row['classe_dano'] if 'classe_dano' in keys else None) or _damage_class(row),
+        'effect': row['descricao_efeito'] or "No description available",
+    }
+
+
+def _select_moves(conn, table, names, moves):
+    # Limite de variáveis do SQLite: consulta em blocos.
+    for start in range(0, len(names), 500):
+        chunk = names[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(
+            f"SELECT * FROM {table} WHERE nome IN ({placeholders}) AND tipo IS NOT NULL",
+            chunk
+        ).fetchall()
+        for row in rows:
+            moves[row['nome']] = _row_to_move(row)
+
+
+def get_local_moves(move_names):
+    # pokemons.db e depois o que foi salvo por save_moves.
+    if not move_names:
+        return {}
+
+    moves = {}
+    names = list(dict.fromkeys(move_names))
+    with get_connection() as conn:
+        _select_moves(conn, 'moves_list', names, moves)
+
+    missing = [name for name in names if name not in moves]
+    if missing:
+        try:
+            with _connect_cache() as conn:
+                _select_moves(conn, 'fetched_moves', missing, moves)
+        except sqlite3.Error as e:
+            print(f"Erro ao ler ataques do banco de cache: {e}")
+    return moves
+
+
+def save_moves(moves):
+    if not moves:
+        return
+    now = time.time()
+    try:
+        with _connect_cache() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO fetched_moves "
+                "(nome, move_id, tipo, power, accuracy, pp, classe_dano, descricao_efeito, fetched_at) "
+                "VALUES (:name, :id, :type, :power, :accuracy, :pp, :damage_class, :effect, :fetched_at)",
+                [dict(move, fetched_at=now) for move in moves]
+            )
+    except sqlite3.Error as e:
+        print(f"Erro ao salvar ataques no banco de cache: {e}")
+
+
+def get_learnable_move_names(pokemon_id):
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT moves_aprendiveis FROM pokemons WHERE id = ?", (pokemon_id,)
+        ).fetchone()
+    if not row or not row['moves_aprendiveis']:
+        return []
+    return json.loads(row['moves_aprendiveis'])
@@ -0,0 +1,144 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache, wraps
+
+from flask import Response, current_app, request
+
+from services.database import POKEMONS_DB_PATH
+from services.metrics import PAGE_CACHE
+
+# Cache HTTP das páginas e rotas de API que quase nunca mudam (/pokedex,
+# /pokemon/<id>, /api/move/<nome>, /api/z_moves_generic).
+#
+# @cached(): a resposta renderizada fica num LRU em memória, chaveado por
+# (rota, caminho, query string), com limite de entradas e de bytes e TTL (as
+# traduções que falharam numa renderização podem dar certo na próxima). Cada
+# entrada tem um ETag forte (hash da versão dos dados + corpo), então um
+# If-None-Match igual recebe 304 sem renderizar nada, e Cache-Control deixa
+# navegador e CDN guardarem a resposta por MAX_AGE.
+#
+# A versão dos dados vem de DATA_VERSION, ou de um hash do estado de
+# pokemons.db e dos templates quando o processo sobe: uma nova carga do banco
+# ou um deploy muda a versão e invalida os ETags antigos.
+
+MAX_ENTRIES = 500
+MAX_BYTES = 32 * 1024 * 1024
+TTL = 60 * 60
+MAX_AGE = 300
+STALE_WHILE_REVALIDATE = 3600
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates')
+
+
+@lru_cache(maxsize=1)
+def data_version():
+    version = os.getenv("DATA_VERSION")
+    if version:
+        return version
+    digest = hashlib.sha1()
+    paths = [POKEMONS_DB_PATH] + sorted(
+        os.path.join(TEMPLATES_DIR, name) for name in os.listdir(TEMPLATES_DIR)
+    )
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        digest.update(f"{os.path.basename(path)}:{stat.st_mtime_ns}:{stat.st_size};".encode())
+    return digest.hexdigest()[:12]
+
+
+class _Entry:
+    __slots__ = ('body', 'content_type', 'etag', 'created_at')
+
+    def __init__(self, body, content_type, etag):
+        self.body = body
+        self.content_type = content_type
+        self.etag = etag
+        self.created_at = time.monotonic()
+
+
+class PageCache:
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES, ttl=TTL):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.bytes = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.monotonic() - entry.created_at > self.ttl:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        if len(entry.body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self.bytes += len(entry.body)
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.bytes -= len(entry.body)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.bytes}
+
+
+page_cache = PageCache()
+
+
+def _etag(body):
+    return hashlib.sha1(data_version().encode() + body).hexdigest()[:20]
+
+
+def _serve(entry, max_age):
+    response = Response(entry.body, content_type=entry.content_type)
+    response.set_etag(entry.etag)
+    response.headers['Cache-Control'] = f"public, max-age={max_age}, stale-while-revalidate={STALE_WHILE_REVALIDATE}"
+    return response.make_conditional(request)
+
+
+def cached(max_age=MAX_AGE):
+    # Só respostas 200 completas entram no cache; erros e streams passam direto.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = (request.endpoint, request.path, tuple(sorted(request.args.items(multi=True))))
+            entry = page_cache.get(key)
+            if entry is not None:
+                PAGE_CACHE.labels(request.endpoint, 'hit').inc()
+                return _serve(entry, max_age)
+
+            PAGE_CACHE.labels(request.endpoint, 'miss').inc()
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            body = response.get_data()
+            entry = _Entry(body, response.content_type, _etag(body))
+            page_cache.put(key, entry)
+            return _serve(entry, max_age)
+        return wrapper
+    return decorator
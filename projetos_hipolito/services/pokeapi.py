@@ -1,122 +1,157 @@
 import os
 from flask import app, json, jsonify, request
 import requests
-from functools import lru_cache
+from functools import lru_cache, wraps
 from concurrent.futures import ThreadPoolExecutor, as_completed 
+from services.cache import get_json
+from services.metrics import register_lru_cache
+from services.local_data import (
+    get_local_ability,
+    get_local_evolution_chain,
+    get_local_move,
+    get_local_pokemon_details,
+    get_local_species,
+)
+from services.singleflight import single_flight
 
-BASE_URL = "https://pokeapi.co/api/v2"
+# POKEAPI_BASE_URL aponta para outra instância (ex: o mock de
+# benchmarks/mock_upstream.py em testes de carga).
+BASE_URL = os.getenv("POKEAPI_BASE_URL", "https://pokeapi.co/api/v2").rstrip('/')
 
+# Com POKEAPI_OFFLINE=1 nenhuma chamada sai para a PokeAPI: tudo vem de pokemons.db
+# (preenchido com python -m services.ingest).
+OFFLINE = os.getenv("POKEAPI_OFFLINE") == "1"
+
+MAX_CONCURRENT_REQUESTS = 20 
+
+def upstream_fallback(local_func=None, default=None):
+    # Fica por fora do lru_cache: falhas não são cacheadas, e quando a PokeAPI
+    # está fora (ou o circuit breaker abriu) responde com os dados de pokemons.db.
+    def decorator(func):
+        @wraps(func)
+        def fallback(*args):
+            if local_func:
+                local_data = local_func(*args)
+                if local_data is not None:
+                    return local_data
+            return default(*args) if callable(default) else default
+
+        @wraps(func)
+        def wrapper(*args):
+            if OFFLINE:
+                return fallback(*args)
+            try:
+                return func(*args)
+            except requests.RequestException as e:
+                print(f"Erro em {func.__name__}{args}: {e}")
+                return fallback(*args)
+
+        wrapper.cache_info = func.cache_info
+        wrapper.cache_clear = func.cache_clear
+        return wrapper
+    return decorator
+
+@upstream_fallback()
 @lru_cache(maxsize=1500)
+@single_flight
 def get_pokemon_list(limit=20, offset=0):
-    try:
-        url = f"{BASE_URL}/pokemon?limit={limit}&offset={offset}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        print(f"Erro: {e}")
-        return None
+    url = f"{BASE_URL}/pokemon?limit={limit}&offset={offset}"
+    return get_json(url)
 
+@upstream_fallback()
 @lru_cache(maxsize=600)
+@single_flight
 def get_all_pokemon():
-    try:
-        url = f"{BASE_URL}/pokemon?limit=1"
-        response = requests.get(url)
-        response.raise_for_status()
-        total_count = response.json()['count']
-        
-        url = f"{BASE_URL}/pokemon?limit={total_count}"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as e:
-        print(f"Erro: {e}")
-        return None
+    url = f"{BASE_URL}/pokemon?limit=1"
+    total_count = get_json(url)['count']
+    
+    url = f"{BASE_URL}/pokemon?limit={total_count}"
+    return get_json(url)
 
+@upstream_fallback(get_local_pokemon_details)
 @lru_cache(maxsize=1000)
+@single_flight
 def get_pokemon_details(name_or_id):
-    try:
-        url = f"{BASE_URL}/pokemon/{name_or_id}/"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        
+    url = f"{BASE_URL}/pokemon/{name_or_id}/"
+    data = get_json(url)
+    
 
-        moves_list = [{'name': m['move']['name'], 'url': m['move']['url']} 
-             for m in data.get('moves', [])]
-        
-        parsed_data = {
-            'id': data['id'],
-            'name': data['name'],
-            'height': data['height'],
-            'weight': data['weight'],
-            'types': [t['type']['name'] for t in data['types']],
-            'stats': {s['stat']['name']: s['base_stat'] for s in data['stats']},
-            'abilities': [a['ability']['name'] for a in data['abilities']],
-            'moves': moves_list, 
-            'sprites': {
-                'front_default': data['sprites']['front_default'],
-                'front_shiny': data['sprites']['front_shiny'],
-                'back_default': data['sprites']['back_default'],
-                'back_shiny': data['sprites']['back_shiny'],
-                'artwork_default': data['sprites']['other']['official-artwork']['front_default'],
-                'artwork_shiny': data['sprites']['other']['official-artwork']['front_shiny'],
-                'dream_world': data['sprites']['other']['dream_world']['front_default']
-            }
+    moves_list = [{'name': m['move']['name'], 'url': m['move']['url']} 
+         for m in data.get('moves', [])]
+    
+    parsed_data = {
+        'id': data['id'],
+        'name': data['name'],
+        'height': data['height'],
+        'weight': data['weight'],
+        'types': [t['type']['name'] for t in data['types']],
+        'stats': {s['stat']['name']: s['base_stat'] for s in data['stats']},
+        'abilities': [a['ability']['name'] for a in data['abilities']],
+        'moves': moves_list, 
+        'sprites': {
+            'front_default': data['sprites']['front_default'],
+            'front_shiny': data['sprites']['front_shiny'],
+            'back_default': data['sprites']['back_default'],
+            'back_shiny': data['sprites']['back_shiny'],
+            'artwork_default': data['sprites']['other']['official-artwork']['front_default'],
+            'artwork_shiny': data['sprites']['other']['official-artwork']['front_shiny'],
+            'dream_world': data['sprites']['other']['dream_world']['front_default']
         }
-        return parsed_data
-    except requests.RequestException as e:
-        print(f"Erro ao buscar detalhes do Pokémon {name_or_id}: {e}")
-        return None
+    }
+    return parsed_data
 
+@upstream_fallback(get_local_species)
 @lru_cache(maxsize=800)
+@single_flight
 def get_pokemon_species(name_or_id):
-    try:
-        url = f"{BASE_URL}/pokemon-species/{name_or_id}/"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        
-        flavor_text = None
+    url = f"{BASE_URL}/pokemon-species/{name_or_id}/"
+    data = get_json(url)
+    
+    flavor_text = None
+    for entry in data['flavor_text_entries']:
+        if entry['language']['name'] == 'pt-BR':
+            flavor_text = entry['flavor_text'].replace('\n', ' ').replace('\f', ' ')
+            break
+    
+    if not flavor_text:
         for entry in data['flavor_text_entries']:
-            if entry['language']['name'] == 'pt-BR':
+            if entry['language']['name'] == 'en':
                 flavor_text = entry['flavor_text'].replace('\n', ' ').replace('\f', ' ')
                 break
-        
-        if not flavor_text:
-            for entry in data['flavor_text_entries']:
-                if entry['language']['name'] == 'en':
-                    flavor_text = entry['flavor_text'].replace('\n', ' ').replace('\f', ' ')
-                    break
-        
-        parsed_data = {
-            'id': data['id'],
-            'name': data['name'],
-            'flavor_text': flavor_text,
-            'evolution_chain_url': data['evolution_chain']['url'] if data.get('evolution_chain') else None,
-            'genera': next((g['genus'] for g in data['genera'] if g['language']['name'] == 'pt-BR'), 
-                             next((g['genus'] for g in data['genera'] if g['language']['name'] == 'en'), None)),
-            'varieties': data.get('varieties', [])
-        }
-        return parsed_data
-    except requests.RequestException as e:
-        print(f"Erro: {e}")
-        return None
+    
+    parsed_data = {
+        'id': data['id'],
+        'name': data['name'],
+        'flavor_text': flavor_text,
+        'evolution_chain_url': data['evolution_chain']['url'] if data.get('evolution_chain') else None,
+        'genera': next((g['genus'] for g in data['genera'] if g['language']['name'] == 'pt-BR'), 
+                         next((g['genus'] for g in data['genera'] if g['language']['name'] == 'en'), None)),
+        'varieties': data.get('varieties', [])
+    }
+    return parsed_data
 
 @lru_cache(maxsize=800)
 def get_pokemon_varieties_details(name_or_id):
-    species_data = get_pokemon_species(name_or_id)
+    return get_varieties_from_species(get_pokemon_species(name_or_id))
+
+def get_varieties_from_species(species_data):
     if not species_data or not species_data.get('varieties'):
         return []
 
-    varieties_details = []
     base_name = species_data['name']
+    variety_names = [
+        variety['pokemon']['name']
+        for variety in species_data['varieties']
+        if not variety['is_default']
+    ]
+    if not variety_names:
+        return []
 
-    for variety in species_data['varieties']:
-        if not variety['is_default']:
-            variety_name = variety['pokemon']['name']
-            details = get_pokemon_details(variety_name)
+    varieties_details = []
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        for variety_name, details in zip(variety_names, executor.map(get_pokemon_details, variety_names)):
             if details:
+                details = dict(details)
                 readable_name = variety_name.replace(base_name, '').replace('-', ' ').strip().title()
                 if not readable_name:
                     readable_name = "Alternative Form"
@@ -142,102 +177,86 @@ def get_generic_z_moves_local():
         print(f"❌ ERRO ao decodificar zmoves.json: {e}")
         return []
 
+@upstream_fallback(get_local_evolution_chain)
 @lru_cache(maxsize=800)
+@single_flight
 def get_evolution_chain(chain_url):
-    try:
-        response = requests.get(chain_url)
-        response.raise_for_status()
-        data = response.json()
+    data = get_json(chain_url)
+    
+    def extract_chain(chain_data):
+        current = {
+            'name': chain_data['species']['name'],
+            'url': chain_data['species']['url']
+        }
         
-        def extract_chain(chain_data):
-            current = {
-                'name': chain_data['species']['name'],
-                'url': chain_data['species']['url']
-            }
-            
-            evolutions = []
-            for evolution in chain_data.get('evolves_to', []):
-                evolutions.append(extract_chain(evolution))
-            
-            if evolutions:
-                current['evolves_to'] = evolutions
-            
-            return current
+        evolutions = []
+        for evolution in chain_data.get('evolves_to', []):
+            evolutions.append(extract_chain(evolution))
+        
+        if evolutions:
+            current['evolves_to'] = evolutions
         
-        return extract_chain(data['chain'])
-    except requests.RequestException as e:
-        print(f"Erro: {e}")
-        return None
+        return current
+    
+    return extract_chain(data['chain'])
 
+@upstream_fallback(
+    get_local_ability,
+    default=lambda ability_name: {'name': ability_name, 'description': "Descrição não disponível"}
+)
 @lru_cache(maxsize=800)
+@single_flight
 def get_ability_description(ability_name):
-    try:
-        url = f"{BASE_URL}/ability/{ability_name}/"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        
-        description = None
-        for entry in data.get('effect_entries', []):
-            if entry['language']['name'] == 'en':
-                description = entry['short_effect']
-                break
-        
-        return {
-            'name': data['name'],
-            'description': description or "Descrição não disponível"
-        }
-    except requests.RequestException as e:
-        print(f"Erro: {e}")
-        return {'name': ability_name, 'description': "Descrição não disponível"}
+    url = f"{BASE_URL}/ability/{ability_name}/"
+    data = get_json(url)
+    
+    description = None
+    for entry in data.get('effect_entries', []):
+        if entry['language']['name'] == 'en':
+            description = entry['short_effect']
+            break
+    
+    return {
+        'name': data['name'],
+        'description': description or "Descrição não disponível"
+    }
 
+@upstream_fallback(get_local_move)
 @lru_cache(maxsize=1000)
+@single_flight
 def get_move_details(name_or_id):
-    try:
-        url = f"{BASE_URL}/move/{name_or_id}/"
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        
-        effect = None
-        for entry in data.get('effect_entries', []):
-            if entry['language']['name'] == 'en':
-                effect = entry['short_effect']
-                break
-        
-        parsed_data = {
-            'id': data['id'],
-            'name': data['name'],
-            'accuracy': data['accuracy'],
-            'power': data['power'],
-            'pp': data['pp'],
-            'type': data['type']['name'],
-            'damage_class': data['damage_class']['name'],
-            'effect': effect or "No description available"
-        }
-        return parsed_data
-    except requests.RequestException as e:
-        print(f"Erro: {e}")
-        return None
+    url = f"{BASE_URL}/move/{name_or_id}/"
+    data = get_json(url)
+    
+    effect = None
+    for entry in data.get('effect_entries', []):
+        if entry['language']['name'] == 'en':
+            effect = entry['short_effect']
+            break
+    
+    parsed_data = {
+        'id': data['id'],
+        'name': data['name'],
+        'accuracy': data['accuracy'],
+        'power': data['power'],
+        'pp': data['pp'],
+        'type': data['type']['name'],
+        'damage_class': data['damage_class']['name'],
+        'effect': effect or "No description available"
+    }
+    return parsed_data
 
 
-MAX_CONCURRENT_REQUESTS = 20 
-
 def get_abilities_details_in_parallel(ability_names, translator_func=None):
 
     abilities_with_desc = []
     
     with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
 
-        future_to_ability = {
-            executor.submit(get_ability_description, name): name 
-            for name in ability_names
-        }
-        
-        for future in as_completed(future_to_ability):
-            ability_data = future.result()
+        for ability_data in executor.map(get_ability_description, ability_names):
+            ability_data = dict(ability_data)
             
-            if ability_data and ability_data.get('description') and translator_func:
+            if ability_data.get('description') and translator_func:
                 try:
                     ability_data['description'] = translator_func(ability_data['description'])
                 except Exception:
@@ -247,26 +266,39 @@ def get_abilities_details_in_parallel(ability_names, translator_func=None):
             
     return abilities_with_desc
 
-def get_moves_details_in_parallel(move_list, translator_func=None):
+def _get_move_translated(name, translator_func):
+    move_data = get_move_details(name)
+    
+    if move_data and move_data.get('effect') and translator_func:
+        move_data = dict(move_data)
+        try:
+            move_data['effect'] = translator_func(move_data['effect'])
+        except Exception:
+            pass
+    
+    return move_data
 
-    move_details_list = []
-    move_names = [move['name'] for move in move_list]
+def iter_moves_details_in_parallel(move_list, translator_func=None):
+
+    move_names = [move['name'] if isinstance(move, dict) else move for move in move_list]
     with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
         future_to_move = {
-            executor.submit(get_move_details, name): name 
+            executor.submit(_get_move_translated, name, translator_func): name 
             for name in move_names 
         }
         
         for future in as_completed(future_to_move):
             move_data = future.result()
             
-            if move_data and move_data.get('effect') and translator_func:
-                try:
-                    move_data['effect'] = translator_func(move_data['effect'])
-                except Exception:
-                    pass
-            
             if move_data:
-                move_details_list.append(move_data)
-                
-    return move_details_list
\ No newline at end of file
+                yield move_data
+
+def get_moves_details_in_parallel(move_list, translator_func=None):
+    return list(iter_moves_details_in_parallel(move_list, translator_func))
+
+for _fetcher in (
+    get_pokemon_list, get_all_pokemon, get_pokemon_details, get_pokemon_species,
+    get_pokemon_varieties_details, get_generic_z_moves_local, get_evolution_chain,
+    get_ability_description, get_move_details,
+):
+    register_lru_cache(_fetcher)
@@ -0,0 +1,319 @@
+import json
+from functools import lru_cache
+
+from services.catalog import FORM_ID_START
+from services.database import get_connection
+
+# Versão relacional das colunas JSON de pokemons (tipos, stats_base,
+# moves_aprendiveis). As colunas JSON continuam sendo gravadas para quem lê a
+# linha inteira; filtros ("todos de fogo", "speed > 100", "quem aprende
+# earthquake") usam estas tabelas e seus índices.
+#
+# As tabelas são criadas por services.migrate (e pela carga, services.ingest);
+# o app só lê. Num banco não migrado (o pokemons.db do git) as consultas leem
+# as colunas JSON com json_each/json_extract, sem índice; só o filtro por
+# habilidade precisa das tabelas.
+
+STAT_NAMES = ('hp', 'attack', 'defense', 'special-attack', 'special-defense', 'speed')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pokemon_types (
+    pokemon_id INTEGER NOT NULL REFERENCES pokemons (id) ON DELETE CASCADE,
+    slot INTEGER NOT NULL,
+    tipo TEXT NOT NULL,
+    PRIMARY KEY (pokemon_id, slot)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_pokemon_types_tipo ON pokemon_types (tipo, pokemon_id);
+
+CREATE TABLE IF NOT EXISTS pokemon_stats (
+    pokemon_id INTEGER NOT NULL REFERENCES pokemons (id) ON DELETE CASCADE,
+    stat TEXT NOT NULL,
+    valor INTEGER NOT NULL,
+    PRIMARY KEY (pokemon_id, stat)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_pokemon_stats_valor ON pokemon_stats (stat, valor, pokemon_id);
+
+CREATE TABLE IF NOT EXISTS pokemon_moves (
+    pokemon_id INTEGER NOT NULL REFERENCES pokemons (id) ON DELETE CASCADE,
+    move_nome TEXT NOT NULL,
+    PRIMARY KEY (pokemon_id, move_nome)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_pokemon_moves_move ON pokemon_moves (move_nome, pokemon_id);
+
+CREATE TABLE IF NOT EXISTS pokemon_abilities (
+    pokemon_id INTEGER NOT NULL REFERENCES pokemons (id) ON DELETE CASCADE,
+    slot INTEGER NOT NULL,
+    ability_nome TEXT NOT NULL REFERENCES abilities_list (nome),
+    oculta INTEGER NOT NULL,
+    PRIMARY KEY (pokemon_id, slot)
+);
+CREATE INDEX IF NOT EXISTS idx_pokemon_abilities_nome ON pokemon_abilities (ability_nome);
+"""
+
+# pokemon_abilities foi criada pela carga (services.ingest) antes de existir a
+# chave estrangeira; nesse caso a tabela é recriada com os mesmos dados.
+REBUILD_ABILITIES = """
+BEGIN;
+INSERT OR IGNORE INTO abilities_list (nome) SELECT DISTINCT ability_nome FROM pokemon_abilities;
+CREATE TABLE pokemon_abilities_new (
+    pokemon_id INTEGER NOT NULL REFERENCES pokemons (id) ON DELETE CASCADE,
+    slot INTEGER NOT NULL,
+    ability_nome TEXT NOT NULL REFERENCES abilities_list (nome),
+    oculta INTEGER NOT NULL,
+    PRIMARY KEY (pokemon_id, slot)
+);
+INSERT INTO pokemon_abilities_new SELECT pokemon_id, slot, ability_nome, oculta FROM pokemon_abilities;
+DROP TABLE pokemon_abilities;
+ALTER TABLE pokemon_abilities_new RENAME TO pokemon_abilities;
+COMMIT;
+"""
+
+# Versões antigas ligavam pokemon_moves.move_nome a moves_list com chave
+# estrangeira e criavam linhas só com o nome em moves_list para satisfazê-la.
+# Sem a chave, ataques ainda não baixados ficam só em pokemon_moves.
+REBUILD_MOVES = """
+BEGIN;
+CREATE TABLE pokemon_moves_new (
+    pokemon_id INTEGER NOT NULL REFERENCES pokemons (id) ON DELETE CASCADE,
+    move_nome TEXT NOT NULL,
+    PRIMARY KEY (pokemon_id, move_nome)
+) WITHOUT ROWID;
+INSERT INTO pokemon_moves_new SELECT pokemon_id, move_nome FROM pokemon_moves;
+DROP TABLE pokemon_moves;
+ALTER TABLE pokemon_moves_new RENAME TO pokemon_moves;
+DELETE FROM moves_list WHERE tipo IS NULL AND categoria IS NULL AND power IS NULL
+    AND accuracy IS NULL AND descricao_efeito IS NULL;
+COMMIT;
+"""
+
+TABLES = ('pokemon_types', 'pokemon_stats', 'pokemon_moves', 'pokemon_abilities')
+
+
+def _has_foreign_key(conn, table, parent):
+    return any(row['table'] == parent for row in conn.execute(f"PRAGMA foreign_key_list({table})"))
+
+
+def save_pokemon_relations(conn, pokemon_id, types, stats, moves, abilities=None):
+    # Grava tipos/stats/ataques (e habilidades, se vierem) de um Pokémon,
+    # substituindo o que havia. Habilidades ainda não baixadas entram como
+    # linhas mínimas em abilities_list (chave estrangeira); a fase "ability" da
+    # carga preenche o resto. pokemon_moves não tem chave estrangeira.
+    moves = list(dict.fromkeys(moves))
+    conn.execute("DELETE FROM pokemon_types WHERE pokemon_id = ?", (pokemon_id,))
+    conn.executemany(
+        "INSERT INTO pokemon_types (pokemon_id, slot, tipo) VALUES (?, ?, ?)",
+        [(pokemon_id, slot, tipo) for slot, tipo in enumerate(types, start=1)]
+    )
+    conn.execute("DELETE FROM pokemon_stats WHERE pokemon_id = ?", (pokemon_id,))
+    conn.executemany(
+        "INSERT INTO pokemon_stats (pokemon_id, stat, valor) VALUES (?, ?, ?)",
+        [(pokemon_id, stat, value) for stat, value in stats.items() if value is not None]
+    )
+    conn.execute("DELETE FROM pokemon_moves WHERE pokemon_id = ?", (pokemon_id,))
+    conn.executemany(
+        "INSERT INTO pokemon_moves (pokemon_id, move_nome) VALUES (?, ?)",
+        [(pokemon_id, name) for name in moves]
+    )
+    if abilities is not None:
+        # abilities: [(slot, nome, ability_id, oculta)]
+        conn.executemany(
+            "INSERT OR IGNORE INTO abilities_list (id, nome) VALUES (?, ?)",
+            [(ability_id, name) for _, name, ability_id, _ in abilities]
+        )
+        conn.execute("DELETE FROM pokemon_abilities WHERE pokemon_id = ?", (pokemon_id,))
+        conn.executemany(
+            "INSERT INTO pokemon_abilities (pokemon_id, slot, ability_nome, oculta) VALUES (?, ?, ?, ?)",
+            [(pokemon_id, slot, name, int(hidden)) for slot, name, _, hidden in abilities]
+        )
+
+
+def _backfill(conn):
+    # Só os Pokémon que ainda não estão nas tabelas novas (o banco original ou
+    # linhas inseridas por fora da carga).
+    rows = conn.execute(
+        "SELECT id, tipos, stats_base, moves_aprendiveis FROM pokemons "
+        "WHERE id NOT IN (SELECT pokemon_id FROM pokemon_stats)"
+    ).fetchall()
+    for row in rows:
+        save_pokemon_relations(
+            conn,
+            row['id'],
+            json.loads(row['tipos']) if row['tipos'] else [],
+            json.loads(row['stats_base']) if row['stats_base'] else {},
+            json.loads(row['moves_aprendiveis']) if row['moves_aprendiveis'] else []
+        )
+    return len(rows)
+
+
+def create_pokemon_tables(conn):
+    # Chamado por services.migrate.
+    conn.executescript(SCHEMA)
+    if not _has_foreign_key(conn, 'pokemon_abilities', 'abilities_list'):
+        conn.executescript(REBUILD_ABILITIES + SCHEMA)
+    if _has_foreign_key(conn, 'pokemon_moves', 'moves_list'):
+        conn.executescript(REBUILD_MOVES + SCHEMA)
+    migrated = _backfill(conn)
+    if migrated:
+        print(f"pokemons.db: {migrated} Pokémon migrados para as tabelas relacionais.")
+    has_pokemon_tables.cache_clear()
+    return migrated
+
+
+@lru_cache(maxsize=1)
+def has_pokemon_tables():
+    with get_connection() as conn:
+        existing = {row['name'] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if not set(TABLES) <= existing:
+        print("Aviso: pokemons.db sem as tabelas relacionais (lendo as colunas JSON); rode python -m services.migrate.")
+        return False
+    return True
+
+
+# --- consultas -----------------------------------------------------------------
+
+def find_pokemon(types=None, min_stats=None, max_stats=None, learns=None, ability=None,
+                 generation=None, include_forms=False, limit=None):
+    # Todos os filtros são combinados (AND). types: Pokémon que têm todos os
+    # tipos indicados. min_stats/max_stats: {'speed': 100}. learns: um ou mais
+    # ataques, todos precisam ser aprendíveis.
+    migrated = has_pokemon_tables()
+    if ability and not migrated:
+        return []
+
+    conditions = []
+    params = []
+
+    for tipo in types or ():
+        conditions.append(
+            "p.id IN (SELECT pokemon_id FROM pokemon_types WHERE tipo = ?)" if migrated
+            else "EXISTS (SELECT 1 FROM json_each(p.tipos) WHERE value = ?)"
+        )
+        params.append(tipo.lower())
+
+    for bounds, operator in ((min_stats, '>='), (max_stats, '<=')):
+        for stat, value in (bounds or {}).items():
+            if stat not in STAT_NAMES:
+                raise ValueError(f"Stat desconhecido: {stat}")
+            if migrated:
+                conditions.append(f"p.id IN (SELECT pokemon_id FROM pokemon_stats WHERE stat = ? AND valor {operator} ?)")
+                params.extend((stat, value))
+            else:
+                conditions.append(f"json_extract(p.stats_base, '$.\"{stat}\"') {operator} ?")
+                params.append(value)
+
+    if isinstance(learns, str):
+        learns = [learns]
+    for move_name in learns or ():
+        conditions.append(
+            "p.id IN (SELECT pokemon_id FROM pokemon_moves WHERE move_nome = ?)" if migrated
+            else "EXISTS (SELECT 1 FROM json_each(p.moves_aprendiveis) WHERE value = ?)"
+        )
+        params.append(move_name.lower())
+
+    if ability:
+        conditions.append("p.id IN (SELECT pokemon_id FROM pokemon_abilities WHERE ability_nome = ?)")
+        params.append(ability.lower())
+
+    if generation is not None:
+        conditions.append("p.geracao = ?")
+        params.append(generation)
+
+    if not include_forms:
+        conditions.append("p.id < ?")
+        params.append(FORM_ID_START)
+
+    sql = "SELECT p.id, p.nome FROM pokemons p"
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY p.id"
+    if limit:
+        sql += " LIMIT ?"
+        params.append(limit)
+
+    with get_connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [{'id': row['id'], 'name': row['nome'].lower()} for row in rows]
+
+
+def get_pokemon_by_type(tipo, limit=None):
+    return find_pokemon(types=[tipo], limit=limit)
+
+
+def get_pokemon_by_stat(stat, min_value=None, max_value=None, limit=None):
+    return find_pokemon(
+        min_stats={stat: min_value} if min_value is not None else None,
+        max_stats={stat: max_value} if max_value is not None else None,
+        limit=limit
+    )
+
+
+def get_pokemon_learning_move(move_name, limit=None):
+    return find_pokemon(learns=[move_name], limit=limit)
+
+
+def get_pokemon_with_ability(ability_name, limit=None):
+    return find_pokemon(ability=ability_name, limit=limit)
+
+
+def _json_column(pokemon_id, column, default):
+    with get_connection() as conn:
+        row = conn.execute(f"SELECT {column} FROM pokemons WHERE id = ?", (pokemon_id,)).fetchone()
+    return json.loads(row[column]) if row and row[column] else default
+
+
+def get_pokemon_types(pokemon_id):
+    if not has_pokemon_tables():
+        return _json_column(pokemon_id, 'tipos', [])
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT tipo FROM pokemon_types WHERE pokemon_id = ? ORDER BY slot", (pokemon_id,)
+        ).fetchall()
+    return [row['tipo'] for row in rows]
+
+
+def get_pokemon_stats(pokemon_id):
+    if not has_pokemon_tables():
+        stats = _json_column(pokemon_id, 'stats_base', {})
+        return {stat: stats[stat] for stat in STAT_NAMES if stats.get(stat) is not None}
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT stat, valor FROM pokemon_stats WHERE pokemon_id = ?", (pokemon_id,)
+        ).fetchall()
+    stats = {row['stat']: row['valor'] for row in rows}
+    return {stat: stats[stat] for stat in STAT_NAMES if stat in stats}
+
+
+def get_pokemon_move_names(pokemon_id):
+    if not has_pokemon_tables():
+        return list(dict.fromkeys(_json_column(pokemon_id, 'moves_aprendiveis', [])))
+    with get_connection() as conn:
+        rows = conn.execute(
+            "SELECT move_nome FROM pokemon_moves WHERE pokemon_id = ?", (pokemon_id,)
+        ).fetchall()
+    return [row['move_nome'] for row in rows]
+
+
+def get_learnset(pokemon_id, move_type=None):
+    # Ataques aprendíveis com os dados de moves_list (os que ainda não estão
+    # lá vêm sem tipo/poder e ficam de fora quando há filtro por tipo).
+    if has_pokemon_tables():
+        sql = (
+            "SELECT pm.move_nome AS nome, m.tipo, m.power, m.accuracy FROM pokemon_moves pm "
+            "LEFT JOIN moves_list m ON m.nome = pm.move_nome WHERE pm.pokemon_id = ?"
+        )
+    else:
+        sql = (
+            "SELECT DISTINCT j.value AS nome, m.tipo, m.power, m.accuracy FROM pokemons p "
+            "JOIN json_each(p.moves_aprendiveis) j LEFT JOIN moves_list m ON m.nome = j.value WHERE p.id = ?"
+        )
+    params = [pokemon_id]
+    if move_type:
+        sql += " AND m.tipo = ?"
+        params.append(move_type.lower())
+    sql += " ORDER BY m.power IS NULL, m.power DESC, nome"
+    with get_connection() as conn:
+        rows = conn.execute(sql, params).fetchall()
+    return [
+        {'name': row['nome'], 'type': row['tipo'], 'power': row['power'], 'accuracy': row['accuracy']}
+        for row in rows
+    ]
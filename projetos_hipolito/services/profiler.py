@@ -0,0 +1,257 @@
+import hmac
+import json
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from collections import Counter
+
+import greenlet
+from flask import g, request
+from gevent.monkey import get_original
+
+from services.database import DB_DIR
+
+# Profiler por amostragem, ligado só quando PROFILER_ENABLED=1.
+#
+# Uma requisição é perfilada se mandar o header X-Profile ou o parâmetro
+# ?profile= com o valor de PROFILER_TOKEN, ou por sorteio com probabilidade
+# PROFILER_SAMPLE_RATE (ex: 0.01 = 1%). Os perfis têm caminhos absolutos de
+# arquivos do servidor: sem PROFILER_TOKEN, o header e /admin/profiles ficam
+# desligados e só o sorteio funciona.
+#
+# Uma thread de verdade (não um greenlet: precisa rodar enquanto o loop do
+# gevent está ocupado) olha a pilha do greenlet da requisição a cada
+# SAMPLE_INTERVAL. Se o greenlet está rodando, a pilha vem da thread; se está
+# suspenso (esperando PokeAPI, Translate, Gemini...), vem de gr_frame e a
+# amostra ganha um quadro "[esperando]" no topo. Assim o flame graph separa
+# tempo de CPU (calculate_stats_range, Jinja) de espera por upstream.
+#
+# Cada perfil vira dois arquivos em PROFILE_DIR: .speedscope.json (abre em
+# https://www.speedscope.app) e .folded (pilhas colapsadas, para
+# flamegraph.pl). /admin/profiles lista os mais recentes; a lista e os
+# arquivos pedem o token no header X-Profile ou em ?token=.
+
+ENABLED = os.getenv("PROFILER_ENABLED") == "1"
+TOKEN = os.getenv("PROFILER_TOKEN")
+SAMPLE_RATE = float(os.getenv("PROFILER_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", os.path.join(DB_DIR, 'profiles'))
+
+SAMPLE_INTERVAL = 0.002
+MAX_STACK_DEPTH = 200
+MAX_PROFILES = 200
+WAITING_FRAME = ('[esperando]', '', 0)
+
+_start_thread = get_original('_thread', 'start_new_thread')
+_thread_ident = get_original('_thread', 'get_ident')
+_sleep = get_original('time', 'sleep')
+
+
+def _stack(frame):
+    # -> [(função, arquivo, linha), ...] da raiz para o topo.
+    stack = []
+    while frame is not None and len(stack) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    return stack[::-1]
+
+
+class GreenletSampler:
+
+    def __init__(self, target=None, interval=SAMPLE_INTERVAL):
+        self.target = target or greenlet.getcurrent()
+        self.thread_id = _thread_ident()
+        self.interval = interval
+        self.samples = Counter()
+        self.weights = Counter()
+        self.running = False
+        self.started_at = None
+        self.elapsed = 0.0
+
+    def start(self):
+        self.running = True
+        self.started_at = time.perf_counter()
+        _start_thread(self._loop, ())
+
+    def stop(self):
+        self.running = False
+        self.elapsed = time.perf_counter() - self.started_at
+        return self
+
+    def _loop(self):
+        # O intervalo real varia (a thread disputa o GIL com o loop do
+        # gevent), então cada amostra pesa o tempo desde a anterior.
+        last = self.started_at
+        while self.running:
+            now = time.perf_counter()
+            self._sample((now - last) * 1000)
+            last = now
+            _sleep(self.interval)
+
+    def _sample(self, weight_ms):
+        target = self.target
+        if target.dead:
+            self.running = False
+            return
+        frame = target.gr_frame
+        if frame is not None:
+            stack = _stack(frame)
+            stack.append(WAITING_FRAME)
+        else:
+            # gr_frame é None enquanto o greenlet roda: a pilha está na thread.
+            frame = sys._current_frames().get(self.thread_id)
+            stack = _stack(frame)
+        if stack:
+            self.samples[tuple(stack)] += 1
+            self.weights[tuple(stack)] += weight_ms
+
+    def collapsed(self):
+        lines = []
+        for stack, count in self.samples.most_common():
+            lines.append(f"{';'.join(name for name, _, _ in stack)} {count}")
+        return '\n'.join(lines) + '\n'
+
+    def speedscope(self, name):
+        frames = []
+        index = {}
+        samples = []
+        weights = []
+        for stack, weight in self.weights.items():
+            ids = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    fn, path, line = frame
+                    frames.append({'name': fn, 'file': path, 'line': line} if path else {'name': fn})
+                ids.append(index[frame])
+            samples.append(ids)
+            weights.append(round(weight, 3))
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'name': name,
+            'exporter': 'pokebattle-profiler',
+            'shared': {'frames': frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'milliseconds',
+                'startValue': 0,
+                'endValue': round(sum(weights), 3),
+                'samples': samples,
+                'weights': weights,
+            }],
+        }
+
+
+def _token_matches(value):
+    return bool(TOKEN) and hmac.compare_digest(value.encode(), TOKEN.encode())
+
+
+def _requested():
+    value = request.headers.get('X-Profile') or request.args.get('profile')
+    if value:
+        return _token_matches(value)
+    return SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE
+
+
+def admin_allowed():
+    return _token_matches(request.headers.get('X-Profile') or request.args.get('token') or '')
+
+
+def _slug(text):
+    return re.sub(r'[^a-zA-Z0-9]+', '-', text).strip('-')[:60] or 'root'
+
+
+def save_profile(sampler, method, path, status):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    name = f"{method} {path} {status}"
+    base = f"{time.strftime('%Y%m%d-%H%M%S')}-{method}-{_slug(path)}-{uuid.uuid4().hex[:6]}"
+    with open(os.path.join(PROFILE_DIR, base + '.speedscope.json'), 'w') as f:
+        data = sampler.speedscope(name)
+        data['elapsed_ms'] = round(sampler.elapsed * 1000, 1)
+        data['sample_count'] = sum(sampler.samples.values())
+        json.dump(data, f)
+    with open(os.path.join(PROFILE_DIR, base + '.folded'), 'w') as f:
+        f.write(sampler.collapsed())
+    _prune()
+    return base
+
+
+def _profile_ids():
+    # Mais recentes primeiro (o nome começa pela data).
+    try:
+        names = os.listdir(PROFILE_DIR)
+    except FileNotFoundError:
+        return []
+    return sorted((n[:-len('.speedscope.json')] for n in names if n.endswith('.speedscope.json')), reverse=True)
+
+
+def _prune():
+    for profile_id in _profile_ids()[MAX_PROFILES:]:
+        for ext in ('.speedscope.json', '.folded'):
+            try:
+                os.remove(os.path.join(PROFILE_DIR, profile_id + ext))
+            except OSError:
+                pass
+
+
+def list_profiles(limit=50):
+    ids = _profile_ids()[:limit]
+
+    profiles = []
+    for profile_id in ids:
+        try:
+            with open(os.path.join(PROFILE_DIR, profile_id + '.speedscope.json')) as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Erro ao ler perfil {profile_id}: {e}")
+            continue
+        profiles.append({
+            'id': profile_id,
+            'name': data.get('name'),
+            'elapsed_ms': data.get('elapsed_ms'),
+            'samples': data.get('sample_count', 0),
+        })
+    return profiles
+
+
+def _start_profile():
+    # O token das rotas /admin/profiles vem no mesmo header: não perfilar elas.
+    if request.endpoint not in ('admin_profiles', 'admin_profile_file') and _requested():
+        g._profiler = GreenletSampler()
+        g._profiler.start()
+
+
+def _finish_profile(response):
+    sampler = g.pop('_profiler', None)
+    if sampler:
+        sampler.stop()
+        try:
+            response.headers['X-Profile-Id'] = save_profile(sampler, request.method, request.path, response.status_code)
+        except OSError as e:
+            print(f"Erro ao salvar perfil: {e}")
+    return response
+
+
+def _abort_profile(exc):
+    # Exceção na view: after_request não roda, mas o perfil ainda interessa.
+    sampler = g.pop('_profiler', None)
+    if sampler:
+        sampler.stop()
+        try:
+            save_profile(sampler, request.method, request.path, 500)
+        except OSError as e:
+            print(f"Erro ao salvar perfil: {e}")
+
+
+def init_app(app):
+    if not ENABLED:
+        return
+    if not TOKEN:
+        print("Profiler: PROFILER_TOKEN não definido; X-Profile e /admin/profiles desligados, só o sorteio.")
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_abort_profile)
@@ -0,0 +1,237 @@
+import math
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from functools import lru_cache
+
+from services.database import CACHE_DB_PATH, get_connection
+from services.intent_router import extract_entities, normalize, type_name
+
+# Cache de respostas do /api/ai_chat. As perguntas se repetem muito ("melhor
+# time pro charizard", "time bom com charizard?"), então antes de chamar o
+# Gemini procuramos uma pergunta parecida já respondida:
+#   - o prompt é normalizado (minúsculo, sem acento/pontuação, sem stopwords);
+#   - só são comparadas perguntas que citam exatamente os mesmos Pokémon,
+#     ataques, tipos e números ("time pro garchomp" nunca reaproveita a
+#     resposta de "time pro gengar", por mais parecido que seja o texto);
+#   - dentro desse grupo, similaridade de cosseno entre vetores TF-IDF das
+#     palavras restantes (sem as entidades) + trigramas de caracteres, que
+#     toleram erro de digitação e plural.
+# As entradas ficam na tabela chat_cache do banco de cache (sobrevive a
+# reinícios), com TTL e despejo LRU.
+
+DAY = 24 * 60 * 60
+
+TTL = 7 * DAY
+MAX_ENTRIES = 2000
+SIMILARITY_THRESHOLD = 0.7
+NGRAM = 3
+
+STOPWORDS = {
+    'a', 'o', 'as', 'os', 'um', 'uma', 'uns', 'umas', 'de', 'do', 'da', 'dos', 'das', 'em', 'no', 'na',
+    'nos', 'nas', 'pra', 'pro', 'para', 'por', 'com', 'e', 'ou', 'que', 'qual', 'quais', 'me', 'eu',
+    'voce', 'vc', 'se', 'ao', 'aos', 'ai', 'oi', 'ola', 'favor', 'poderia', 'pode', 'sobre', 'la',
+    'the', 'an', 'of', 'for', 'to', 'in', 'on', 'with', 'and', 'or', 'is', 'are', 'what', 'which',
+    'i', 'my', 'please', 'can', 'you', 'pokemon', 'pokemons',
+}
+
+
+def canonical(prompt):
+    return ' '.join(t for t in normalize(prompt).split() if t not in STOPWORDS)
+
+
+def split_prompt(key):
+    # (assinatura, palavras de intenção). Duas perguntas só são comparadas se
+    # citam as mesmas entidades; a similaridade usa só o resto das palavras.
+    tokens = key.split()
+    pokemon, moves, types = extract_entities(tokens)
+    numbers = [t for t in tokens if t.isdigit()]
+    entity_words = {part for name in pokemon + moves for part in name.split('-')}
+    words = [t for t in tokens if t not in entity_words and not t.isdigit() and not type_name(t)]
+    return '|'.join(sorted(set(pokemon + moves + types + numbers))), ' '.join(words)
+
+
+def _stem(word):
+    return word[:-1] if len(word) > 3 and word.endswith('s') else word
+
+
+def _features(text):
+    counts = Counter()
+    for word in map(_stem, text.split()):
+        counts['w:' + word] += 1
+        padded = f" {word} "
+        for i in range(len(padded) - NGRAM + 1):
+            counts['c:' + padded[i:i + NGRAM]] += 1
+    return counts
+
+
+class _Entry:
+    __slots__ = ('key', 'signature', 'response', 'created_at', 'features')
+
+    def __init__(self, key, response, created_at):
+        self.key = key
+        self.signature, words = split_prompt(key)
+        self.response = response
+        self.created_at = created_at
+        self.features = _features(words)
+
+
+class ResponseCache:
+
+    def __init__(self, path=CACHE_DB_PATH, ttl=TTL, max_entries=MAX_ENTRIES, threshold=SIMILARITY_THRESHOLD):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        # Ordem de acesso (LRU): o mais antigo fica no início.
+        self._entries = OrderedDict()
+        self._groups = {}
+        self._df = Counter()
+        self.hits = 0
+        self.misses = 0
+
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT prompt_key, response, created_at FROM chat_cache "
+                "WHERE created_at >= ? ORDER BY accessed_at ASC",
+                (time.time() - ttl,)
+            ).fetchall()
+        for row in rows[-max_entries:]:
+            self._add(_Entry(row['prompt_key'], row['response'], row['created_at']))
+
+    def _connect(self):
+        conn = get_connection(self.path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS chat_cache (
+                prompt_key TEXT PRIMARY KEY,
+                signature TEXT NOT NULL,
+                prompt TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        return conn
+
+    def _add(self, entry):
+        old = self._entries.pop(entry.key, None)
+        if old:
+            self._forget(old)
+        self._entries[entry.key] = entry
+        self._groups.setdefault(entry.signature, set()).add(entry.key)
+        self._df.update(entry.features.keys())
+
+    def _forget(self, entry):
+        group = self._groups.get(entry.signature)
+        if group:
+            group.discard(entry.key)
+            if not group:
+                del self._groups[entry.signature]
+        self._df.subtract(entry.features.keys())
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            self._forget(entry)
+        return entry
+
+    def _vector(self, features):
+        total = len(self._entries) + 1
+        vector = {
+            f: (1 + math.log(count)) * (math.log(total / (1 + self._df[f])) + 1)
+            for f, count in features.items()
+        }
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {f: v / norm for f, v in vector.items()}
+
+    def _best_match(self, key):
+        if key in self._entries:
+            return self._entries[key], 1.0
+        sig, words = split_prompt(key)
+        candidates = self._groups.get(sig)
+        if not candidates or not words:
+            return None, 0.0
+        query = self._vector(_features(words))
+        best, best_score = None, 0.0
+        for candidate in candidates:
+            entry = self._entries[candidate]
+            vector = self._vector(entry.features)
+            score = sum(w * vector.get(f, 0.0) for f, w in query.items())
+            if score > best_score:
+                best, best_score = entry, score
+        return best, best_score
+
+    def get(self, prompt):
+        key = canonical(prompt)
+        if not key:
+            return None
+        now = time.time()
+        with self._lock:
+            entry, score = self._best_match(key)
+            if entry and now - entry.created_at > self.ttl:
+                self._remove(entry.key)
+                entry = None
+            if not entry or score < self.threshold:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(entry.key)
+            self.hits += 1
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "UPDATE chat_cache SET accessed_at = ?, hits = hits + 1 WHERE prompt_key = ?",
+                    (now, entry.key)
+                )
+        except sqlite3.Error as e:
+            print(f"Erro ao atualizar cache do chat: {e}")
+        return entry.response
+
+    def put(self, prompt, response):
+        key = canonical(prompt)
+        if not key or not response:
+            return
+        now = time.time()
+        entry = _Entry(key, response, now)
+        with self._lock:
+            self._add(entry)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._remove(next(iter(self._entries))).key)
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO chat_cache "
+                    "(prompt_key, signature, prompt, response, created_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, entry.signature, prompt, response, now, now)
+                )
+                if evicted:
+                    conn.executemany("DELETE FROM chat_cache WHERE prompt_key = ?", [(k,) for k in evicted])
+                conn.execute("DELETE FROM chat_cache WHERE created_at < ?", (now - self.ttl,))
+        except sqlite3.Error as e:
+            print(f"Erro ao gravar cache do chat: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._groups.clear()
+            self._df.clear()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM chat_cache")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+@lru_cache(maxsize=1)
+def get_response_cache():
+    return ResponseCache()
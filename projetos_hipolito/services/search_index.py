@@ -0,0 +1,155 @@
+from bisect import bisect_left
+from collections import defaultdict
+from functools import lru_cache
+
+from services.catalog import get_all_catalog_entries
+
+NGRAM_SIZES = (2, 3)
+FUZZY_MIN_LENGTH = 3
+FUZZY_MAX_DISTANCE = 2
+
+
+def _ngrams(text, n):
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def _deletions(text):
+    return {text[:i] + text[i + 1:] for i in range(len(text))} | {text}
+
+
+def _edit_distance(a, b, max_distance):
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        row_min = i
+        for j, cb in enumerate(b, 1):
+            cost = 0 if ca == cb else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            current.append(value)
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+class SearchIndex:
+    def __init__(self, entries):
+        self.entries = list(entries)
+        self.by_id = {}
+        self.sorted_names = []
+        self.grams = {n: defaultdict(set) for n in NGRAM_SIZES}
+        self.by_type = defaultdict(set)
+        self.by_generation = defaultdict(set)
+        # Índice de deleções (estilo SymSpell) sobre os prefixos de cada nome:
+        # erros de digitação de até uma inserção/remoção/troca caem na mesma chave.
+        self.deletions = defaultdict(set)
+
+        for idx, entry in enumerate(self.entries):
+            name = entry['name']
+            self.by_id[entry['id']] = idx
+            self.sorted_names.append((name, idx))
+            for n in NGRAM_SIZES:
+                for gram in _ngrams(name, n):
+                    self.grams[n][gram].add(idx)
+            for length in range(FUZZY_MIN_LENGTH, len(name) + 1):
+                for key in _deletions(name[:length]):
+                    self.deletions[key].add(idx)
+            for pokemon_type in entry.get('types') or []:
+                self.by_type[pokemon_type].add(idx)
+            if entry.get('generation') is not None:
+                self.by_generation[int(entry['generation'])].add(idx)
+
+        self.sorted_names.sort()
+
+    def _allowed(self, pokemon_type=None, generation=None):
+        allowed = None
+        if pokemon_type:
+            allowed = self.by_type.get(pokemon_type.lower(), set())
+        if generation:
+            gen_set = self.by_generation.get(int(generation), set())
+            allowed = gen_set if allowed is None else allowed & gen_set
+        return allowed
+
+    def _prefix_matches(self, query):
+        matches = []
+        names = self.sorted_names
+        # Percorre por índice: fatiar a lista copiaria todo o resto a cada busca.
+        for position in range(bisect_left(names, (query,)), len(names)):
+            name, idx = names[position]
+            if not name.startswith(query):
+                break
+            matches.append(idx)
+        return matches
+
+    def _substring_matches(self, query):
+        n = 3 if len(query) >= 3 else 2
+        postings = sorted(
+            (self.grams[n].get(gram, set()) for gram in _ngrams(query, n)),
+            key=len
+        )
+        if not postings or not postings[0]:
+            return []
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                return []
+        return [idx for idx in candidates if query in self.entries[idx]['name']]
+
+    def _fuzzy_matches(self, query, exclude):
+        candidates = set()
+        for key in _deletions(query):
+            candidates |= self.deletions.get(key, set())
+
+        scored = []
+        for idx in candidates - exclude:
+            name = self.entries[idx]['name']
+            distance = min(
+                _edit_distance(query, name, FUZZY_MAX_DISTANCE),
+                _edit_distance(query, name[:len(query)], FUZZY_MAX_DISTANCE)
+            )
+            if distance <= FUZZY_MAX_DISTANCE:
+                scored.append((distance, self.entries[idx]['id'], idx))
+        scored.sort()
+        return [idx for _, _, idx in scored]
+
+    def search(self, query, limit=10, pokemon_type=None, generation=None, fuzzy=True):
+        query = query.lower().strip()
+        if not query:
+            return []
+
+        allowed = self._allowed(pokemon_type, generation)
+
+        def keep(indices):
+            return [i for i in indices if allowed is None or i in allowed]
+
+        seen = set()
+        ordered = []
+
+        def extend(indices):
+            for idx in indices:
+                if idx not in seen:
+                    seen.add(idx)
+                    ordered.append(idx)
+
+        if query.isdigit() and int(query) in self.by_id:
+            extend(keep([self.by_id[int(query)]]))
+
+        id_key = lambda i: self.entries[i]['id']
+        extend(sorted(keep(self._prefix_matches(query)), key=id_key))
+        if len(ordered) < limit:
+            substring = keep(self._substring_matches(query))
+            extend(sorted(substring, key=lambda i: (self.entries[i]['name'].index(query), id_key(i))))
+        if fuzzy and not ordered and len(query) >= FUZZY_MIN_LENGTH and not query.isdigit():
+            extend(keep(self._fuzzy_matches(query, seen)))
+
+        return [self.entries[idx] for idx in ordered[:limit]]
+
+
+@lru_cache(maxsize=1)
+def get_search_index():
+    return SearchIndex(get_all_catalog_entries())
@@ -0,0 +1,302 @@
+import argparse
+import atexit
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from services.battle_engine import (
+    CRITICAL_CHANCE, DEFAULT_LEVEL, HP, MIN_ROLL, SPEED,
+    BattleData, best_moves, calc_stats, compute_damage, load_battle_data
+)
+
+# Simulação Monte Carlo de batalhas entre times (singles, sem trocas: quando o
+# Pokémon ativo desmaia entra o próximo da lista). As N batalhas de um bloco
+# rodam juntas, turno a turno, como arrays; os blocos são distribuídos entre
+# processos. Os arrays de BattleData ficam em memória compartilhada: os
+# workers só recebem o nome do segmento uma vez, na inicialização.
+#
+#   python -m services.simulator charizard,blastoise venusaur,pikachu -n 20000 --seed 42
+
+CHUNK_SIZE = 2000
+DEFAULT_BATTLES = 10000
+DEFAULT_MAX_TURNS = 200
+MAX_TEAM_SIZE = 6
+Z_95 = 1.959964
+
+# Campos de BattleData copiados para a memória compartilhada.
+SHARED_FIELDS = (
+    'pokemon_ids', 'base_stats', 'types', 'move_types', 'move_power', 'move_accuracy',
+    'move_special', 'learn_offsets', 'learn_moves', 'type_matrix',
+)
+
+_worker_data = None
+_worker_shm = None
+
+
+class SharedBattleData:
+    # Empacota os arrays num único segmento SharedMemory. descriptor é o que
+    # vai para os workers: nome do segmento e (offset, shape, dtype) de cada campo.
+
+    def __init__(self, data):
+        layout = {}
+        offset = 0
+        for field in SHARED_FIELDS:
+            array = getattr(data, field)
+            offset = (offset + 63) // 64 * 64
+            layout[field] = (offset, array.shape, array.dtype.str)
+            offset += array.nbytes
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for field, (start, shape, dtype) in layout.items():
+            view = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=start)
+            view[...] = getattr(data, field)
+        self.descriptor = (self.shm.name, layout)
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def attach_shared(descriptor):
+    name, layout = descriptor
+    shm = shared_memory.SharedMemory(name=name)
+    arrays = {}
+    for field, (start, shape, dtype) in layout.items():
+        array = np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=start)
+        array.setflags(write=False)
+        arrays[field] = array
+    data = BattleData(
+        arrays['pokemon_ids'], [], arrays['base_stats'], arrays['types'], [], arrays['move_types'],
+        arrays['move_power'], arrays['move_accuracy'], arrays['move_special'], arrays['learn_offsets'],
+        arrays['learn_moves'], arrays['type_matrix']
+    )
+    return shm, data
+
+
+def _init_worker(descriptor):
+    global _worker_data, _worker_shm
+    _worker_shm, _worker_data = attach_shared(descriptor)
+
+
+def _move_table(data, teams, sizes, level, stats):
+    # best[lado, i, j]: ataque que o membro i do lado usa contra o membro j do
+    # oponente (maior dano esperado do learnset).
+    best = np.zeros((2, MAX_TEAM_SIZE, MAX_TEAM_SIZE), dtype=np.int32)
+    for side in (0, 1):
+        other = 1 - side
+        for i in range(sizes[side]):
+            for j in range(sizes[other]):
+                best[side, i, j] = best_moves(data, teams[side, i], teams[other, j], 1, level, stats)[0]
+    return best
+
+
+def simulate_chunk(team_a, team_b, battles, seed, level=DEFAULT_LEVEL, max_turns=DEFAULT_MAX_TURNS, data=None):
+    # team_a/team_b: índices de Pokémon em BattleData. Devolve, por batalha,
+    # vencedor (0, 1 ou -1 para empate por limite de turnos), turnos até o fim
+    # e turno do primeiro KO.
+    data = data or _worker_data or load_battle_data()
+    rng = np.random.default_rng(seed)
+    stats = data.stats if level == DEFAULT_LEVEL else calc_stats(data.base_stats, level)
+
+    sizes = np.array([len(team_a), len(team_b)])
+    teams = np.zeros((2, MAX_TEAM_SIZE), dtype=np.int32)
+    teams[0, :sizes[0]] = team_a
+    teams[1, :sizes[1]] = team_b
+    best = _move_table(data, teams, sizes, level, stats)
+
+    hp = np.zeros((battles, 2, MAX_TEAM_SIZE), dtype=np.int32)
+    for side in (0, 1):
+        hp[:, side, :sizes[side]] = stats[teams[side, :sizes[side]], HP]
+    active = np.zeros((battles, 2), dtype=np.int32)
+    winner = np.full(battles, -1, dtype=np.int8)
+    turns = np.full(battles, max_turns, dtype=np.int16)
+    first_ko = np.zeros(battles, dtype=np.int16)
+    live = np.arange(battles)
+
+    for turn in range(1, max_turns + 1):
+        if not live.size:
+            break
+        m = live.size
+        current = active[live]
+        pokemon = np.stack([teams[0, current[:, 0]], teams[1, current[:, 1]]], axis=1)
+        speed = stats[pokemon, SPEED]
+        first = np.where(
+            speed[:, 0] == speed[:, 1], rng.integers(2, size=m), (speed[:, 1] > speed[:, 0]).astype(np.int32)
+        )
+
+        for side in (first, 1 - first):
+            other = 1 - side
+            rows = np.arange(m)
+            attacker_member = current[rows, side]
+            defender_member = current[rows, other]
+            alive = hp[live, side, attacker_member] > 0
+            move = best[side, attacker_member, defender_member]
+            hit = alive & (rng.random(m) * 100 < data.move_accuracy[move])
+            critical = rng.random(m) < CRITICAL_CHANCE
+            roll = rng.uniform(MIN_ROLL, 1.0, m)
+            dealt = compute_damage(
+                data, pokemon[rows, side], pokemon[rows, other], move, level, roll, critical, stats
+            ) * hit
+            hp[live, other, defender_member] = np.maximum(hp[live, other, defender_member] - dealt, 0)
+
+        fainted = hp[live[:, None], [0, 1], current] <= 0
+        first_ko[live] = np.where((first_ko[live] == 0) & fainted.any(axis=1), turn, first_ko[live])
+        active[live] += fainted
+        lost = active[live] >= sizes
+        done = lost.any(axis=1)
+        winner[live[done]] = np.where(lost[done, 1], 0, 1)
+        turns[live[done]] = turn
+        live = live[~done]
+
+    return winner, turns, first_ko
+
+
+def wilson_interval(successes, trials, z=Z_95):
+    if not trials:
+        return 0.0, 0.0
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    center = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(center - margin, 0.0), min(center + margin, 1.0)
+
+
+def _distribution(values):
+    if not values.size:
+        return {'mean': None, 'p50': None, 'p90': None, 'max': None, 'histogram': {}}
+    counts = np.bincount(values)
+    return {
+        'mean': round(float(values.mean()), 3),
+        'p50': int(np.percentile(values, 50)),
+        'p90': int(np.percentile(values, 90)),
+        'max': int(values.max()),
+        'histogram': {int(turn): int(count) for turn, count in enumerate(counts) if count},
+    }
+
+
+class Simulator:
+    # Dono do pool de processos e do segmento compartilhado. O pool usa
+    # "spawn": não herda o estado do gevent/threads do processo web.
+
+    def __init__(self, workers=None, data=None):
+        self.data = data or load_battle_data()
+        self.workers = workers or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self._shared = None
+        self._pool = None
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._shared = SharedBattleData(self.data)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self._shared.descriptor,)
+                )
+            return self._pool
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+            if self._shared is not None:
+                self._shared.close()
+                self._shared = None
+
+    def run(self, team_a, team_b, battles=DEFAULT_BATTLES, seed=None, level=DEFAULT_LEVEL,
+            max_turns=DEFAULT_MAX_TURNS):
+        teams = []
+        for team in (team_a, team_b):
+            if not 1 <= len(team) <= MAX_TEAM_SIZE:
+                raise ValueError(f"Um time precisa ter de 1 a {MAX_TEAM_SIZE} Pokémon.")
+            teams.append([self.data.pokemon_index(p) for p in team])
+
+        # Os blocos (e as sementes de cada um) não dependem do número de
+        # workers: a mesma seed dá o mesmo resultado com 1 ou 32 processos.
+        sequence = np.random.SeedSequence(seed)
+        sizes = [CHUNK_SIZE] * (battles // CHUNK_SIZE)
+        if battles % CHUNK_SIZE:
+            sizes.append(battles % CHUNK_SIZE)
+        seeds = sequence.spawn(len(sizes))
+
+        start = time.perf_counter()
+        args = [(teams[0], teams[1], size, chunk_seed, level, max_turns) for size, chunk_seed in zip(sizes, seeds)]
+        if self.workers == 1 or len(sizes) == 1:
+            results = [simulate_chunk(*a, data=self.data) for a in args]
+        else:
+            results = list(self._get_pool().map(simulate_chunk, *zip(*args)))
+        elapsed = time.perf_counter() - start
+
+        winner = np.concatenate([r[0] for r in results])
+        turns = np.concatenate([r[1] for r in results])
+        first_ko = np.concatenate([r[2] for r in results])
+        wins_a = int((winner == 0).sum())
+        wins_b = int((winner == 1).sum())
+        finished = winner >= 0
+        return {
+            'team_a': [self.data.pokemon_names[i] for i in teams[0]],
+            'team_b': [self.data.pokemon_names[i] for i in teams[1]],
+            'battles': battles,
+            'seed': sequence.entropy,
+            'level': level,
+            'wins_a': wins_a,
+            'wins_b': wins_b,
+            'draws': battles - wins_a - wins_b,
+            'win_rate_a': wins_a / battles if battles else 0.0,
+            'ci95_a': wilson_interval(wins_a, battles),
+            'turns': _distribution(turns[finished]),
+            'turns_a_wins': _distribution(turns[winner == 0]),
+            'turns_b_wins': _distribution(turns[winner == 1]),
+            'first_ko_turn': _distribution(first_ko[first_ko > 0]),
+            'elapsed': round(elapsed, 4),
+        }
+
+
+_simulator = None
+_simulator_lock = threading.Lock()
+
+
+def get_simulator():
+    global _simulator
+    with _simulator_lock:
+        if _simulator is None:
+            _simulator = Simulator()
+            atexit.register(_simulator.close)
+        return _simulator
+
+
+def simulate(team_a, team_b, battles=DEFAULT_BATTLES, seed=None, level=DEFAULT_LEVEL, max_turns=DEFAULT_MAX_TURNS):
+    return get_simulator().run(team_a, team_b, battles, seed, level, max_turns)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simula batalhas entre dois times e estima a chance de vitória.")
+    parser.add_argument('team_a', help="Time A, nomes ou ids separados por vírgula.")
+    parser.add_argument('team_b', help="Time B, nomes ou ids separados por vírgula.")
+    parser.add_argument('-n', '--battles', type=int, default=DEFAULT_BATTLES)
+    parser.add_argument('--seed', type=int, default=None, help="Semente para resultados reproduzíveis.")
+    parser.add_argument('--workers', type=int, default=None, help="Processos (padrão: todos os núcleos).")
+    parser.add_argument('--level', type=int, default=DEFAULT_LEVEL)
+    args = parser.parse_args()
+
+    simulator = Simulator(workers=args.workers)
+    try:
+        result = simulator.run(args.team_a.split(','), args.team_b.split(','), args.battles, args.seed, args.level)
+    finally:
+        simulator.close()
+
+    low, high = result['ci95_a']
+    print(f"{' + '.join(result['team_a'])}  x  {' + '.join(result['team_b'])}")
+    print(f"batalhas: {result['battles']}  seed: {result['seed']}  tempo: {result['elapsed']}s")
+    print(f"vitórias A: {result['wins_a']}  vitórias B: {result['wins_b']}  empates: {result['draws']}")
+    print(f"chance de vitória de A: {result['win_rate_a']:.2%}  (IC 95%: {low:.2%} – {high:.2%})")
+    print(f"turnos até o fim: média {result['turns']['mean']}, p50 {result['turns']['p50']}, p90 {result['turns']['p90']}")
+    print(f"turno do primeiro KO: média {result['first_ko_turn']['mean']}, p50 {result['first_ko_turn']['p50']}")
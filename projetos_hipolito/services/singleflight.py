@@ -0,0 +1,83 @@
+import threading
+from functools import wraps
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    # Garante uma única execução em andamento por chave; quem chega durante
+    # a execução espera e recebe o mesmo resultado (ou a mesma exceção).
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        return {
+            'executions': self.executions,
+            'coalesced': self.coalesced,
+            'in_flight': self.in_flight(),
+        }
+
+
+_groups = {}
+
+
+def single_flight(func):
+    group = SingleFlight(func.__name__)
+    _groups[func.__name__] = group
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (args, tuple(sorted(kwargs.items())))
+        return group.do(key, func, *args, **kwargs)
+
+    wrapper.single_flight = group
+    return wrapper
+
+
+def get_single_flight_stats():
+    return {name: group.stats() for name, group in _groups.items()}
@@ -0,0 +1,221 @@
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from services.battle_engine import NO_TYPE, TYPE_INDEX, TYPES
+from services.catalog import FORM_ID_START
+from services.coverage import ALL_TYPES_MASK, bits_to_types, get_coverage_index, unpack_types
+from services.database import get_connection
+
+# Montagem de times de 6 por beam search sobre os bitsets do índice de
+# cobertura. A pontuação de um time (parcial ou completo) combina:
+#   - quantos Pokémon do banco o time acerta super efetivo (OR dos bitsets);
+#   - quantos tipos puros o time acerta super efetivo;
+#   - tipos de ataque aos quais o time fica exposto (mais membros fracos do
+#     que membros que resistem), como penalidade;
+#   - soma dos status base.
+# A cada vaga, cada time do feixe é expandido com todos os candidatos de uma
+# vez (operações vetorizadas) e só os beam_width melhores seguem.
+
+TEAM_SIZE = 6
+DEFAULT_BEAM_WIDTH = 48
+DEFAULT_ALTERNATIVES = 3
+
+COVERAGE_WEIGHT = 1.0
+TYPE_COVERAGE_WEIGHT = 0.5
+EXPOSURE_WEIGHT = 1.0
+STATS_WEIGHT = 1.0
+
+
+class TeamSearchSpace:
+
+    def __init__(self, coverage, generations):
+        data = coverage.data
+        self.data = data
+        self.coverage = coverage
+        self.total = len(data.pokemon_ids)
+
+        # Bitset Pokémon x Pokémon em palavras de 64 bits para OR + bitwise_count.
+        packed = coverage.super_hits
+        padding = (-packed.shape[1]) % 8
+        self.hits = np.ascontiguousarray(np.pad(packed, ((0, 0), (0, padding)))).view(np.uint64)
+        self.super_type_bits = coverage.super_type_bits
+        self.weak = unpack_types(coverage.weak_bits).astype(np.int8)
+        self.resist = unpack_types(coverage.resist_bits | coverage.immune_bits).astype(np.int8)
+        self.bst = data.base_stats.sum(axis=1)
+        self.max_bst = float(self.bst.max()) or 1.0
+        self.generations = generations
+
+        # Tipos do próprio Pokémon como bitset (para os tipos banidos).
+        own_types = np.where(data.types != NO_TYPE, np.left_shift(1, data.types.astype(np.uint32)), 0)
+        self.type_bits = own_types.sum(axis=1, dtype=np.uint32)
+
+    def candidates(self, generations=None, banned_types=(), exclude=(), include_forms=False, max_member_bst=None):
+        mask = np.ones(self.total, dtype=bool)
+        if not include_forms:
+            mask &= self.data.pokemon_ids < FORM_ID_START
+        if max_member_bst:
+            mask &= self.bst <= max_member_bst
+        if generations:
+            mask &= np.isin(self.generations, list(generations))
+        banned = 0
+        for name in banned_types:
+            if name not in TYPE_INDEX:
+                raise ValueError(f"Tipo desconhecido: {name}")
+            banned |= 1 << TYPE_INDEX[name]
+        if banned:
+            mask &= (self.type_bits & np.uint32(banned)) == 0
+        if exclude:
+            mask[list(exclude)] = False
+        return self._drop_dominated(np.flatnonzero(mask))
+
+    def _drop_dominated(self, indexes):
+        # Candidatos com os mesmos tipos e o mesmo bitset de cobertura só
+        # diferem pelos status base: fica só o de maior total.
+        if not indexes.size:
+            return indexes
+        order = indexes[np.argsort(-self.bst[indexes], kind='stable')]
+        key = np.concatenate([self.data.types[order].astype(np.uint64), self.hits[order]], axis=1)
+        _, first = np.unique(key, axis=0, return_index=True)
+        return np.sort(order[first])
+
+    def score(self, hits, super_types, weak, resist, bst, size):
+        coverage = np.bitwise_count(hits).sum(axis=-1) / self.total
+        type_coverage = np.bitwise_count(super_types) / len(TYPES)
+        exposed = (weak > resist).sum(axis=-1) / len(TYPES)
+        stats = bst / (size * self.max_bst)
+        return (COVERAGE_WEIGHT * coverage + TYPE_COVERAGE_WEIGHT * type_coverage
+                - EXPOSURE_WEIGHT * exposed + STATS_WEIGHT * stats)
+
+
+@lru_cache(maxsize=1)
+def get_team_search_space():
+    coverage = get_coverage_index()
+    with get_connection() as conn:
+        rows = dict(conn.execute("SELECT id, geracao FROM pokemons").fetchall())
+    generations = np.array([rows.get(int(i)) or 0 for i in coverage.data.pokemon_ids], dtype=np.int16)
+    return TeamSearchSpace(coverage, generations)
+
+
+class _Beam:
+    __slots__ = ('members', 'hits', 'super_types', 'weak', 'resist', 'bst', 'score')
+
+    def __init__(self, members, hits, super_types, weak, resist, bst, score=0.0):
+        self.members = members
+        self.hits = hits
+        self.super_types = super_types
+        self.weak = weak
+        self.resist = resist
+        self.bst = bst
+        self.score = score
+
+
+def _initial_beam(space, members):
+    hits = np.zeros(space.hits.shape[1], dtype=np.uint64)
+    super_types = np.uint32(0)
+    weak = np.zeros(len(TYPES), dtype=np.int16)
+    resist = np.zeros(len(TYPES), dtype=np.int16)
+    bst = 0.0
+    for i in members:
+        hits |= space.hits[i]
+        super_types |= space.super_type_bits[i]
+        weak += space.weak[i]
+        resist += space.resist[i]
+        bst += float(space.bst[i])
+    return _Beam(tuple(members), hits, super_types, weak, resist, bst)
+
+
+def search_teams(space, required=(), candidates=None, size=TEAM_SIZE, beam_width=DEFAULT_BEAM_WIDTH):
+    beams = [_initial_beam(space, required)]
+    beams[0].score = float(space.score(beams[0].hits, beams[0].super_types, beams[0].weak,
+                                       beams[0].resist, beams[0].bst, size))
+
+    for _ in range(len(required), size):
+        expanded = []
+        for beam in beams:
+            pool = candidates[~np.isin(candidates, beam.members)]
+            if not pool.size:
+                continue
+            hits = beam.hits | space.hits[pool]
+            super_types = beam.super_types | space.super_type_bits[pool]
+            weak = beam.weak + space.weak[pool]
+            resist = beam.resist + space.resist[pool]
+            bst = beam.bst + space.bst[pool]
+            scores = space.score(hits, super_types, weak, resist, bst, size)
+
+            top = np.argpartition(-scores, min(beam_width, pool.size) - 1)[:beam_width]
+            for t in top:
+                expanded.append(_Beam(
+                    beam.members + (int(pool[t]),), hits[t], super_types[t], weak[t], resist[t],
+                    float(bst[t]), float(scores[t])
+                ))
+        if not expanded:
+            break
+
+        # O mesmo time pode surgir de caminhos diferentes.
+        expanded.sort(key=lambda b: -b.score)
+        seen = set()
+        beams = []
+        for beam in expanded:
+            key = frozenset(beam.members)
+            if key not in seen:
+                seen.add(key)
+                beams.append(beam)
+                if len(beams) == beam_width:
+                    break
+    return beams
+
+
+def _describe(space, beam):
+    data = space.data
+    weak_types = [TYPES[t] for t in np.flatnonzero(beam.weak > beam.resist)]
+    super_bits = int(beam.super_types)
+    return {
+        'members': [
+            {
+                'id': int(data.pokemon_ids[i]),
+                'name': data.pokemon_names[i],
+                'types': [TYPES[t] for t in data.types[i] if t != NO_TYPE],
+                'base_stat_total': int(space.bst[i]),
+            }
+            for i in beam.members
+        ],
+        'score': round(beam.score, 4),
+        'pokemon_hit_super_effective': int(np.bitwise_count(beam.hits).sum()),
+        'pokemon_total': space.total,
+        'super_effective_against': bits_to_types(super_bits),
+        'not_covered': bits_to_types(ALL_TYPES_MASK & ~super_bits),
+        'exposed_to': weak_types,
+        'base_stat_total': int(beam.bst),
+    }
+
+
+def build_team(required=(), generations=None, banned_types=(), exclude=(), size=TEAM_SIZE, max_member_bst=None,
+               beam_width=DEFAULT_BEAM_WIDTH, alternatives=DEFAULT_ALTERNATIVES, include_forms=False):
+    # max_member_bst limita o total de status base de cada membro (ex: 600
+    # deixa de fora a maioria dos lendários). Pokémon obrigatórios não passam
+    # pelos filtros.
+    if not 1 <= size <= TEAM_SIZE:
+        raise ValueError(f"O time precisa ter de 1 a {TEAM_SIZE} Pokémon.")
+    start = time.perf_counter()
+    space = get_team_search_space()
+
+    required_indexes = list(dict.fromkeys(space.data.pokemon_index(p) for p in required))
+    if len(required_indexes) > size:
+        raise ValueError(f"Mais Pokémon obrigatórios do que vagas ({size}).")
+    excluded = {space.data.pokemon_index(p) for p in exclude}
+    banned_types = [t.lower().strip() for t in banned_types]
+
+    candidates = space.candidates(
+        generations, banned_types, excluded | set(required_indexes), include_forms, max_member_bst
+    )
+    beams = search_teams(space, required_indexes, candidates, size, beam_width)
+    teams = [_describe(space, beam) for beam in beams[:max(alternatives, 1)] if len(beam.members) == size]
+
+    return {
+        'team': teams[0] if teams else None,
+        'alternatives': teams[1:],
+        'candidates': int(candidates.size),
+        'elapsed': round(time.perf_counter() - start, 4),
+    }
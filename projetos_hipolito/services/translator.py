@@ -1,20 +1,230 @@
-from deep_translator import GoogleTranslator
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
 from functools import lru_cache
+from urllib.parse import urlparse
 
-@lru_cache(maxsize=512)
-def translate_to_portuguese(text):
-    if not text:
-        return text
-    
+from deep_translator import GoogleTranslator
+from deep_translator.constants import BASE_URLS
+
+from services.database import CACHE_DB_PATH, get_connection
+from services.http_client import protected_call
+from services.metrics import register_lru_cache
+
+# TRANSLATE_BASE_URL aponta para outro servidor (ex: o mock de benchmarks/mock_upstream.py).
+TRANSLATE_URL = os.getenv("TRANSLATE_BASE_URL", BASE_URLS['GOOGLE_TRANSLATE'])
+TRANSLATE_HOST = urlparse(TRANSLATE_URL).netloc
+SOURCE_LANG = 'en'
+TARGET_LANG = 'pt'
+
+# O Google Translate aceita até 5000 caracteres por requisição.
+MAX_BATCH_CHARS = 4500
+BATCH_SEPARATOR = '\n'
+
+_local = threading.local()
+
+_schema_lock = threading.Lock()
+_schema_ready = False
+
+_inflight_lock = threading.Lock()
+_inflight = {}
+
+
+def _connect():
+    global _schema_ready
+    conn = get_connection(CACHE_DB_PATH)
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS translations (
+                        hash TEXT PRIMARY KEY,
+                        source_text TEXT NOT NULL,
+                        translated_text TEXT NOT NULL,
+                        created_at REAL NOT NULL
+                    )
+                """)
+                conn.commit()
+                _schema_ready = True
+    return conn
+
+
+def _get_translator():
+    # GoogleTranslator guarda os parâmetros da requisição no objeto, então uma instância por thread/greenlet.
+    translator = getattr(_local, 'translator', None)
+    if translator is None:
+        translator = GoogleTranslator(source=SOURCE_LANG, target=TARGET_LANG)
+        # O deep-translator não aceita base_url no construtor do GoogleTranslator.
+        translator._base_url = TRANSLATE_URL
+        _local.translator = translator
+    return translator
+
+
+def text_hash(text):
+    return hashlib.sha1(f"{SOURCE_LANG}:{TARGET_LANG}:{text}".encode('utf-8')).hexdigest()
+
+
+def _load_stored(hashes):
+    stored = {}
+    if not hashes:
+        return stored
     try:
-        translator = GoogleTranslator(source='en', target='pt')
-        translated = translator.translate(text)
-        return translated
+        with _connect() as conn:
+            for start in range(0, len(hashes), 500):
+                chunk = hashes[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(
+                    f"SELECT hash, translated_text FROM translations WHERE hash IN ({placeholders})", chunk
+                ).fetchall()
+                stored.update((row['hash'], row['translated_text']) for row in rows)
+    except sqlite3.Error as e:
+        print(f"Erro ao ler traduções salvas: {e}")
+    return stored
+
+
+def _store(pairs):
+    if not pairs:
+        return
+    now = time.time()
+    try:
+        with _connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations (hash, source_text, translated_text, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(text_hash(source), source, translated, now) for source, translated in pairs]
+            )
+    except sqlite3.Error as e:
+        print(f"Erro ao salvar traduções: {e}")
+
+
+def _chunks(texts):
+    chunk, size = [], 0
+    for text in texts:
+        if chunk and size + len(text) + len(BATCH_SEPARATOR) > MAX_BATCH_CHARS:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(text)
+        size += len(text) + len(BATCH_SEPARATOR)
+    if chunk:
+        yield chunk
+
+
+def _translate_one(text):
+    try:
+        return protected_call(TRANSLATE_HOST, _get_translator().translate, text)
     except Exception as e:
         print(f"Erro ao traduzir: {e}")
+        return None
+
+
+def _translate_remote(texts):
+    results = {}
+    # Textos com quebra de linha não podem ser juntados com o separador.
+    joinable = [t for t in texts if BATCH_SEPARATOR not in t and len(t) < MAX_BATCH_CHARS]
+    joinable_set = set(joinable)
+    single = [t for t in texts if t not in joinable_set]
+
+    for chunk in _chunks(joinable):
+        if len(chunk) == 1:
+            single.append(chunk[0])
+            continue
+        translated = _translate_one(BATCH_SEPARATOR.join(chunk))
+        parts = translated.split(BATCH_SEPARATOR) if translated else []
+        if len(parts) == len(chunk):
+            results.update(zip(chunk, (p.strip() for p in parts)))
+        else:
+            single.extend(chunk)
+
+    for text in single:
+        translated = _translate_one(text)
+        if translated:
+            results[text] = translated
+    return results
+
+
+def translate_batch(texts):
+    texts = list(texts)
+    unique = [t for t in dict.fromkeys(texts) if t]
+    if not unique:
+        return texts
+
+    by_hash = {text_hash(t): t for t in unique}
+    results = {by_hash[h]: translated for h, translated in _load_stored(list(by_hash)).items()}
+
+    # Textos que outra requisição já está traduzindo: espera em vez de repetir a chamada.
+    owned, waiting = [], []
+    with _inflight_lock:
+        for text in unique:
+            if text in results:
+                continue
+            entry = _inflight.get(text)
+            if entry is None:
+                _inflight[text] = {'event': threading.Event(), 'result': None}
+                owned.append(text)
+            else:
+                waiting.append((text, entry))
+
+    if owned:
+        try:
+            translated = _translate_remote(owned)
+            _store(translated.items())
+            results.update(translated)
+        finally:
+            with _inflight_lock:
+                for text in owned:
+                    entry = _inflight.pop(text)
+                    entry['result'] = results.get(text)
+                    entry['event'].set()
+
+    for text, entry in waiting:
+        entry['event'].wait()
+        if entry['result']:
+            results[text] = entry['result']
+
+    return [results.get(t, t) if t else t for t in texts]
+
+
+@register_lru_cache
+@lru_cache(maxsize=512)
+def translate_to_portuguese(text):
+    if not text:
         return text
 
+    return translate_batch([text])[0]
+
 def translate_ability_description(description, language='pt'):
     if language == 'pt' and description and description != "Descrição não disponível":
         return translate_to_portuguese(description)
     return description
+
+
+def warm_up(limit=None):
+    with get_connection() as conn:
+        texts = [row[0] for row in conn.execute(
+            "SELECT descricao_efeito FROM moves_list WHERE descricao_efeito IS NOT NULL AND descricao_efeito != '' "
+            "UNION SELECT curta_descricao FROM abilities_list WHERE curta_descricao IS NOT NULL AND curta_descricao != ''"
+        )]
+    if limit:
+        texts = texts[:limit]
+
+    stored = _load_stored([text_hash(t) for t in texts])
+    pending = [t for t in texts if text_hash(t) not in stored]
+    print(f"{len(texts)} textos encontrados, {len(pending)} sem tradução salva.")
+
+    done = 0
+    for chunk in _chunks(pending):
+        translate_batch(chunk)
+        done += len(chunk)
+        print(f"  {done}/{len(pending)} traduzidos")
+    return done
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Pré-traduz os textos de ataques e habilidades de pokemons.db.")
+    parser.add_argument('--limit', type=int, default=None, help="Traduz no máximo N textos.")
+    args = parser.parse_args()
+    warm_up(args.limit)
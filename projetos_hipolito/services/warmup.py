@@ -0,0 +1,173 @@
+import argparse
+import os
+import re
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from services.catalog import get_catalog_bounds, get_catalog_page
+from services.detail_planner import load_pokemon_detail
+from services.metrics import WARMUP_LAST_COMPLETED, WARMUP_LAST_DURATION, WARMUP_PENDING, WARMUP_TASKS
+from services.move_store import get_learnable_move_names
+from services.pokeapi import get_move_details
+from services.translator import translate_to_portuguese
+
+# Aquecimento dos lru_cache de services/pokeapi.py e services/translator.py,
+# que começam vazios a cada deploy.
+#
+# run_forever() roda uma rodada ao subir o app e depois a cada
+# WARMUP_INTERVAL segundos. Cada rodada pega os WARMUP_TOP_N Pokémon mais
+# acessados segundo o access log do gunicorn (WARMUP_ACCESS_LOG; sem log, os
+# primeiros números da Pokédex) e carrega a página de detalhes de cada um
+# (detalhes, espécie, cadeia evolutiva, habilidades e traduções, pelo mesmo
+# load_pokemon_detail da rota) e depois os ataques que eles aprendem, com o
+# efeito traduzido.
+#
+# No máximo WARMUP_CONCURRENCY tarefas ao mesmo tempo e WARMUP_RATE tarefas
+# iniciadas por segundo, para o aquecimento não disputar a PokeAPI com os
+# usuários. prefetch_catalog_page() usa o mesmo limite para carregar a
+# próxima página da Pokédex enquanto o usuário vê a atual.
+#
+#   python -m services.warmup --top 50     (uma rodada, sem o app)
+
+ENABLED = os.getenv("WARMUP_ENABLED", "1") == "1"
+TOP_N = int(os.getenv("WARMUP_TOP_N", "151"))
+INTERVAL = int(os.getenv("WARMUP_INTERVAL", str(6 * 60 * 60)))
+ACCESS_LOG = os.getenv("WARMUP_ACCESS_LOG")
+CONCURRENCY = int(os.getenv("WARMUP_CONCURRENCY", "4"))
+RATE = float(os.getenv("WARMUP_RATE", "10"))
+
+ACCESS_LOG_TAIL_BYTES = 20 * 1024 * 1024
+DETAIL_PATH = re.compile(r'"GET /pokemon/([^/?\s"]+)')
+
+
+class RateLimiter:
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_limiter = RateLimiter(RATE)
+_executor = ThreadPoolExecutor(max_workers=CONCURRENCY)
+# Separado para a próxima página não esperar atrás de uma rodada inteira.
+_prefetch_executor = ThreadPoolExecutor(max_workers=2)
+_run_lock = threading.Lock()
+_pages_lock = threading.Lock()
+_prefetched_pages = set()
+
+
+def _read_access_log(path):
+    # Só o fim do arquivo: o que importa é a popularidade recente.
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(0, f.tell() - ACCESS_LOG_TAIL_BYTES))
+        return f.read().decode('utf-8', 'replace')
+
+
+def popular_pokemon(limit=TOP_N, access_log=ACCESS_LOG):
+    keys = []
+    if access_log:
+        try:
+            views = Counter(key.lower() for key in DETAIL_PATH.findall(_read_access_log(access_log)))
+            keys = [key for key, _ in views.most_common(limit)]
+        except OSError as e:
+            print(f"Aviso: não foi possível ler o access log {access_log}: {e}")
+
+    # Completa com os primeiros números da Pokédex.
+    _, max_id = get_catalog_bounds()
+    for pokemon_id in range(1, max_id + 1):
+        if len(keys) >= limit:
+            break
+        if str(pokemon_id) not in keys:
+            keys.append(str(pokemon_id))
+    return keys
+
+
+def _task(kind, fn, *args):
+    _limiter.wait()
+    try:
+        result = fn(*args)
+        WARMUP_TASKS.labels(kind, 'ok').inc()
+        return result
+    except Exception as e:
+        print(f"Erro no aquecimento ({kind} {args}): {e}")
+        WARMUP_TASKS.labels(kind, 'error').inc()
+        return None
+    finally:
+        WARMUP_PENDING.dec()
+
+
+def _warm_pokemon(key):
+    context = load_pokemon_detail(key)
+    if not context:
+        return []
+    pokemon = context['pokemon']
+    return get_learnable_move_names(pokemon['id']) or [m['name'] for m in pokemon.get('moves', [])]
+
+
+def _warm_move(name):
+    move = get_move_details(name)
+    if move and move.get('effect'):
+        translate_to_portuguese(move['effect'])
+
+
+def run_warm_up(limit=TOP_N, access_log=ACCESS_LOG):
+    # Uma rodada completa; rodadas simultâneas são ignoradas.
+    if not _run_lock.acquire(blocking=False):
+        return None
+    try:
+        start = time.monotonic()
+        keys = popular_pokemon(limit, access_log)
+        WARMUP_PENDING.inc(len(keys))
+        move_lists = list(_executor.map(lambda key: _task('pokemon', _warm_pokemon, key), keys))
+
+        moves = list(dict.fromkeys(name for names in move_lists if names for name in names))
+        WARMUP_PENDING.inc(len(moves))
+        list(_executor.map(lambda name: _task('move', _warm_move, name), moves))
+
+        elapsed = time.monotonic() - start
+        WARMUP_LAST_DURATION.set(elapsed)
+        WARMUP_LAST_COMPLETED.set_to_current_time()
+        print(f"Aquecimento: {len(keys)} Pokémon e {len(moves)} ataques em {elapsed:.1f}s")
+        return {'pokemon': len(keys), 'moves': len(moves), 'elapsed': elapsed}
+    finally:
+        _run_lock.release()
+
+
+def run_forever(sleep=time.sleep):
+    # Passe socketio.sleep quando rodar como tarefa de fundo do SocketIO.
+    while True:
+        try:
+            run_warm_up()
+        except Exception as e:
+            print(f"Erro no aquecimento de cache: {e}")
+        sleep(INTERVAL)
+
+
+def prefetch_catalog_page(page, per_page):
+    # Carrega a página em segundo plano, uma vez por processo.
+    with _pages_lock:
+        if (page, per_page) in _prefetched_pages:
+            return
+        _prefetched_pages.add((page, per_page))
+    WARMUP_PENDING.inc()
+    _prefetch_executor.submit(_task, 'catalog_page', get_catalog_page, page, per_page)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Aquece os caches da PokeAPI e das traduções.")
+    parser.add_argument('--top', type=int, default=TOP_N, help="Quantidade de Pokémon.")
+    parser.add_argument('--access-log', default=ACCESS_LOG, help="Access log do gunicorn para medir popularidade.")
+    args = parser.parse_args()
+    run_warm_up(args.top, args.access_log)
@@ -9,6 +9,15 @@ document.addEventListener('DOMContentLoaded', () => {
     const contextInput = document.getElementById('modal-pokemon-context');
 
     let chatHistory = []; 
+
+    // Identifica a conversa no servidor, que guarda a memória da Enfermeira Joy.
+    let sessionId = localStorage.getItem('joySessionId');
+    if (!sessionId) {
+        sessionId = window.crypto && crypto.randomUUID
+            ? crypto.randomUUID()
+            : `${Date.now()}-${Math.random().toString(16).slice(2)}`;
+        localStorage.setItem('joySessionId', sessionId);
+    }
     const initialBotMessageText = "Como posso ajudar a manter seus Pokémon fortes e prontos para a batalha? Qual é sua dúvida?";
 
     function scrollToBottom() {
@@ -76,7 +85,86 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
     
+    // Streaming pelo SocketIO (a resposta aparece enquanto é gerada). Sem
+    // conexão, cai no POST /api/ai_chat, que devolve tudo de uma vez.
+    const socket = (typeof io !== 'undefined') ? io() : null;
+    let activeStream = null;
+    let requestCounter = 0;
+
+    function showLoading() {
+        const loadingMessage = document.createElement('div');
+        loadingMessage.classList.add('message', 'bot-message', 'loading');
+        loadingMessage.innerHTML = '🩺 Enfermeira Joy está analisando...';
+        chatBox.appendChild(loadingMessage);
+        scrollToBottom();
+        return loadingMessage;
+    }
+
+    function finishStream() {
+        activeStream = null;
+        sendBtn.innerText = 'Enviar';
+        sendBtn.disabled = false;
+        userInput.focus();
+    }
+
+    if (socket) {
+        socket.on('chat_chunk', (data, ack) => {
+            // O ack libera o próximo pedaço no servidor (contrapressão).
+            if (ack) ack();
+            if (!activeStream || data.id !== activeStream.id) return;
+
+            if (!activeStream.messageDiv) {
+                chatBox.removeChild(activeStream.loadingMessage);
+                activeStream.messageDiv = document.createElement('div');
+                activeStream.messageDiv.classList.add('message', 'bot-message');
+                chatBox.appendChild(activeStream.messageDiv);
+            }
+            activeStream.text += data.text;
+            activeStream.messageDiv.innerHTML = activeStream.text.replace(/\n/g, '<br>');
+            scrollToBottom();
+        });
+
+        socket.on('chat_done', (data) => {
+            if (!activeStream || data.id !== activeStream.id) return;
+            if (activeStream.messageDiv) {
+                chatHistory.push({"role": "model", "parts": [{"text": activeStream.text}]});
+            } else {
+                chatBox.removeChild(activeStream.loadingMessage);
+            }
+            finishStream();
+        });
+
+        socket.on('chat_error', (data) => {
+            if (!activeStream || data.id !== activeStream.id) return;
+            if (!activeStream.messageDiv) chatBox.removeChild(activeStream.loadingMessage);
+            addMessage(`Erro da IA: ${data.error}`, false, false);
+            finishStream();
+        });
+    }
+
+    function cancelStream() {
+        if (!activeStream) return;
+        socket.emit('chat_cancel', { id: activeStream.id });
+        sendBtn.disabled = true;
+    }
+
+    function sendViaSocket(aiPrompt) {
+        activeStream = {
+            id: `chat-${++requestCounter}`,
+            text: '',
+            messageDiv: null,
+            loadingMessage: showLoading()
+        };
+        sendBtn.innerText = 'Parar';
+        socket.emit('chat_message', { id: activeStream.id, prompt: aiPrompt, session_id: sessionId });
+    }
+
     async function sendMessage() {
+        if (activeStream) {
+            cancelStream();
+            return;
+        }
+
         const rawPrompt = userInput.value.trim();
         if (!rawPrompt) return;
 
@@ -89,13 +177,14 @@ document.addEventListener('DOMContentLoaded', () => {
 
         addMessage(rawPrompt, true);
         userInput.value = '';
+
+        if (socket && socket.connected) {
+            sendViaSocket(aiPrompt);
+            return;
+        }
+
         sendBtn.disabled = true;
-        
-        const loadingMessage = document.createElement('div');
-        loadingMessage.classList.add('message', 'bot-message', 'loading');
-        loadingMessage.innerHTML = '🩺 Enfermeira Joy está analisando...';
-        chatBox.appendChild(loadingMessage);
-        scrollToBottom();
+        const loadingMessage = showLoading();
 
         try {
             const response = await fetch('/api/ai_chat', {
@@ -105,7 +194,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 },
                 body: JSON.stringify({ 
                     prompt: aiPrompt,
-                    history: chatHistory 
+                    session_id: sessionId
                 })
             });
 
@@ -131,7 +220,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
     sendBtn.addEventListener('click', sendMessage);
     userInput.addEventListener('keypress', (e) => {
-        if (e.key === 'Enter') {
+        if (e.key === 'Enter' && !activeStream) {
             sendMessage();
         }
     });
@@ -0,0 +1,37 @@
+import numpy as np
+
+from services.battle_engine import MIN_ROLL, calc_stats, compute_damage, damage, damage_against_all, load_battle_data
+
+# Charizard (Sp. Atk 129 no nível 50) usando Flamethrower (90, especial)
+# contra Venusaur (Sp. Def 120): base floor(floor(22 * 90 * 129 / 120) / 50) + 2 = 44,
+# STAB x1.5 e fogo contra planta/veneno x2.
+
+
+def test_calc_stats_level_50():
+    data = load_battle_data()
+    stats = calc_stats(data.base_stats[data.pokemon_index('charizard')])
+    assert stats.tolist() == [153, 104, 98, 129, 105, 120]
+
+
+def test_known_damage_range():
+    assert damage('charizard', 'venusaur', 'flamethrower') == 132
+    assert damage('charizard', 'venusaur', 'flamethrower', roll=MIN_ROLL) == 112
+    assert damage('charizard', 'venusaur', 'flamethrower', critical=True) == 198
+
+
+def test_immunity_deals_no_damage():
+    assert damage('garchomp', 'charizard', 'earthquake') == 0
+
+
+def test_vectorized_matches_scalar():
+    data = load_battle_data()
+    against_all = damage_against_all('charizard', 'flamethrower')
+    for name in ('venusaur', 'blastoise', 'pikachu', 'ferrothorn', 'dragonite'):
+        assert against_all[name] == damage('charizard', name, 'flamethrower')
+
+    rolls = np.array([MIN_ROLL, 1.0])
+    values = compute_damage(
+        data, data.pokemon_index('charizard'), data.pokemon_index('venusaur'), data.move_index('flamethrower'),
+        roll=rolls
+    )
+    assert values.tolist() == [112, 132]
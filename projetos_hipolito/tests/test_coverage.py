@@ -0,0 +1,43 @@
+import numpy as np
+
+from services.battle_engine import TYPE_INDEX
+from services.coverage import bits_to_types, get_coverage_index, get_team_coverage, type_defense
+
+TEAM = ['charizard', 'blastoise', 'venusaur']
+
+
+def _bits(*types):
+    return sum(1 << TYPE_INDEX[t] for t in types)
+
+
+def test_pokemon_bitsets():
+    index = get_coverage_index()
+    charizard = index.index('charizard')
+    assert int(index.weak_bits[charizard]) == _bits('rock', 'water', 'electric')
+    assert int(index.immune_bits[charizard]) == _bits('ground')
+    assert bits_to_types(index.weak_bits[charizard]) == ['rock', 'water', 'electric']
+
+
+def test_type_defense_matches_index():
+    coverage = get_coverage_index().pokemon_coverage('charizard')['defense']
+    defense = type_defense(['fire', 'flying'])
+    for key in ('weaknesses', 'resistances', 'immunities'):
+        assert defense[key] == coverage[key]
+
+
+def test_team_coverage():
+    index = get_coverage_index()
+    result = get_team_coverage(TEAM)
+
+    assert result['members'] == TEAM
+    assert result['defense']['electric'] == {'weak': 2, 'resist': 1}
+    # Gelo: Venusaur fraco, Blastoise resiste, Charizard neutro (fogo x½, voador x2).
+    assert result['defense']['ice'] == {'weak': 1, 'resist': 1}
+    assert result['shared_weaknesses'] == []
+
+    # O OR dos bitsets empacotados tem que bater com a conta direta.
+    members = [index.index(name) for name in TEAM]
+    move_bits = np.bitwise_or.reduce(index.move_type_bits[members])
+    expected = int(((index.weak_bits & move_bits) != 0).sum())
+    assert result['offense']['pokemon_hit_super_effective'] == expected
+    assert result['offense']['move_types'] == bits_to_types(move_bits)
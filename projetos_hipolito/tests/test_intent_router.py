@@ -0,0 +1,29 @@
+from services.intent_router import route
+
+# Direção da pergunta de efetividade: quem vem antes de "contra" ataca.
+#
+#   POKEAPI_OFFLINE=1 python -m pytest tests
+
+
+def test_type_against_pokemon():
+    answer = route("agua é efetivo contra charizard?")
+    assert answer == "Ataques do tipo Water contra Charizard (Fire/Flying): é super efetivo, x2."
+
+
+def test_pokemon_against_type():
+    answer = route("o charizard é forte contra agua?")
+    assert answer.splitlines() == [
+        "Charizard (Fire/Flying) contra Water:",
+        "Ataques do tipo Fire: não é muito efetivo, x½.",
+        "Ataques do tipo Flying: causa dano normal, x1.",
+    ]
+
+
+def test_pokemon_weak_against_type():
+    answer = route("o charizard é fraco contra agua?")
+    assert answer == "Ataques do tipo Water contra Charizard (Fire/Flying): é super efetivo, x2."
+
+
+def test_ambiguous_direction_goes_to_model():
+    assert route("agua é efetivo no charizard?") is None
+    assert route("charizard e agua contra pikachu") is None
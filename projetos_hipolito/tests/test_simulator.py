@@ -0,0 +1,42 @@
+import pytest
+
+from services.simulator import CHUNK_SIZE, Simulator, wilson_interval
+
+TEAM_A = ['charizard', 'blastoise']
+TEAM_B = ['venusaur', 'pikachu']
+
+
+def _without_timing(result):
+    return {key: value for key, value in result.items() if key != 'elapsed'}
+
+
+def test_same_seed_same_result_with_any_worker_count():
+    battles = CHUNK_SIZE * 2 + 500
+    single = Simulator(workers=1)
+    pool = Simulator(workers=2)
+    try:
+        expected = _without_timing(single.run(TEAM_A, TEAM_B, battles, seed=42))
+        assert _without_timing(pool.run(TEAM_A, TEAM_B, battles, seed=42)) == expected
+    finally:
+        pool.close()
+
+    assert expected['wins_a'] + expected['wins_b'] + expected['draws'] == battles
+
+
+def test_type_advantage_wins_most_battles():
+    result = Simulator(workers=1).run(['charizard'], ['venusaur'], 2000, seed=7)
+    assert result['win_rate_a'] > 0.9
+    low, high = result['ci95_a']
+    assert low <= result['win_rate_a'] <= high
+
+
+def test_wilson_interval():
+    low, high = wilson_interval(50, 100)
+    assert low == pytest.approx(0.4038, abs=1e-4)
+    assert high == pytest.approx(0.5962, abs=1e-4)
+    assert wilson_interval(0, 0) == (0.0, 0.0)
+
+
+def test_team_size_is_validated():
+    with pytest.raises(ValueError):
+        Simulator(workers=1).run([], TEAM_B, 10)
@@ -0,0 +1,56 @@
+import pytest
+
+from services.team_builder import TEAM_SIZE, build_team, get_team_search_space
+
+# A busca cobre todos os Pokémon do banco em menos de um segundo (o índice de
+# cobertura é montado antes, fora da medição).
+TIME_BUDGET = 1.0
+
+
+@pytest.fixture(scope='module', autouse=True)
+def search_space():
+    return get_team_search_space()
+
+
+def _names(team):
+    return [member['name'] for member in team['members']]
+
+
+def test_constraints_are_respected():
+    result = build_team(required=['pikachu', 'gyarados'], banned_types=['fire', 'water'], exclude=['garchomp'])
+    team = result['team']
+
+    assert len(team['members']) == TEAM_SIZE
+    assert _names(team)[:2] == ['pikachu', 'gyarados']
+    # Obrigatórios não passam pelos filtros (Gyarados é de água).
+    for member in team['members'][2:]:
+        assert not {'fire', 'water'} & set(member['types'])
+    assert 'garchomp' not in _names(team)
+    assert result['elapsed'] < TIME_BUDGET
+
+
+def test_generation_and_bst_filters():
+    space = get_team_search_space()
+    result = build_team(generations=[1], max_member_bst=500)
+    for member in result['team']['members']:
+        index = space.data.pokemon_index(member['id'])
+        assert space.generations[index] == 1
+        assert member['base_stat_total'] <= 500
+    assert result['elapsed'] < TIME_BUDGET
+
+
+def test_alternatives_are_distinct_and_ranked():
+    result = build_team()
+    teams = [result['team']] + result['alternatives']
+    assert len({frozenset(_names(team)) for team in teams}) == len(teams)
+    scores = [team['score'] for team in teams]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_invalid_input():
+    with pytest.raises(ValueError):
+        build_team(size=7)
+    with pytest.raises(ValueError):
+        build_team(banned_types=['plasma'])
+    with pytest.raises(KeyError):
+        build_team(required=['missingno'])